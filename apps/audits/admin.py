@@ -1,12 +1,16 @@
 from django.contrib import admin
 
+from apps.common.admin import LargeTableAdminMixin
+
 from .models import AuditLog
 
 
 @admin.register(AuditLog)
-class AuditLogAdmin(admin.ModelAdmin):
-    list_display = ['email', 'action', 'ip_address', 'created_at']
+class AuditLogAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ['email', 'action', 'ip_address', 'count', 'created_at', 'last_seen']
     list_filter = ['action', 'created_at']
+    date_hierarchy = 'created_at'
+    autocomplete_fields = ['user']
     search_fields = ['email', 'ip_address']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['count', 'first_seen', 'last_seen', 'created_at', 'updated_at']
     ordering = ['-created_at']
@@ -0,0 +1,153 @@
+"""
+Live audit event fan-out over a Redis stream.
+
+The audit-log tasks append every entry they write to AUDIT_STREAM_KEY (XADD,
+capped at about AUDIT_STREAM_MAXLEN entries). Each SSE client follows the
+stream with its own cursor, so Redis does the fan-out, a reconnecting client
+resumes from its Last-Event-ID, and nobody polls the audit table.
+"""
+import json
+import logging
+import re
+import time
+
+import redis
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+logger = logging.getLogger(__name__)
+
+STREAM_BATCH = 100
+RETRY_MS = 3000
+EVENT_ID_RE = re.compile(r"^\d+-\d+$")
+FILTER_FIELDS = ("action", "email", "ip")
+
+_sync_client = None
+
+
+def enabled():
+    return bool(settings.AUDIT_STREAM_REDIS_URL)
+
+
+def get_redis():
+    global _sync_client
+    if _sync_client is None:
+        _sync_client = redis.Redis.from_url(settings.AUDIT_STREAM_REDIS_URL)
+    return _sync_client
+
+
+def get_async_redis():
+    """A new asyncio client; each streaming connection owns (and closes) one."""
+    import redis.asyncio
+
+    return redis.asyncio.Redis.from_url(settings.AUDIT_STREAM_REDIS_URL)
+
+
+def event_payload(log):
+    return {
+        "id": str(log.id),
+        "email": log.email,
+        "event": log.action,
+        "ip_address": log.ip_address,
+        "user_agent": log.user_agent,
+        "details": log.details,
+        "count": log.count,
+        "created_at": log.created_at,
+        "last_seen": log.last_seen or log.created_at,
+    }
+
+
+def publish(logs):
+    """Append audit logs to the stream in one round trip; never fails the caller."""
+    if not enabled() or not logs:
+        return
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for log in logs:
+            pipe.xadd(
+                settings.AUDIT_STREAM_KEY,
+                {
+                    "action": log.action,
+                    "email": log.email,
+                    "ip": log.ip_address or "",
+                    "data": json.dumps(event_payload(log), cls=DjangoJSONEncoder),
+                },
+                maxlen=settings.AUDIT_STREAM_MAXLEN,
+                approximate=True,
+            )
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"⚠️ Could not publish {len(logs)} audit events: {str(e)}")
+
+
+def _id_tuple(event_id):
+    ms, seq = event_id.split("-")
+    return int(ms), int(seq)
+
+
+def _matches(fields, filters):
+    return all(fields.get(name.encode(), b"").decode() == value for name, value in filters.items())
+
+
+def _sse(event, data, event_id=None):
+    lines = [f"id: {event_id}"] if event_id else []
+    lines += [f"event: {event}", f"data: {data}"]
+    return "\n".join(lines) + "\n\n"
+
+
+async def follow(client, cursor, filters):
+    """
+    Yield SSE messages for stream entries after ``cursor`` ("$" for new ones
+    only) that match ``filters``.
+
+    Backpressure is pull-based: the next batch (at most STREAM_BATCH entries)
+    is read only once the previous one has been handed to the ASGI server,
+    so a slow client costs one cursor, not a growing buffer. A client that
+    falls further behind than the stream's retention gets a "gap" event and
+    continues from the oldest retained entry.
+    """
+    key = settings.AUDIT_STREAM_KEY
+    heartbeat = settings.AUDIT_STREAM_HEARTBEAT_SECONDS
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        if cursor == "$":
+            # Pin "$" to a concrete id so nothing published between reads is skipped.
+            latest = await client.xrevrange(key, "+", "-", count=1)
+            cursor = latest[0][0].decode() if latest else "0-0"
+        else:
+            gap = await _gap(client, key, cursor)
+            if gap:
+                yield gap
+
+        last_sent = time.monotonic()
+        while True:
+            batch = await client.xread({key: cursor}, count=STREAM_BATCH, block=int(heartbeat * 1000))
+            entries = batch[0][1] if batch else []
+            for entry_id, fields in entries:
+                cursor = entry_id.decode()
+                if _matches(fields, filters):
+                    last_sent = time.monotonic()
+                    yield _sse("audit", fields[b"data"].decode(), cursor)
+
+            if time.monotonic() - last_sent >= heartbeat:
+                # Keeps proxies from timing out idle (or fully filtered) streams.
+                last_sent = time.monotonic()
+                yield ": keep-alive\n\n"
+            if len(entries) == STREAM_BATCH:
+                # Behind: check whether delivering this batch let retention overtake the cursor.
+                gap = await _gap(client, key, cursor)
+                if gap:
+                    yield gap
+    finally:
+        await client.aclose()
+
+
+async def _gap(client, key, cursor):
+    """A "gap" event if entries after ``cursor`` may have been trimmed away."""
+    if cursor == "0-0":
+        return None
+    oldest = await client.xrange(key, "-", "+", count=1)
+    if oldest and _id_tuple(cursor) < _id_tuple(oldest[0][0].decode()):
+        logger.warning(f"⚠️ Audit stream consumer fell behind retention at {cursor}")
+        return _sse("gap", json.dumps({"last_event_id": cursor, "resumed_from": oldest[0][0].decode()}))
+    return None
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+# The audit table is expected to hold 100M+ rows, so nothing here rewrites or
+# scans it under a lock: the new columns are nullable or have a constant
+# default (metadata-only on Postgres 11+), existing rows are not backfilled
+# (readers fall back to created_at), and count is a plain integer because a
+# PositiveIntegerField's CHECK would be validated by a full scan. The index is
+# built concurrently in 0004, outside this migration's transaction.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("audits", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="auditlog",
+            name="count",
+            field=models.IntegerField(default=1),
+        ),
+        # Added without a default so existing rows stay null rather than all
+        # getting the migration time; new rows get timezone.now from Django.
+        migrations.AddField(
+            model_name="auditlog",
+            name="first_seen",
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AddField(
+            model_name="auditlog",
+            name="last_seen",
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AlterField(
+            model_name="auditlog",
+            name="first_seen",
+            field=models.DateTimeField(default=django.utils.timezone.now, null=True),
+        ),
+        migrations.AlterField(
+            model_name="auditlog",
+            name="last_seen",
+            field=models.DateTimeField(default=django.utils.timezone.now, null=True),
+        ),
+        migrations.AddField(
+            model_name="auditlog",
+            name="coalesce_key",
+            field=models.CharField(blank=True, editable=False, max_length=32, null=True),
+        ),
+    ]
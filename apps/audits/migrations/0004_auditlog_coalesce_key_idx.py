@@ -0,0 +1,41 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:02
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class AddIndexConcurrentlyOnPostgres(AddIndexConcurrently):
+    """CREATE INDEX CONCURRENTLY on Postgres; a plain AddIndex elsewhere (SQLite in tests)."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        return migrations.AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+        return migrations.AddIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run in a transaction; it is the only
+    # operation here, so a failure leaves no half-applied schema (drop the
+    # INVALID index it may leave behind and re-run).
+    atomic = False
+
+    dependencies = [
+        ("audits", "0003_auditlog_coalescing"),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyOnPostgres(
+            model_name="auditlog",
+            index=models.Index(
+                condition=models.Q(("coalesce_key__isnull", False)),
+                fields=["coalesce_key"],
+                name="audits_coalesce_key_idx",
+            ),
+        ),
+    ]
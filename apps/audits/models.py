@@ -1,5 +1,7 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
 
 from apps.common.models import TimeStampedModel
 
@@ -24,6 +26,13 @@ class AuditLog(TimeStampedModel):
     ip_address = models.GenericIPAddressField(blank=True, null=True)
     user_agent = models.TextField(blank=True, null=True)
     details = models.JSONField(default=dict, blank=True)
+    # Repeated events are merged into one row when AUDIT_COALESCE_SECONDS is
+    # set (see AuditService.coalesce); other rows keep count=1. first_seen and
+    # last_seen are null on rows written before they existed (read created_at).
+    count = models.IntegerField(default=1)
+    first_seen = models.DateTimeField(null=True, default=timezone.now)
+    last_seen = models.DateTimeField(null=True, default=timezone.now)
+    coalesce_key = models.CharField(max_length=32, blank=True, null=True, editable=False)
     
     class Meta:
         ordering = ['-created_at']
@@ -31,6 +40,9 @@ class AuditLog(TimeStampedModel):
             models.Index(fields=['email', 'action']),
             models.Index(fields=['action', 'created_at']),
             models.Index(fields=['email', 'created_at']),
+            models.Index(
+                fields=['coalesce_key'], name='audits_coalesce_key_idx', condition=Q(coalesce_key__isnull=False)
+            ),
         ]
 
     def __str__(self):
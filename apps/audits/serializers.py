@@ -1,12 +1,43 @@
+from django.conf import settings
 from rest_framework import serializers
 
+from apps.common import heavy_hitters
+
 from .models import AuditLog
 
 
+class SeenField(serializers.DateTimeField):
+    """first_seen/last_seen, or created_at on rows written before those columns existed."""
+
+    def get_attribute(self, instance):
+        return super().get_attribute(instance) or instance.created_at
+
+
 class AuditLogSerializer(serializers.ModelSerializer):
     event = serializers.CharField(source='action', read_only=True)
+    first_seen = SeenField(read_only=True)
+    last_seen = SeenField(read_only=True)
     
     class Meta:
         model = AuditLog
-        fields = ['id', 'email', 'event', 'action', 'ip_address', 'user_agent', 'details', 'created_at']
+        fields = [
+            'id', 'email', 'event', 'action', 'ip_address', 'user_agent', 'details',
+            'count', 'first_seen', 'last_seen', 'created_at',
+        ]
         read_only_fields = fields
+
+
+class HeavyHittersQuerySerializer(serializers.Serializer):
+    stream = serializers.ChoiceField(choices=heavy_hitters.STREAMS, required=False)
+    limit = serializers.IntegerField(min_value=1, default=20)
+    window = serializers.IntegerField(min_value=1, required=False, help_text='Seconds, capped at the tracked window')
+
+    def validate_limit(self, value):
+        return min(value, settings.HEAVY_HITTERS['TOP_K'])
+
+    def validate_window(self, value):
+        return min(value, settings.HEAVY_HITTERS['WINDOW_SECONDS'])
+
+
+class AuditStatsQuerySerializer(serializers.Serializer):
+    hours = serializers.IntegerField(min_value=1, max_value=24 * 7, default=24)
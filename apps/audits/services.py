@@ -1,6 +1,11 @@
-from django.db.models import Q
+import hashlib
+from datetime import timedelta
 
-# from .models import AuditLog
+from django.conf import settings
+from django.db.models import F, Subquery
+from django.utils.timezone import now
+
+from .models import AuditLog
 
 
 class AuditService:
@@ -19,3 +24,35 @@ class AuditService:
             queryset = queryset.filter(action=event)
             
         return queryset
+
+    @staticmethod
+    def coalesce_key(action, email, ip, user_agent):
+        """Identity of an event for coalescing: its action, email, IP and user agent."""
+        raw = '\x1f'.join([action, email, ip or '', user_agent or ''])
+        return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+    @staticmethod
+    def coalesce(key, details):
+        """
+        Count one more occurrence on the row for ``key`` first seen within
+        AUDIT_COALESCE_SECONDS; returns False when there is none to merge into.
+
+        One UPDATE on an indexed key, so a repeated event neither looks up
+        the user nor grows the table. Two first occurrences racing may both
+        insert; later ones only ever increment the newest of them, so no
+        event is counted twice.
+        """
+        current = now()
+        newest = AuditLog.objects.filter(
+            coalesce_key=key,
+            first_seen__gte=current - timedelta(seconds=settings.AUDIT_COALESCE_SECONDS),
+        ).order_by('-first_seen', '-pkid').values('pkid')[:1]
+        merged = AuditLog.objects.filter(pkid=Subquery(newest)).update(
+            count=F('count') + 1, last_seen=current, updated_at=current, details=details
+        )
+        return merged > 0
+
+    @staticmethod
+    def coalesced(key):
+        """The row ``coalesce`` merged into for ``key`` (as a list, empty if it is gone)."""
+        return list(AuditLog.objects.filter(coalesce_key=key).order_by('-first_seen', '-pkid')[:1])
@@ -1,9 +1,12 @@
 from django.urls import path
 
-from .views import AuditLogListView
+from .views import AuditLogListView, AuditStatsView, HeavyHittersView, audit_stream_view
 
 app_name = 'audits'
 
 urlpatterns = [
     path('logs/', AuditLogListView.as_view(), name='audit-logs'),
+    path('stats/', AuditStatsView.as_view(), name='audit-stats'),
+    path('stream/', audit_stream_view, name='audit-stream'),
+    path('heavy-hitters/', HeavyHittersView.as_view(), name='heavy-hitters'),
 ]
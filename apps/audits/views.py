@@ -1,14 +1,27 @@
 import logging
+from datetime import timedelta
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Sum
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.timezone import now
 from django_filters.rest_framework import DjangoFilterBackend
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
 from rest_framework import generics, permissions
 from rest_framework.filters import OrderingFilter
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from apps.audits import events
 from apps.audits.models import AuditLog
 from apps.audits.paginations import AuditLogPagination
-from apps.audits.serializers import AuditLogSerializer
+from apps.audits.serializers import AuditLogSerializer, AuditStatsQuerySerializer, HeavyHittersQuerySerializer
 from apps.audits.services import AuditService
+from apps.common import heavy_hitters, response_cache
 
 logger = logging.getLogger(__name__)
 
@@ -22,9 +35,172 @@ class AuditLogListView(generics.ListAPIView):
     filterset_fields = ['email', 'action']
     ordering = ['-created_at']
     ordering_fields = ['created_at', 'action']
-    
+    # Authenticated user + COUNT + page.
+    query_budget = 3
+
     def get_queryset(self):
         queryset = AuditLog.objects.all()
         queryset = AuditService.filter_audit_logs(queryset, self.request.query_params)
         logger.info(f"Audit logs accessed by user: {self.request.user.email}")
         return queryset
+
+
+class HeavyHittersView(APIView):
+
+    permission_classes = [permissions.IsAdminUser]
+
+    @swagger_auto_schema(
+        query_serializer=HeavyHittersQuerySerializer,
+        operation_description=(
+            "Top IPs and emails by OTP requests and failed verifications over the recent window, "
+            "from streaming Count-Min Sketch counters (staff only). Counts are upper-bound estimates."
+        ),
+        responses={
+            200: openapi.Response(
+                description="Heavy hitters per stream",
+                examples={
+                    "application/json": {
+                        "window": 3600,
+                        "streams": {
+                            "otp_failure_ip": [{"subject": "203.0.113.7", "count": 412}],
+                            "otp_failure_email": [{"subject": "ada@example.com", "count": 57}]
+                        }
+                    }
+                },
+            ),
+        },
+    )
+    def get(self, request):
+        serializer = HeavyHittersQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        window = params.get('window', settings.HEAVY_HITTERS['WINDOW_SECONDS'])
+        streams = [params['stream']] if 'stream' in params else heavy_hitters.STREAMS
+        return Response({
+            'window': window,
+            'streams': {
+                stream: [
+                    {'subject': subject, 'count': count}
+                    for subject, count in heavy_hitters.top(stream, params['limit'], window)
+                ]
+                for stream in streams
+            },
+        })
+
+
+class AuditStatsView(APIView):
+
+    permission_classes = [permissions.IsAdminUser]
+    # Authenticated user + one aggregate.
+    query_budget = 2
+    cache_budget = 3
+
+    @swagger_auto_schema(
+        query_serializer=AuditStatsQuerySerializer,
+        operation_description="Audit event counts per action over the last `hours` (staff only, cached for a minute).",
+        responses={
+            200: openapi.Response(
+                description="Event counts",
+                examples={
+                    "application/json": {
+                        "hours": 24,
+                        "total": 1520,
+                        "by_action": {"OTP_REQUESTED": 1200, "OTP_VERIFIED": 300, "OTP_FAILED": 20}
+                    }
+                },
+            ),
+        },
+    )
+    def get(self, request):
+        serializer = AuditStatsQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        hours = serializer.validated_data['hours']
+
+        if not response_cache.cacheable(request):
+            return Response(self._stats(hours))
+        return response_cache.fetch(
+            request,
+            f"audit:stats:{hours}",
+            lambda: self._stats(hours),
+            timeout=settings.AUDIT_STATS_CACHE_TIMEOUT,
+            stale=settings.CACHE_STALE_SECONDS,
+        )
+
+    @staticmethod
+    def _stats(hours):
+        since = now() - timedelta(hours=hours)
+        counts = dict(
+            AuditLog.objects.filter(created_at__gte=since)
+            .order_by()
+            .values_list('action')
+            .annotate(events=Sum('count'))
+        )
+        return {'hours': hours, 'total': sum(counts.values()), 'by_action': counts}
+
+
+_stream_clients = 0
+
+
+async def _stream_user(request):
+    """Session user, or the bearer token's user: DRF authentication does not run for plain async views."""
+    user = await request.auser()
+    if user.is_authenticated:
+        return user
+
+    from rest_framework.exceptions import AuthenticationFailed
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.exceptions import TokenError
+
+    try:
+        result = await sync_to_async(JWTAuthentication().authenticate)(request)
+    except (AuthenticationFailed, TokenError):
+        return None
+    return result[0] if result else None
+
+
+async def _counted(stream):
+    global _stream_clients
+    _stream_clients += 1
+    try:
+        async for message in stream:
+            yield message
+    finally:
+        _stream_clients -= 1
+
+
+async def audit_stream_view(request):
+    """
+    Server-Sent Events feed of audit entries as they are written (staff only).
+
+    Filters: ``action``, ``email``, ``ip``. Resumes after the ``Last-Event-ID``
+    header (or ``last_event_id`` query param); otherwise starts with new events.
+    Only served by the ASGI app: under WSGI a stream would pin a worker.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'error': 'The audit stream is only available on the ASGI server'}, status=501)
+    if not events.enabled():
+        return JsonResponse({'error': 'The audit stream is disabled'}, status=503)
+
+    user = await _stream_user(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+    if not user.is_staff:
+        return JsonResponse({'detail': 'You do not have permission to perform this action.'}, status=403)
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id') or '$'
+    if last_event_id != '$' and not events.EVENT_ID_RE.match(last_event_id):
+        return JsonResponse({'error': 'Invalid Last-Event-ID'}, status=400)
+    if _stream_clients >= settings.AUDIT_STREAM_MAX_CLIENTS:
+        return JsonResponse({'error': 'Too many audit stream clients'}, status=503)
+
+    filters = {name: request.GET[name] for name in events.FILTER_FIELDS if request.GET.get(name)}
+    logger.info(f"Audit stream opened by user: {user.email} filters={filters}")
+    response = StreamingHttpResponse(
+        _counted(events.follow(events.get_async_redis(), last_event_id, filters)),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Tell nginx not to buffer the stream.
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,73 @@
+import json
+
+from django.conf import settings
+from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+from apps.common.models import IPRule
+
+
+def estimated_table_rows(model, using="default"):
+    """Planner's row estimate for ``model``'s table from pg_class, or None if never analyzed."""
+    with connections[using].cursor() as cursor:
+        cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [model._meta.db_table])
+        row = cursor.fetchone()
+    # reltuples is -1 until the table has been vacuumed or analyzed.
+    return row[0] if row and row[0] >= 0 else None
+
+
+def estimated_query_rows(queryset):
+    """Planner's row estimate for ``queryset`` from EXPLAIN."""
+    plan = json.loads(queryset.order_by().explain(format="json"))
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that stops counting exactly once a table gets large.
+
+    On Postgres an unfiltered queryset uses pg_class.reltuples; a filtered one
+    is counted with a LIMIT so the cost never exceeds the threshold, and only
+    falls back to the EXPLAIN estimate when it hits it. Other backends count
+    exactly.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, "query") or connections[queryset.db].vendor != "postgresql":
+            return super().count
+
+        threshold = settings.ADMIN_ESTIMATED_COUNT_THRESHOLD
+        if not queryset.query.has_filters():
+            estimate = estimated_table_rows(queryset.model, queryset.db)
+            if estimate is not None and estimate > threshold:
+                return estimate
+
+        bounded = queryset.order_by()[:threshold].count()
+        if bounded < threshold:
+            return bounded
+        return max(threshold, estimated_query_rows(queryset))
+
+
+class LargeTableAdminMixin:
+    """
+    ModelAdmin defaults for tables too big to count or scan on every page load.
+
+    Counts are estimated, the "N total" full count is skipped, and the date
+    hierarchy is built from MIN/MAX of the date column instead of SELECT
+    DISTINCT over the whole table.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    change_list_template = "admin/common/change_list.html"
+
+
+@admin.register(IPRule)
+class IPRuleAdmin(admin.ModelAdmin):
+    list_display = ["network", "action", "reason", "created_at"]
+    list_filter = ["action"]
+    search_fields = ["network", "reason"]
@@ -0,0 +1,290 @@
+import bisect
+import hashlib
+import time
+from collections import defaultdict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.redis import RedisCache, RedisCacheClient
+from django.utils.connection import ConnectionProxy
+
+from apps.common import metrics, stats
+
+
+def _record(start, calls=1, op="pipeline"):
+    metrics.CACHE_OPERATIONS.labels(op).inc()
+    request_stats = stats.current()
+    if request_stats is not None:
+        request_stats.cache_time += time.perf_counter() - start
+        request_stats.cache_calls += calls
+
+
+def _timed(name):
+    def method(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return getattr(super(InstrumentedRedisCache, self), name)(*args, **kwargs)
+        finally:
+            _record(start, op=name)
+
+    method.__name__ = name
+    return method
+
+
+class _CountingSerializer:
+    """Wraps RedisSerializer to add value sizes to the current request/task stats."""
+
+    def __init__(self, serializer):
+        self._serializer = serializer
+
+    def dumps(self, obj):
+        data = self._serializer.dumps(obj)
+        request_stats = stats.current()
+        if request_stats is not None:
+            # Integers are stored as their decimal digits so INCR works on them.
+            request_stats.cache_bytes_sent += len(data) if isinstance(data, bytes) else len(str(data))
+        return data
+
+    def loads(self, data):
+        request_stats = stats.current()
+        if request_stats is not None:
+            request_stats.cache_bytes_received += len(data)
+        return self._serializer.loads(data)
+
+
+class InstrumentedRedisCacheClient(RedisCacheClient):
+    def __init__(self, servers, **options):
+        super().__init__(servers, **options)
+        self._serializer = _CountingSerializer(self._serializer)
+
+
+class InstrumentedRedisCache(RedisCache):
+    """
+    RedisCache that records round trips, time and value bytes per request or
+    task into ``apps.common.stats``, and operations into metrics.
+    """
+
+    def __init__(self, server, params):
+        super().__init__(server, params)
+        self._class = InstrumentedRedisCacheClient
+
+    add = _timed("add")
+    get = _timed("get")
+    set = _timed("set")
+    touch = _timed("touch")
+    delete = _timed("delete")
+    get_many = _timed("get_many")
+    set_many = _timed("set_many")
+    delete_many = _timed("delete_many")
+    has_key = _timed("has_key")
+    incr = _timed("incr")
+    clear = _timed("clear")
+
+    def pipeline(self):
+        return RedisPipeline(self)
+
+
+class RedisPipeline:
+    """
+    Buffer cache writes and send them to Redis in a single round trip.
+
+    Keys and values are encoded exactly as RedisCache encodes them, so entries
+    written here are readable through the regular cache API.
+    """
+
+    def __init__(self, cache):
+        self._cache = cache
+        # One pipeline per Redis server, so a sharded cache still sends each key to its node.
+        self._pipes = {}
+
+    def _pipe(self, key):
+        client = self._cache._cache.get_client(key, write=True)
+        pipe = self._pipes.get(client.connection_pool)
+        if pipe is None:
+            pipe = self._pipes[client.connection_pool] = client.pipeline(transaction=False)
+        return pipe
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.execute()
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        self._set(key, value, timeout, nx=False)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT):
+        self._set(key, value, timeout, nx=True)
+
+    def _set(self, key, value, timeout, nx):
+        key = self._cache.make_and_validate_key(key)
+        self._pipe(key).set(
+            key,
+            self._cache._cache._serializer.dumps(value),
+            ex=self._cache.get_backend_timeout(timeout),
+            nx=nx,
+        )
+
+    def incr(self, key, delta=1):
+        key = self._cache.make_and_validate_key(key)
+        self._pipe(key).incrby(key, delta)
+
+    def delete(self, key):
+        key = self._cache.make_and_validate_key(key)
+        self._pipe(key).delete(key)
+
+    def execute(self):
+        start = time.perf_counter()
+        results = []
+        try:
+            for pipe in self._pipes.values():
+                results.extend(pipe.execute())
+            return results
+        finally:
+            _record(start, calls=len(self._pipes))
+            self._pipes = {}
+
+
+class SequentialPipeline:
+    """Same interface as RedisPipeline for other backends; applies each write as it is queued."""
+
+    def __init__(self, cache):
+        self._cache = cache
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        self._cache.set(key, value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT):
+        self._cache.add(key, value, timeout)
+
+    def incr(self, key, delta=1):
+        try:
+            self._cache.incr(key, delta)
+        except ValueError:
+            pass
+
+    def delete(self, key):
+        self._cache.delete(key)
+
+    def execute(self):
+        return []
+
+
+def pipeline(cache):
+    """Return a write pipeline for ``cache``: one round trip on Redis, plain calls elsewhere."""
+    if hasattr(cache, "pipeline"):
+        return cache.pipeline()
+    return SequentialPipeline(cache)
+
+
+def hash_tag(key):
+    """
+    The part of ``key`` that decides its node: the first non-empty ``{...}``
+    section, else the whole key. This is the Redis Cluster rule, so the same
+    keys stay together on a cluster and on a client-side ring.
+    """
+    start = key.find("{")
+    if start != -1:
+        end = key.find("}", start + 1)
+        if end > start + 1:
+            return key[start + 1:end]
+    return key
+
+
+def _ring_hash(value):
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """
+    Consistent-hash ring with virtual nodes.
+
+    Nodes are placed by name (their URL), not by position, so adding or
+    removing one server only moves the keys in the arcs it gains or loses,
+    about 1/N of the keyspace.
+    """
+
+    def __init__(self, nodes, replicas=160):
+        points = sorted((_ring_hash(f"{node}#{i}"), node) for node in nodes for i in range(replicas))
+        self._hashes = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def node(self, key):
+        index = bisect.bisect(self._hashes, _ring_hash(key)) % len(self._hashes)
+        return self._nodes[index]
+
+
+class ShardedRedisCacheClient(InstrumentedRedisCacheClient):
+    """
+    RedisCacheClient that treats every LOCATION as an independent shard
+    (the stock client reads from all but the first, as replicas).
+
+    Single-key commands go to the node owning the key's hash tag; multi-key
+    commands are split per node.
+    """
+
+    def __init__(self, servers, **options):
+        super().__init__(servers, **options)
+        self._ring = HashRing(self._servers)
+
+    def _server_pool(self, server):
+        if server not in self._pools:
+            self._pools[server] = self._pool_class.from_url(server, **self._pool_options)
+        return self._pools[server]
+
+    def get_client(self, key=None, *, write=False):
+        if key is None:
+            raise ValueError("A sharded cache needs a key to pick a server")
+        return self._client(connection_pool=self._server_pool(self._ring.node(hash_tag(key))))
+
+    def _by_server(self, keys):
+        groups = defaultdict(list)
+        for key in keys:
+            groups[self._ring.node(hash_tag(key))].append(key)
+        return groups
+
+    def get_many(self, keys):
+        result = {}
+        for server, server_keys in self._by_server(keys).items():
+            values = self._client(connection_pool=self._server_pool(server)).mget(server_keys)
+            result.update(
+                (key, self._serializer.loads(value)) for key, value in zip(server_keys, values) if value is not None
+            )
+        return result
+
+    def set_many(self, data, timeout):
+        for server, server_keys in self._by_server(data).items():
+            pipeline = self._client(connection_pool=self._server_pool(server)).pipeline()
+            pipeline.mset({key: self._serializer.dumps(data[key]) for key in server_keys})
+            if timeout is not None:
+                for key in server_keys:
+                    pipeline.expire(key, timeout)
+            pipeline.execute()
+
+    def delete_many(self, keys):
+        for server, server_keys in self._by_server(keys).items():
+            self._client(connection_pool=self._server_pool(server)).delete(*server_keys)
+
+    def clear(self):
+        return all([
+            bool(self._client(connection_pool=self._server_pool(server)).flushdb()) for server in self._servers
+        ])
+
+
+class ShardedRedisCache(InstrumentedRedisCache):
+    """InstrumentedRedisCache spread over every server in LOCATION with consistent hashing."""
+
+    def __init__(self, server, params):
+        super().__init__(server, params)
+        self._class = ShardedRedisCacheClient
+
+
+# OTP codes, rate-limit counters and lockouts; see CACHES["otp"].
+otp_cache = ConnectionProxy(caches, "otp")
@@ -0,0 +1,98 @@
+"""
+Request-scoped deferred task dispatch.
+
+Services call ``defer(task, *args)`` instead of ``task.delay(*args)``. The
+call is registered with ``transaction.on_commit``, so work deferred inside an
+atomic block is dropped if it rolls back and never published before it
+commits. Inside a request (see ``DeferredTasksMiddleware``) committed calls
+are collected and published when Django sends ``request_finished``, i.e.
+once the server has written the response: a single call as itself, several
+as one ``run_deferred`` message that a worker executes in-process. Either way
+the request pays at most one broker round trip, after the client already has
+its response.
+
+If the broker cannot be reached the calls are run in-process instead, so an
+OTP email or audit entry is late rather than lost. Outside a request (tasks,
+management commands, shell) ``defer`` publishes as soon as the surrounding
+transaction, if any, commits.
+"""
+import functools
+import logging
+from contextvars import ContextVar
+
+from django.core.signals import request_finished
+from django.db import transaction
+from kombu.exceptions import OperationalError
+
+from apps.common import metrics
+
+logger = logging.getLogger(__name__)
+
+_pending = ContextVar("tses_deferred_tasks", default=None)
+# Calls of the request whose response is being sent, until request_finished.
+_after_response = ContextVar("tses_deferred_after_response", default=None)
+
+
+def defer(task, *args, **kwargs):
+    """Queue ``task`` for the end of the current request, or publish it now outside one; both on commit."""
+    transaction.on_commit(functools.partial(_enqueue, task, args, kwargs))
+
+
+def _enqueue(task, args, kwargs):
+    pending = _pending.get()
+    if pending is None:
+        task.delay(*args, **kwargs)
+    else:
+        pending.append((task, args, kwargs))
+
+
+def start():
+    """Begin collecting deferred tasks for the current request; returns a reset token."""
+    return _pending.set([])
+
+
+def finish(token):
+    """Stop collecting and return the calls deferred since ``start``."""
+    calls = _pending.get()
+    _pending.reset(token)
+    return calls or []
+
+
+def dispatch(calls):
+    """Publish ``calls`` in one broker round trip, running them in-process if that fails."""
+    if not calls:
+        return
+    from apps.common.tasks import run_deferred
+
+    try:
+        if len(calls) == 1:
+            task, args, kwargs = calls[0]
+            task.delay(*args, **kwargs)
+        else:
+            run_deferred.delay([[task.name, list(args), kwargs] for task, args, kwargs in calls])
+    except OperationalError as e:
+        logger.error(f"❌ Could not publish {len(calls)} deferred tasks, running them in-process: {str(e)}")
+        metrics.DEFERRED_TASKS.labels("fallback").inc(len(calls))
+        for task, args, kwargs in calls:
+            try:
+                task.apply(args=args, kwargs=kwargs)
+            except Exception as e:
+                logger.error(f"❌ In-process fallback for {task.name} failed: {str(e)}")
+    else:
+        metrics.DEFERRED_TASKS.labels("published").inc(len(calls))
+
+
+def dispatch_after_response(calls):
+    """Hold ``calls`` until the current response has been sent (``request_finished``)."""
+    if calls:
+        _after_response.set(calls)
+
+
+def _dispatch_held(sender, **kwargs):
+    calls = _after_response.get()
+    if calls:
+        _after_response.set(None)
+        dispatch(calls)
+
+
+request_finished.connect(_dispatch_held, dispatch_uid="tses_deferred_dispatch")
@@ -0,0 +1,184 @@
+"""
+Streaming heavy-hitter tracking in fixed memory.
+
+Each stream (e.g. "IPs requesting OTPs") is counted per time bucket with a
+Count-Min Sketch stored as a Redis string of ``DEPTH x WIDTH`` u32 counters,
+plus a sorted set holding the ``TOP_K`` subjects with the highest estimates.
+Both keys expire once their bucket leaves the window, so memory per stream is
+bounded by ``buckets x (4 * DEPTH * WIDTH bytes + TOP_K members)`` however many
+distinct subjects are seen.
+
+Estimates never undercount; they overcount by at most ``e / WIDTH`` of the
+bucket's total with probability ``1 - exp(-DEPTH)``.
+"""
+import hashlib
+import logging
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+from redis.exceptions import RedisError
+
+from apps.common.cache import _record
+
+logger = logging.getLogger(__name__)
+
+OTP_REQUEST_IP = "otp_request_ip"
+OTP_REQUEST_EMAIL = "otp_request_email"
+OTP_FAILURE_IP = "otp_failure_ip"
+OTP_FAILURE_EMAIL = "otp_failure_email"
+STREAMS = (OTP_REQUEST_IP, OTP_REQUEST_EMAIL, OTP_FAILURE_IP, OTP_FAILURE_EMAIL)
+
+
+def _config():
+    config = settings.HEAVY_HITTERS
+    return config["WIDTH"], config["DEPTH"], config["TOP_K"], config["BUCKET_SECONDS"], config["WINDOW_SECONDS"]
+
+
+def _offsets(subject, width, depth):
+    """One counter per row, from independent 32-bit slices of a single hash."""
+    digest = hashlib.blake2b(subject.encode(), digest_size=4 * depth).digest()
+    return [row * width + int.from_bytes(digest[4 * row:4 * row + 4], "big") % width for row in range(depth)]
+
+
+def _redis_cache():
+    """The default cache if it is Redis-backed; tracking is off otherwise."""
+    backend = caches["default"]
+    return backend if isinstance(backend, RedisCache) else None
+
+
+def _keys(cache, stream, bucket):
+    # Both keys share a hash tag so they live on the same node.
+    base = cache.make_and_validate_key(f"hh:{{{stream}:{bucket}}}")
+    return base + ":cms", base + ":top"
+
+
+def _pipelines(cache):
+    """Lazily open one pipeline per Redis server, keyed by connection pool."""
+    pipes = {}
+
+    def pipe_for(key):
+        client = cache._cache.get_client(key, write=True)
+        if client.connection_pool not in pipes:
+            pipes[client.connection_pool] = client.pipeline(transaction=False)
+        return pipes[client.connection_pool]
+
+    return pipes, pipe_for
+
+
+def _execute(pipes, start):
+    try:
+        return {pool: pipe.execute() for pool, pipe in pipes.items()}
+    finally:
+        _record(start, calls=len(pipes))
+
+
+def record(**subjects):
+    """
+    Count one event per stream, e.g. ``record(otp_request_ip=ip, otp_request_email=email)``.
+
+    Costs one round trip; a second one only when a subject not yet in its
+    stream's top-K set has an estimate high enough to enter it. Tracking is
+    best-effort: Redis errors are logged, never raised into the request.
+    """
+    cache = _redis_cache()
+    if cache is None:
+        return
+    try:
+        _count(cache, subjects)
+    except RedisError as e:
+        logger.warning(f"⚠️ Could not record heavy hitters: {str(e)}")
+
+
+def _count(cache, subjects):
+    width, depth, top_k, bucket_seconds, window = _config()
+    bucket = int(time.time()) // bucket_seconds
+    ttl = window + bucket_seconds
+    start = time.perf_counter()
+
+    pipes, pipe_for = _pipelines(cache)
+    pending = []
+    for stream, subject in subjects.items():
+        if not subject:
+            continue
+        cms_key, top_key = _keys(cache, stream, bucket)
+        pipe = pipe_for(cms_key)
+        counters = pipe.bitfield(cms_key)
+        for offset in _offsets(subject, width, depth):
+            counters.incrby("u32", f"#{offset}", 1)
+        counters.execute()
+        pipe.expire(cms_key, ttl)
+        # Subjects already in the top-K set are bumped in place (no-op for the rest).
+        pipe.zadd(top_key, {subject: 1}, xx=True, incr=True)
+        pipe.zrange(top_key, 0, 0, withscores=True)
+        pipe.zcard(top_key)
+        pending.append((pipe, subject, top_key))
+    if not pending:
+        return
+
+    results = {pool: iter(values) for pool, values in _execute(pipes, start).items()}
+    start = time.perf_counter()
+    pipes, pipe_for = _pipelines(cache)
+    for pipe, subject, top_key in pending:
+        values = results[pipe.connection_pool]
+        estimate, _, present, lowest, size = min(next(values)), next(values), next(values), next(values), next(values)
+        if present is None and (size < top_k or estimate > lowest[0][1]):
+            promote = pipe_for(top_key)
+            promote.zadd(top_key, {subject: estimate})
+            promote.zremrangebyrank(top_key, 0, -(top_k + 1))
+            promote.expire(top_key, ttl)
+    if pipes:
+        _execute(pipes, start)
+
+
+def top(stream, limit=20, window=None):
+    """
+    The ``limit`` subjects with the most events in ``stream`` over the last
+    ``window`` seconds (default and maximum: WINDOW_SECONDS), as a list of
+    (subject, estimated count) pairs, highest first. The window is rounded
+    up to whole buckets, the current one included.
+
+    Candidates are the union of each bucket's top-K set; their counts are
+    summed from every bucket's sketch, so a subject spread evenly over the
+    window is still counted in full.
+    """
+    cache = _redis_cache()
+    if cache is None:
+        return []
+    width, depth, top_k, bucket_seconds, max_window = _config()
+    window = min(window or max_window, max_window)
+    current = int(time.time()) // bucket_seconds
+    count = max(1, math.ceil(window / bucket_seconds))
+    buckets = [_keys(cache, stream, bucket) for bucket in range(current - count + 1, current + 1)]
+
+    start = time.perf_counter()
+    pipes, pipe_for = _pipelines(cache)
+    for _, top_key in buckets:
+        pipe_for(top_key).zrange(top_key, 0, -1)
+    candidates = sorted({
+        member.decode() for members in _execute(pipes, start).values() for bucket in members for member in bucket
+    })
+    if not candidates:
+        return []
+
+    offsets = [_offsets(subject, width, depth) for subject in candidates]
+    start = time.perf_counter()
+    pipes, pipe_for = _pipelines(cache)
+    for cms_key, _ in buckets:
+        pipe = pipe_for(cms_key)
+        counters = pipe.bitfield(cms_key)
+        for subject_offsets in offsets:
+            for offset in subject_offsets:
+                counters.get("u32", f"#{offset}")
+        counters.execute()
+
+    totals = [0] * len(candidates)
+    for values in _execute(pipes, start).values():
+        for counters in values:
+            for i in range(len(candidates)):
+                totals[i] += min(counters[i * depth:(i + 1) * depth])
+
+    ranked = sorted(zip(candidates, totals), key=lambda pair: (-pair[1], pair[0]))
+    return [(subject, count) for subject, count in ranked[:limit] if count]
@@ -1,9 +1,28 @@
+from apps.common.ip_policy import is_trusted_proxy, parse_ip
+
+
 def get_client_ip(request):
-    """Extract client IP from request"""
+    """
+    Extract client IP from request.
+
+    X-Forwarded-For is only honoured when the direct peer is in
+    TRUSTED_PROXIES, and is read right to left: the first hop that is not a
+    trusted proxy is the client, so a spoofed left-most entry is ignored.
+    """
+    remote_addr = request.META.get('REMOTE_ADDR')
     x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        return x_forwarded_for.split(',')[0]
-    return request.META.get('REMOTE_ADDR')
+    if not x_forwarded_for or not is_trusted_proxy(remote_addr):
+        return remote_addr
+
+    client = remote_addr
+    for hop in reversed(x_forwarded_for.split(',')):
+        address = parse_ip(hop)
+        if address is None:
+            break
+        client = str(address)
+        if not is_trusted_proxy(address):
+            break
+    return client
 
 
 def get_user_agent(request):
@@ -0,0 +1,179 @@
+import re
+from collections import defaultdict
+from typing import NamedTuple
+
+from django.apps import apps
+from django.db import connections, migrations
+
+INDEX_STATS_SQL = """
+SELECT
+    s.relname,
+    s.indexrelname,
+    s.idx_scan,
+    pg_relation_size(s.indexrelid),
+    i.indisunique OR i.indisprimary OR EXISTS (SELECT 1 FROM pg_constraint con WHERE con.conindid = s.indexrelid),
+    i.indpred IS NOT NULL OR i.indexprs IS NOT NULL,
+    am.amname = 'btree' AND NOT EXISTS (
+        SELECT 1 FROM unnest(i.indclass::oid[]) opc(oid) JOIN pg_opclass o ON o.oid = opc.oid WHERE NOT o.opcdefault
+    ),
+    ARRAY(
+        SELECT a.attname
+        FROM unnest(i.indkey::int2[]) WITH ORDINALITY k(attnum, ord)
+        JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum
+        WHERE k.ord <= i.indnkeyatts
+        ORDER BY k.ord
+    ),
+    pg_get_indexdef(s.indexrelid),
+    t.n_tup_ins + t.n_tup_upd - t.n_tup_hot_upd
+FROM pg_stat_user_indexes s
+JOIN pg_index i ON i.indexrelid = s.indexrelid
+JOIN pg_class c ON c.oid = s.indexrelid
+JOIN pg_am am ON am.oid = c.relam
+JOIN pg_stat_user_tables t ON t.relid = s.relid
+WHERE s.schemaname = current_schema()
+ORDER BY s.relname, s.indexrelname
+"""
+
+STATS_RESET_SQL = "SELECT stats_reset FROM pg_stat_database WHERE datname = current_database()"
+
+UNUSED = "unused"
+DUPLICATE = "duplicate"
+PREFIX = "prefix"
+
+
+class IndexStat(NamedTuple):
+    table: str
+    name: str
+    scans: int
+    size: int
+    # Backs a primary key, unique or exclusion constraint; never a pruning candidate.
+    enforces_constraint: bool
+    # Partial or expression index; only compared by exact definition.
+    special: bool
+    # Plain btree with default operator classes, so column-prefix rules apply.
+    plain_btree: bool
+    columns: tuple
+    definition: str
+    # Inserts plus non-HOT updates on the table: each one writes to this index.
+    writes: int
+
+    @property
+    def signature(self):
+        """The definition without the index name, so identical indexes compare equal."""
+        return re.sub(r"^CREATE (UNIQUE )?INDEX \S+ ON ", "", self.definition)
+
+
+class Finding(NamedTuple):
+    index: IndexStat
+    reason: str
+    detail: str
+
+
+def fetch_index_stats(using="default"):
+    """Read per-index usage and definitions from the Postgres statistics views."""
+    with connections[using].cursor() as cursor:
+        cursor.execute(STATS_RESET_SQL)
+        row = cursor.fetchone()
+        stats_reset = row[0] if row else None
+        cursor.execute(INDEX_STATS_SQL)
+        stats = [IndexStat(*row[:7], tuple(row[7]), *row[8:]) for row in cursor.fetchall()]
+    return stats, stats_reset
+
+
+def analyze(stats):
+    """
+    Classify pruning candidates: exact duplicates, btree indexes whose columns
+    are a leading prefix of another index on the same table, and indexes that
+    have never been scanned. Constraint-backed indexes are never reported.
+    """
+    findings = {}
+    by_table = defaultdict(list)
+    for index in stats:
+        by_table[index.table].append(index)
+
+    for indexes in by_table.values():
+        by_signature = defaultdict(list)
+        for index in indexes:
+            by_signature[index.signature].append(index)
+        for group in by_signature.values():
+            # Keep the constraint-backed copy if any, otherwise the most used one.
+            keep = max(group, key=lambda index: (index.enforces_constraint, index.scans, index.name))
+            for index in group:
+                if index is not keep and not index.enforces_constraint:
+                    findings[index.name] = Finding(index, DUPLICATE, f"same definition as {keep.name}")
+
+        for index in indexes:
+            if index.name in findings or index.enforces_constraint or not index.plain_btree or index.special:
+                continue
+            for other in indexes:
+                if (
+                    other is not index
+                    and other.plain_btree
+                    and not other.special
+                    and len(other.columns) > len(index.columns)
+                    and other.columns[: len(index.columns)] == index.columns
+                ):
+                    findings[index.name] = Finding(index, PREFIX, f"leading columns of {other.name}")
+                    break
+
+    for index in stats:
+        if index.name not in findings and not index.enforces_constraint and index.scans == 0:
+            findings[index.name] = Finding(index, UNUSED, "never scanned since stats reset")
+
+    return sorted(findings.values(), key=lambda finding: (finding.index.table, -finding.index.size))
+
+
+def candidate_operations(findings, app_labels):
+    """
+    Map findings back to the models in ``app_labels`` that declare them.
+
+    Returns ({app_label: [operation, ...]}, [unmanaged findings]). Meta.indexes
+    entries become RemoveIndex; a redundant single-column ``db_index=True``
+    btree becomes AlterField(db_index=False), which also drops its ``_like``
+    companion. Anything else (a ``_like`` index on its own, indexes not
+    declared by one of these apps) is left for a manual decision.
+    """
+    models_by_table = {
+        model._meta.db_table: model
+        for app_label in app_labels
+        for model in apps.get_app_config(app_label).get_models()
+    }
+    operations, unmanaged = defaultdict(list), []
+    altered = set()
+
+    def db_index_field(model, index):
+        if len(index.columns) != 1:
+            return None
+        for field in model._meta.concrete_fields:
+            if field.column == index.columns[0] and field.db_index and not field.unique:
+                return field
+        return None
+
+    # Plain btrees first so a _like companion can tell whether its field is already being altered.
+    for finding in sorted(findings, key=lambda finding: not finding.index.plain_btree):
+        index = finding.index
+        model = models_by_table.get(index.table)
+        if model is None:
+            unmanaged.append(finding)
+            continue
+
+        if any(meta_index.name == index.name for meta_index in model._meta.indexes):
+            operations[model._meta.app_label].append(
+                migrations.RemoveIndex(model_name=model._meta.model_name, name=index.name)
+            )
+            continue
+
+        field = db_index_field(model, index)
+        if field is not None and (model, field.name) in altered:
+            continue
+        if field is None or not index.plain_btree:
+            unmanaged.append(finding)
+            continue
+        altered.add((model, field.name))
+        new_field = field.clone()
+        new_field.db_index = False
+        operations[model._meta.app_label].append(
+            migrations.AlterField(model_name=model._meta.model_name, name=field.name, field=new_field)
+        )
+
+    return dict(operations), unmanaged
@@ -0,0 +1,161 @@
+"""
+CIDR allow/deny lists compiled into a longest-prefix-match trie.
+
+Rules come from the IP_ALLOW_LIST / IP_DENY_LIST settings and from IPRule rows.
+Each process keeps a compiled copy and checks a version counter in the default
+cache at most every IP_POLICY_REFRESH_SECONDS; saving or deleting an IPRule
+bumps the counter, so changes apply without a restart.
+"""
+import functools
+import ipaddress
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+ALLOW = "allow"
+DENY = "deny"
+VERSION_KEY = "ip_policy:version"
+
+
+def parse_ip(value):
+    """Parse an address, unwrapping IPv4-mapped IPv6; None if it is not an IP."""
+    try:
+        address = ipaddress.ip_address(value.strip())
+    except (AttributeError, ValueError):
+        return None
+    if address.version == 6 and address.ipv4_mapped:
+        return address.ipv4_mapped
+    return address
+
+
+class PrefixTrie:
+    """
+    Binary trie over address bits, one per IP version. ``lookup`` returns the
+    value of the longest inserted prefix covering the address, so a /24 rule
+    overrides the /8 it sits in.
+    """
+
+    def __init__(self):
+        # Node: [zero child, one child, value]
+        self._roots = {4: [None, None, None], 6: [None, None, None]}
+        self.size = 0
+
+    def insert(self, network, value):
+        network = ipaddress.ip_network(network, strict=False)
+        bits = network.max_prefixlen
+        addr = int(network.network_address)
+        node = self._roots[network.version]
+        for shift in range(bits - 1, bits - 1 - network.prefixlen, -1):
+            bit = (addr >> shift) & 1
+            if node[bit] is None:
+                node[bit] = [None, None, None]
+            node = node[bit]
+        node[2] = value
+        self.size += 1
+
+    def lookup(self, address):
+        node = self._roots[address.version]
+        best = node[2]
+        addr = int(address)
+        for shift in range(address.max_prefixlen - 1, -1, -1):
+            node = node[(addr >> shift) & 1]
+            if node is None:
+                break
+            if node[2] is not None:
+                best = node[2]
+        return best
+
+
+class IPPolicy:
+    """Compiled allow/deny rules; the most specific matching network decides."""
+
+    def __init__(self, rules, default=ALLOW, version=None):
+        self.trie = PrefixTrie()
+        for network, action in rules:
+            try:
+                self.trie.insert(network, action)
+            except ValueError:
+                logger.warning(f"⚠️ Skipping invalid IP policy network: {network!r}")
+        self.default = default
+        self.version = version
+
+    def is_allowed(self, ip):
+        if not self.trie.size:
+            return self.default == ALLOW
+        address = parse_ip(ip)
+        if address is None:
+            return self.default == ALLOW
+        return (self.trie.lookup(address) or self.default) == ALLOW
+
+
+def load_policy(version=None):
+    """Build an IPPolicy from settings followed by IPRule rows (later rules win on equal prefixes)."""
+    from apps.common.models import IPRule
+
+    rules = [(network, ALLOW) for network in settings.IP_ALLOW_LIST]
+    rules += [(network, DENY) for network in settings.IP_DENY_LIST]
+    try:
+        rules += list(IPRule.objects.values_list("network", "action"))
+    except DatabaseError as e:
+        # Serve with the settings lists and retry on the next check rather than failing every request.
+        logger.error(f"❌ Could not load IP rules, using settings only: {str(e)}")
+        version = None
+    policy = IPPolicy(rules, default=settings.IP_POLICY_DEFAULT_ACTION, version=version)
+    logger.info(f"🛡️ Loaded IP policy with {len(rules)} rules (version {version})")
+    return policy
+
+
+_lock = threading.Lock()
+_state = {"policy": None, "checked_at": 0.0}
+
+
+def get_policy():
+    """
+    The process-local policy, reloaded when the cache version has moved.
+    Costs one cache GET per process every IP_POLICY_REFRESH_SECONDS.
+    """
+    policy = _state["policy"]
+    now = time.monotonic()
+    if policy is not None and now - _state["checked_at"] < settings.IP_POLICY_REFRESH_SECONDS:
+        return policy
+
+    with _lock:
+        current = _state["policy"]
+        if current is not None and current is not policy:
+            return current
+        version = cache.get(VERSION_KEY)
+        if policy is None or version != policy.version:
+            policy = load_policy(version)
+            _state["policy"] = policy
+        _state["checked_at"] = now
+    return policy
+
+
+def bump_version():
+    """Tell every process to reload its policy on its next check."""
+    cache.set(VERSION_KEY, time.time_ns(), timeout=None)
+    invalidate()
+
+
+def invalidate():
+    """Drop this process's compiled policy."""
+    _state["policy"] = None
+
+
+@functools.lru_cache(maxsize=8)
+def _trusted_proxies(networks):
+    trie = PrefixTrie()
+    for network in networks:
+        trie.insert(network, True)
+    return trie
+
+
+def is_trusted_proxy(ip):
+    address = parse_ip(ip) if isinstance(ip, str) else ip
+    return address is not None and bool(_trusted_proxies(tuple(settings.TRUSTED_PROXIES)).lookup(address))
@@ -0,0 +1,198 @@
+"""
+Non-blocking logging: records are queued in the calling thread and written by
+a background listener, so a slow disk or stdout pipe never shows up as request
+latency.
+
+- ``AsyncQueueHandler`` puts records on a bounded in-memory queue and hands
+  them to its target handlers from a listener thread. When the queue is full
+  the record is dropped and counted instead of blocking.
+- ``JSONFormatter`` renders one JSON object per line; it runs on the listener
+  thread, so serialisation (and traceback formatting) stays off the request.
+- ``SamplingFilter`` and ``RateLimitFilter`` thin out high-volume loggers
+  before anything is queued. Both leave WARNING and above untouched.
+
+Every discarded record increments ``tses_log_records_dropped_total{reason}``.
+"""
+import atexit
+import copy
+import datetime
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+from apps.common import metrics
+
+# Attributes every LogRecord has; anything else was passed via ``extra=``.
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record, including any ``extra=`` fields."""
+
+    def format(self, record):
+        payload = {
+            "timestamp": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "process": record.process,
+            "thread": record.thread,
+        }
+        payload.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRS)
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            payload["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+def _handler_by_name(name):
+    # logging.getHandlerByName() only exists from Python 3.12.
+    return logging._handlers.get(name)
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # Only used at shutdown, the one place where waiting for room is acceptable.
+        self.queue.put(self._sentinel, timeout=5)
+
+
+class AsyncQueueHandler(QueueHandler):
+    """
+    Queue records for a background listener that feeds ``targets`` (names of
+    handlers defined in the same LOGGING config).
+
+    The listener starts on the first record in each process, so it is created
+    after gunicorn forks its workers rather than inherited dead from the
+    master. Records are dropped, not waited on, once ``maxsize`` are pending.
+    """
+
+    def __init__(self, targets, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.target_names = list(targets)
+        self.maxsize = maxsize
+        self.listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_listener(self):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                # Forked: the parent's listener thread did not come with us.
+                self.queue = queue.Queue(self.maxsize)
+            targets = [_handler_by_name(name) for name in self.target_names]
+            self.listener = _Listener(self.queue, *[h for h in targets if h is not None], respect_handler_level=True)
+            self.listener.start()
+            self._pid = os.getpid()
+            atexit.register(self.flush_and_stop)
+
+    def prepare(self, record):
+        # Unlike QueueHandler.prepare, do not format here: only resolve the
+        # message (so later changes to its args cannot leak in) and leave the
+        # JSON encoding and traceback rendering to the listener thread.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.LOG_RECORDS_DROPPED.labels("queue_full").inc()
+
+    def emit(self, record):
+        self._ensure_listener()
+        try:
+            self.enqueue(self.prepare(record))
+        except Exception:
+            self.handleError(record)
+
+    def flush_and_stop(self):
+        """Drain the queue into the target handlers and stop the listener."""
+        listener, self.listener = self.listener, None
+        if listener is None or self._pid != os.getpid():
+            return
+        try:
+            listener.stop()
+        except queue.Full:
+            # The sinks are stuck; the listener thread is a daemon and dies with the process.
+            pass
+        self._pid = None
+
+    def close(self):
+        self.flush_and_stop()
+        super().close()
+
+
+def _matching(settings_by_prefix, name):
+    """The value for the longest logger-name prefix of ``name``, or None."""
+    best = None
+    for prefix, value in settings_by_prefix.items():
+        if (name == prefix or name.startswith(prefix + ".")) and (best is None or len(prefix) > len(best[0])):
+            best = (prefix, value)
+    return best
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep a fraction of records per logger, e.g. ``rates={"apps.users.services": 0.1}``.
+    Records above ``max_level`` are always kept.
+    """
+
+    def __init__(self, rates, max_level="INFO"):
+        super().__init__()
+        self.rates = rates
+        self.max_level = logging.getLevelName(max_level)
+
+    def filter(self, record):
+        if record.levelno > self.max_level:
+            return True
+        match = _matching(self.rates, record.name)
+        if match is None or random.random() < match[1]:
+            return True
+        metrics.LOG_RECORDS_DROPPED.labels("sampled").inc()
+        return False
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Token bucket per configured logger prefix, e.g. ``limits={"apps.users": 50}``
+    records per second with bursts of up to one second's worth. Records
+    above ``max_level`` are always kept.
+    """
+
+    def __init__(self, limits, max_level="INFO"):
+        super().__init__()
+        self.limits = limits
+        self.max_level = logging.getLevelName(max_level)
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > self.max_level:
+            return True
+        match = _matching(self.limits, record.name)
+        if match is None:
+            return True
+
+        prefix, rate = match
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(prefix, (rate, now))
+            tokens = min(rate, tokens + (now - last) * rate)
+            allowed = tokens >= 1
+            self._buckets[prefix] = (tokens - 1 if allowed else tokens, now)
+        if not allowed:
+            metrics.LOG_RECORDS_DROPPED.labels("rate_limited").inc()
+        return allowed
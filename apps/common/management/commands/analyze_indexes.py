@@ -0,0 +1,93 @@
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, migrations
+from django.db.migrations.autodetector import MigrationAutodetector
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.writer import MigrationWriter
+from django.template.defaultfilters import filesizeformat
+
+from apps.common import indexes
+
+
+class Command(BaseCommand):
+    help = (
+        "Report unused, duplicate and prefix-redundant Postgres indexes from pg_stat_user_indexes, "
+        "with their size and write cost, and emit a candidate migration that drops them"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default")
+        parser.add_argument(
+            "--include-unused",
+            action="store_true",
+            help="Also put never-scanned indexes in the candidate migration (they are always reported)",
+        )
+        parser.add_argument(
+            "--write",
+            action="store_true",
+            help="Write the candidate migrations into each app's migrations package instead of printing them",
+        )
+
+    def handle(self, *args, **options):
+        using = options["database"]
+        if connections[using].vendor != "postgresql":
+            raise CommandError("Index statistics are only available on PostgreSQL")
+
+        stats, stats_reset = indexes.fetch_index_stats(using)
+        findings = indexes.analyze(stats)
+        self.stdout.write(f"Statistics collected since {stats_reset or 'the cluster started'}; "
+                          "run this on the primary and on each replica that serves reads.\n")
+
+        if not findings:
+            self.stdout.write(self.style.SUCCESS("No redundant or unused indexes found"))
+            return
+
+        self.stdout.write(
+            f"{'table':<24} {'index':<40} {'reason':<10} {'scans':>10} {'size':>10} {'writes':>12}  detail"
+        )
+        for finding in findings:
+            index = finding.index
+            self.stdout.write(
+                f"{index.table:<24} {index.name:<40} {finding.reason:<10} {index.scans:>10} "
+                f"{filesizeformat(index.size):>10} {index.writes:>12}  {finding.detail}"
+            )
+        reclaimable = sum(finding.index.size for finding in findings)
+        self.stdout.write(f"\n{len(findings)} candidates, {filesizeformat(reclaimable)} reclaimable\n")
+
+        candidates = [
+            finding for finding in findings
+            if finding.reason != indexes.UNUSED or options["include_unused"]
+        ]
+        local_apps = [config.label for config in apps.get_app_configs() if config.name in settings.LOCAL_APPS]
+        operations, unmanaged = indexes.candidate_operations(candidates, local_apps)
+        if unmanaged:
+            self.stdout.write("Not declared by a project model field or Meta.indexes; review by hand:")
+            for finding in unmanaged:
+                self.stdout.write(f"  {finding.index.name} ({finding.reason}): {finding.index.definition}")
+
+        if operations:
+            self.write_migrations(operations, options["write"])
+
+    def write_migrations(self, operations, write):
+        loader = MigrationLoader(None, ignore_no_migrations=True)
+        for app_label, app_operations in operations.items():
+            leaf = loader.graph.leaf_nodes(app_label)[0]
+            number = MigrationAutodetector.parse_number(leaf[1]) + 1
+            migration = migrations.Migration(f"{number:04d}_prune_indexes", app_label)
+            migration.dependencies = [leaf]
+            migration.operations = app_operations
+            writer = MigrationWriter(migration)
+
+            if write:
+                with open(writer.path, "w", encoding="utf-8") as fh:
+                    fh.write(writer.as_string())
+                self.stdout.write(self.style.SUCCESS(f"Wrote {writer.path}"))
+            else:
+                self.stdout.write(f"\n# {writer.path}")
+                self.stdout.write(writer.as_string())
+
+        self.stdout.write(
+            "Remove the same indexes from the models (Meta.indexes / db_index=True) so makemigrations "
+            "stays clean, and review every operation against your query plans before applying."
+        )
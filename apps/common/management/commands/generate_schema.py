@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.common import schema
+
+
+class Command(BaseCommand):
+    help = "Generate the content-hashed OpenAPI artifact for CODE_VERSION"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--code-version", dest="code_version", default=None, help="Overrides CODE_VERSION")
+
+    def handle(self, *args, **options):
+        version = options["code_version"] or settings.CODE_VERSION
+        if not version:
+            raise CommandError("CODE_VERSION is not set; pass --code-version or set it in the environment")
+
+        existing = schema.load_artifact(version)
+        if existing is not None:
+            self.stdout.write(f"Schema for {version} is up to date: {existing.filename}")
+            return
+
+        path = schema.write_artifact(schema.build_artifact(version))
+        self.stdout.write(self.style.SUCCESS(f"Wrote {path}"))
@@ -0,0 +1,266 @@
+import functools
+import os
+import time
+from contextlib import contextmanager
+
+from django.core.exceptions import ImproperlyConfigured
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# Buckets tuned for sub-second API work; the default prometheus buckets start
+# at 5ms which hides most of the Redis/DB time we care about.
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+BYTES_BUCKETS = (0, 64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+# HTTP layer
+
+HTTP_REQUESTS = Counter(
+    "tses_http_requests_total",
+    "HTTP requests handled, by route, method and status code",
+    ["route", "method", "status"],
+)
+HTTP_LATENCY = Histogram(
+    "tses_http_request_duration_seconds",
+    "End-to-end request latency inside Django",
+    ["route", "method"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUEST_DB_SECONDS = Histogram(
+    "tses_http_request_db_seconds",
+    "Time spent executing SQL per request",
+    ["route"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUEST_CACHE_SECONDS = Histogram(
+    "tses_http_request_cache_seconds",
+    "Time spent in cache (Redis) calls per request",
+    ["route"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUEST_CACHE_CALLS = Histogram(
+    "tses_http_request_cache_calls",
+    "Cache (Redis) round trips per request",
+    ["route"],
+    buckets=COUNT_BUCKETS,
+)
+REQUEST_CACHE_BYTES = Histogram(
+    "tses_http_request_cache_bytes",
+    "Cache value bytes per request, by direction (sent, received)",
+    ["route", "direction"],
+    buckets=BYTES_BUCKETS,
+)
+QUERY_BUDGET_EXCEEDED = Counter(
+    "tses_query_budget_exceeded_total",
+    "Requests that ran more SQL queries than their view's query_budget",
+    ["route"],
+)
+CACHE_BUDGET_EXCEEDED = Counter(
+    "tses_cache_budget_exceeded_total",
+    "Requests that made more cache round trips than their view's cache_budget",
+    ["route"],
+)
+SLOW_QUERIES = Counter(
+    "tses_slow_queries_total",
+    "SQL statements slower than SLOW_QUERY_THRESHOLD_MS",
+)
+
+
+IP_POLICY_BLOCKED = Counter(
+    "tses_ip_policy_blocked_total",
+    "Requests rejected by the CIDR deny/allow policy",
+)
+
+
+# Cache
+
+CACHE_OPERATIONS = Counter(
+    "tses_cache_operations_total",
+    "Cache round trips by operation (get, set, incr, ..., pipeline)",
+    ["op"],
+)
+READ_THROUGH = Counter(
+    "tses_cache_read_through_total",
+    "Read-through cache lookups by outcome (hit, miss, early_refresh, stale, *_served, waited, wait_timeout)",
+    ["outcome"],
+)
+
+
+# OTP flow
+
+OTP_REQUESTS = Counter(
+    "tses_otp_requests_total",
+    "OTP requests, by outcome (sent, rate_limited_email, rate_limited_ip)",
+    ["outcome"],
+)
+OTP_VERIFICATIONS = Counter(
+    "tses_otp_verifications_total",
+    "OTP verifications, by outcome (success, invalid, not_found, locked)",
+    ["outcome"],
+)
+OTP_LOCKOUTS = Counter(
+    "tses_otp_lockouts_total",
+    "Accounts locked after too many failed OTP attempts",
+)
+OTP_REQUEST_LATENCY = Histogram(
+    "tses_otp_request_duration_seconds",
+    "Time spent in OTPService.request_otp",
+    buckets=LATENCY_BUCKETS,
+)
+OTP_VERIFY_LATENCY = Histogram(
+    "tses_otp_verify_duration_seconds",
+    "Time spent in OTPService.verify_otp",
+    buckets=LATENCY_BUCKETS,
+)
+
+
+# Celery
+
+CELERY_ENQUEUE_LATENCY = Histogram(
+    "tses_celery_enqueue_duration_seconds",
+    "Time spent publishing a task to the broker",
+    ["task"],
+    buckets=LATENCY_BUCKETS,
+)
+DEFERRED_TASKS = Counter(
+    "tses_deferred_tasks_total",
+    "Tasks deferred to the end of a request, by outcome (published, fallback)",
+    ["outcome"],
+)
+AUDIT_LOG_WRITES = Counter(
+    "tses_audit_log_writes_total",
+    "Audit events written by the audit tasks, by outcome (created, coalesced)",
+    ["outcome"],
+)
+CELERY_TASK_LATENCY = Histogram(
+    "tses_celery_task_duration_seconds",
+    "Task execution time on the worker",
+    ["task", "state"],
+    buckets=LATENCY_BUCKETS,
+)
+TASK_CACHE_CALLS = Histogram(
+    "tses_celery_task_cache_calls",
+    "Cache (Redis) round trips per task run",
+    ["task"],
+    buckets=COUNT_BUCKETS,
+)
+TASK_CACHE_SECONDS = Histogram(
+    "tses_celery_task_cache_seconds",
+    "Time spent in cache (Redis) calls per task run",
+    ["task"],
+    buckets=LATENCY_BUCKETS,
+)
+
+
+# Logging
+
+LOG_RECORDS_DROPPED = Counter(
+    "tses_log_records_dropped_total",
+    "Log records discarded before being written, by reason (queue_full, sampled, rate_limited)",
+    ["reason"],
+)
+
+
+# Database connection pool
+
+class DBPoolCollector:
+    """
+    Expose psycopg pool statistics for the pools opened in this process.
+
+    Pool stats live in-process, so under PROMETHEUS_MULTIPROC_DIR each scrape
+    reports the pool of whichever worker served it.
+    """
+
+    def collect(self):
+        try:
+            from django.db.backends.postgresql.base import DatabaseWrapper
+        except (ImportError, ImproperlyConfigured):
+            return
+
+        connections_ = GaugeMetricFamily(
+            "tses_db_pool_connections", "Connections held by the pool, by state", labels=["alias", "state"]
+        )
+        waiting = GaugeMetricFamily(
+            "tses_db_pool_requests_waiting", "Requests currently queued for a connection", labels=["alias"]
+        )
+        requests = CounterMetricFamily(
+            "tses_db_pool_requests", "Connections handed out by the pool", labels=["alias"]
+        )
+        wait_seconds = CounterMetricFamily(
+            "tses_db_pool_wait_seconds", "Cumulative time spent waiting for a pooled connection", labels=["alias"]
+        )
+        errors = CounterMetricFamily(
+            "tses_db_pool_errors", "Pool timeouts and connection errors", labels=["alias"]
+        )
+
+        for alias, pool in list(DatabaseWrapper._connection_pools.items()):
+            stats = pool.get_stats()
+            size = stats.get("pool_size", 0)
+            available = stats.get("pool_available", 0)
+            connections_.add_metric([alias, "idle"], available)
+            connections_.add_metric([alias, "in_use"], size - available)
+            waiting.add_metric([alias], stats.get("requests_waiting", 0))
+            requests.add_metric([alias], stats.get("requests_num", 0))
+            wait_seconds.add_metric([alias], stats.get("requests_wait_ms", 0) / 1000)
+            errors.add_metric([alias], stats.get("requests_errors", 0) + stats.get("connections_errors", 0))
+
+        yield from (connections_, waiting, requests, wait_seconds, errors)
+
+
+DB_POOL_COLLECTOR = DBPoolCollector()
+REGISTRY.register(DB_POOL_COLLECTOR)
+
+
+@contextmanager
+def observe(histogram, **labels):
+    """Time the wrapped block into ``histogram``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metric = histogram.labels(**labels) if labels else histogram
+        metric.observe(time.perf_counter() - start)
+
+
+def timed(histogram):
+    """Decorator form of ``observe`` for unlabelled histograms."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with observe(histogram):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def get_registry():
+    """
+    Return the registry to expose.
+
+    Under gunicorn/celery prefork each process keeps its own counters, so when
+    ``PROMETHEUS_MULTIPROC_DIR`` is set we aggregate the per-process files on
+    every scrape instead of reading the in-memory default registry.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(DB_POOL_COLLECTOR)
+        return registry
+    return REGISTRY
+
+
+def render_metrics():
+    """Return (payload, content_type) in the Prometheus text format."""
+    return generate_latest(get_registry()), CONTENT_TYPE_LATEST
@@ -0,0 +1,320 @@
+import logging
+import os
+import random
+import threading
+import time
+import traceback
+from contextlib import ExitStack
+
+import django.db
+from django.conf import settings
+from django.db import connections
+from django.http import JsonResponse
+from django.utils.functional import SimpleLazyObject, empty
+
+from apps.common import deferred, ip_policy, metrics, profiling, stats
+from apps.common.helpers import get_client_ip
+
+logger = logging.getLogger(__name__)
+
+
+def _route(request):
+    """Low-cardinality label for the matched URL pattern."""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    return match.route or match.view_name or "unmatched"
+
+
+class BudgetExceeded(Exception):
+    """A view went over one of its declared budgets (raised when REQUEST_BUDGETS_STRICT)."""
+
+
+class QueryBudgetExceeded(BudgetExceeded):
+    """More SQL queries than the view's ``query_budget``."""
+
+
+class CacheBudgetExceeded(BudgetExceeded):
+    """More cache round trips than the view's ``cache_budget``."""
+
+
+def _budget(request, name):
+    """
+    The matched view's ``name`` budget (``query_budget``, ``cache_budget``) for this request, or None.
+
+    Views declare either a number or a dict keyed by viewset action (or
+    lowercase HTTP method for plain views), e.g. ``{"list": 4, "retrieve": 2}``.
+    """
+    match = getattr(request, "resolver_match", None)
+    budget = getattr(getattr(match, "func", None), "cls", None)
+    budget = getattr(budget, name, None)
+    if isinstance(budget, dict):
+        method = request.method.lower()
+        actions = getattr(match.func, "actions", None) or {}
+        budget = budget.get(actions.get(method, method))
+    return budget
+
+
+def _check_budget(request, route, name, used, what, counter, exception):
+    budget = _budget(request, name)
+    if budget is None or used <= budget:
+        return
+    counter.labels(route).inc()
+    message = f"{request.method} {route} made {used} {what}, budget {budget}"
+    if settings.REQUEST_BUDGETS_STRICT:
+        raise exception(message)
+    logger.warning(f"⚠️ Budget exceeded: {message}")
+
+
+def _is_staff(request):
+    """Whether authentication (session or DRF) already found a staff user; never queries."""
+    user = getattr(request, "user", None)
+    if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+        return False
+    return bool(user is not None and user.is_staff)
+
+
+class MetricsMiddleware:
+    """
+    Record request latency plus the DB and cache time spent inside it.
+
+    Must sit near the top of MIDDLEWARE so the timings cover the rest of the
+    stack; the DB wrapper is installed on every configured alias. Also
+    enforces views' ``query_budget`` and ``cache_budget`` and, for staff,
+    reports the timings in a ``Server-Timing`` header.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.path == "/metrics":
+            return self.get_response(request)
+
+        token = stats.start()
+        request_stats = stats.current()
+        start = time.perf_counter()
+        try:
+            with _db_timer(request_stats):
+                response = self.get_response(request)
+        finally:
+            elapsed = time.perf_counter() - start
+            stats.finish(token)
+
+        route = _route(request)
+        metrics.HTTP_REQUESTS.labels(route, request.method, response.status_code).inc()
+        metrics.HTTP_LATENCY.labels(route, request.method).observe(elapsed)
+        metrics.REQUEST_DB_SECONDS.labels(route).observe(request_stats.db_time)
+        metrics.REQUEST_CACHE_SECONDS.labels(route).observe(request_stats.cache_time)
+        metrics.REQUEST_CACHE_CALLS.labels(route).observe(request_stats.cache_calls)
+        metrics.REQUEST_CACHE_BYTES.labels(route, "sent").observe(request_stats.cache_bytes_sent)
+        metrics.REQUEST_CACHE_BYTES.labels(route, "received").observe(request_stats.cache_bytes_received)
+
+        queries_before, cache_calls_before = getattr(request, "_stats_before_view", (0, 0))
+        _check_budget(
+            request, route, "query_budget", request_stats.db_queries - queries_before, "queries",
+            metrics.QUERY_BUDGET_EXCEEDED, QueryBudgetExceeded,
+        )
+        _check_budget(
+            request, route, "cache_budget", request_stats.cache_calls - cache_calls_before, "cache round trips",
+            metrics.CACHE_BUDGET_EXCEEDED, CacheBudgetExceeded,
+        )
+
+        if _is_staff(request):
+            cache_bytes = request_stats.cache_bytes_sent + request_stats.cache_bytes_received
+            response["Server-Timing"] = (
+                f'db;dur={request_stats.db_time * 1000:.1f};desc="{request_stats.db_queries} queries", '
+                f'cache;dur={request_stats.cache_time * 1000:.1f};desc="{request_stats.cache_calls} calls, '
+                f'{cache_bytes} bytes", '
+                f"total;dur={elapsed * 1000:.1f}"
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Budgets cover the view (authentication included), not work earlier
+        # middleware may do, such as compiling or re-checking the IP policy.
+        request_stats = stats.current()
+        if request_stats is not None:
+            request._stats_before_view = (request_stats.db_queries, request_stats.cache_calls)
+
+
+class DeferredTasksMiddleware:
+    """
+    Collect the tasks services ``defer()`` during a request and publish them
+    together once the response has been sent (see ``apps.common.deferred``).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = deferred.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            calls = deferred.finish(token)
+
+        if response.streaming:
+            # A stream may stay open indefinitely; do not hold its tasks back.
+            deferred.dispatch(calls)
+        else:
+            # Published from request_finished, which fires once the server has
+            # written the response and closed it.
+            deferred.dispatch_after_response(calls)
+        return response
+
+
+class IPPolicyMiddleware:
+    """
+    Reject requests from denied networks before sessions, auth or DRF run.
+
+    The policy is an in-memory prefix trie (see ``apps.common.ip_policy``), so
+    a blocked request costs one address parse and at most 128 trie steps.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not ip_policy.get_policy().is_allowed(get_client_ip(request)):
+            metrics.IP_POLICY_BLOCKED.inc()
+            return JsonResponse({"error": "Access denied"}, status=403)
+        return self.get_response(request)
+
+
+_ORM_DIR = os.path.dirname(django.db.__file__)
+
+
+def _call_site():
+    """
+    Where a query came from, as "path:line in func": the innermost frame in
+    project code, else (e.g. DRF's pagination) the innermost outside the ORM.
+    """
+    frames = [frame for frame in reversed(traceback.extract_stack()) if frame.filename != __file__]
+    app_dir = str(settings.APP_DIR)
+    frame = next((f for f in frames if f.filename.startswith(app_dir)), None) or next(
+        (f for f in frames if not f.filename.startswith(_ORM_DIR)), None
+    )
+    if frame is None:
+        return "unknown"
+    path = frame.filename
+    if path.startswith(str(settings.BASE_DIR)):
+        path = path[len(str(settings.BASE_DIR)) + 1:]
+    return f"{path}:{frame.lineno} in {frame.name}"
+
+
+class _DBTimer:
+    """
+    execute_wrapper that accumulates SQL time into the request stats and logs
+    statements slower than SLOW_QUERY_THRESHOLD_MS with the code that ran them.
+    """
+
+    def __init__(self, request_stats):
+        self.request_stats = request_stats
+        threshold = settings.SLOW_QUERY_THRESHOLD_MS
+        self.slow_after = threshold / 1000 if threshold else None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.request_stats.db_time += elapsed
+            self.request_stats.db_queries += 1
+            if self.slow_after is not None and elapsed >= self.slow_after:
+                self._log_slow(sql, elapsed, context)
+
+    @staticmethod
+    def _log_slow(sql, elapsed, context):
+        # Parameters are left out: they carry emails and OTPs.
+        metrics.SLOW_QUERIES.inc()
+        logger.warning(
+            f"🐢 Slow query ({elapsed * 1000:.1f} ms)",
+            extra={
+                "duration_ms": round(elapsed * 1000, 1),
+                "sql": sql[:2000],
+                "call_site": _call_site(),
+                "db_alias": context["connection"].alias,
+            },
+        )
+
+
+def _db_timer(request_stats):
+    """Install a _DBTimer on every configured DB alias for the enclosed block."""
+    stack = ExitStack()
+    wrapper = _DBTimer(request_stats)
+    for conn in connections.all():
+        stack.enter_context(conn.execute_wrapper(wrapper))
+    return stack
+
+
+class ProfilingMiddleware:
+    """
+    On-demand sampling profiler.
+
+    A request is profiled when a staff user sends the PROFILING_HEADER, when it
+    falls into the 1-in-PROFILING_SAMPLE_RATE sample, or - for the latency
+    trigger - once it has been running longer than PROFILING_SLOW_THRESHOLD_MS.
+    Anything else only pays for the trigger checks.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.PROFILING_ENABLED:
+            return self.get_response(request)
+
+        trigger, delay = self._trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+
+        sampler = profiling.get_sampler()
+        profiler = profiling.SamplingProfiler(threading.get_ident())
+        sampler.watch(profiler, delay=delay)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            sampler.unwatch(profiler)
+            elapsed = time.perf_counter() - start
+
+        try:
+            path = profiling.save_profile(profiler, request, elapsed, trigger)
+        except OSError as e:
+            logger.error(f"❌ Failed to save profile for {request.path}: {str(e)}")
+        else:
+            if path is not None:
+                response["X-Profile-Id"] = path.name
+        return response
+
+    def _trigger(self, request):
+        """Return (trigger_name, start_delay_seconds) or (None, None)."""
+        if request.META.get(settings.PROFILING_HEADER) and self._is_staff(request):
+            return "header", 0.0
+        rate = settings.PROFILING_SAMPLE_RATE
+        if rate and random.randrange(rate) == 0:
+            return "sampled", 0.0
+        threshold = settings.PROFILING_SLOW_THRESHOLD_MS
+        if threshold:
+            return "slow", threshold / 1000
+        return None, None
+
+    @staticmethod
+    def _is_staff(request):
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            return user.is_staff
+
+        # API clients authenticate with JWT inside DRF, after middleware has run,
+        # so resolve the bearer token here; only done when the header is present.
+        from rest_framework.exceptions import AuthenticationFailed
+        from rest_framework_simplejwt.authentication import JWTAuthentication
+        from rest_framework_simplejwt.exceptions import TokenError
+
+        try:
+            result = JWTAuthentication().authenticate(request)
+        except (AuthenticationFailed, TokenError):
+            return False
+        return bool(result and result[0].is_staff)
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:21
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="IPRule",
+            fields=[
+                (
+                    "pkid",
+                    models.BigAutoField(
+                        editable=False, primary_key=True, serialize=False
+                    ),
+                ),
+                (
+                    "id",
+                    models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "network",
+                    models.CharField(
+                        help_text="IPv4 or IPv6 address or CIDR, e.g. 203.0.113.0/24",
+                        max_length=43,
+                        unique=True,
+                    ),
+                ),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[("allow", "Allow"), ("deny", "Deny")],
+                        default="deny",
+                        max_length=5,
+                    ),
+                ),
+                ("reason", models.CharField(blank=True, max_length=255)),
+            ],
+            options={
+                "verbose_name": "IP rule",
+                "ordering": ["network"],
+            },
+        ),
+    ]
@@ -1,5 +1,7 @@
+import ipaddress
 import uuid
 
+from django.core.exceptions import ValidationError
 from django.db import models
 
 
@@ -12,3 +14,31 @@ class TimeStampedModel(models.Model):
     class Meta:
         abstract = True
         ordering = ["-created_at", "-updated_at"]
+
+
+class IPRule(TimeStampedModel):
+    """A CIDR allow/deny entry enforced by IPPolicyMiddleware."""
+
+    ACTION_CHOICES = [
+        ("allow", "Allow"),
+        ("deny", "Deny"),
+    ]
+
+    network = models.CharField(
+        max_length=43, unique=True, help_text="IPv4 or IPv6 address or CIDR, e.g. 203.0.113.0/24"
+    )
+    action = models.CharField(max_length=5, choices=ACTION_CHOICES, default="deny")
+    reason = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        ordering = ["network"]
+        verbose_name = "IP rule"
+
+    def __str__(self):
+        return f"{self.action} {self.network}"
+
+    def clean(self):
+        try:
+            self.network = str(ipaddress.ip_network(self.network.strip(), strict=False))
+        except ValueError:
+            raise ValidationError({"network": "Enter a valid IPv4 or IPv6 address or CIDR."})
@@ -0,0 +1,24 @@
+"""
+orjson-backed JSON parsing, a drop-in for DRF's JSONParser.
+
+orjson only reads UTF-8 (the JSON default, and DRF's), so a request
+declaring another charset falls back to the stdlib parser. Like DRF's
+strict mode, NaN and Infinity are rejected.
+"""
+import orjson
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+
+class ORJSONParser(JSONParser):
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if encoding.lower().replace("-", "") != "utf8":
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
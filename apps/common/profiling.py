@@ -0,0 +1,152 @@
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.utils.timezone import now
+
+PROFILE_SUFFIX = ".folded"
+_SAFE_NAME = re.compile(r"^[\w.-]+\.folded$")
+
+
+class SamplingProfiler:
+    """
+    Collapsed-stack profile of a single thread.
+
+    Samples are aggregated as ``frame;frame;frame count`` lines, the "folded"
+    format consumed directly by flamegraph.pl, speedscope and inferno.
+    """
+
+    def __init__(self, thread_id):
+        self.thread_id = thread_id
+        self.samples = Counter()
+        self.sample_count = 0
+
+    def add(self, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+            frame = frame.f_back
+        if stack:
+            stack.reverse()
+            self.samples[";".join(stack)] += 1
+            self.sample_count += 1
+
+    def folded(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+class _Sampler(threading.Thread):
+    """
+    One daemon thread per process that samples every registered request thread.
+
+    Requests can be registered immediately (header / 1-in-N triggers) or with a
+    deadline (latency trigger); deadline entries only start being sampled once
+    the request has run past the threshold, so fast requests pay for a dict
+    insert and pop and nothing else.
+    """
+
+    def __init__(self, interval):
+        super().__init__(name="tses-profiler", daemon=True)
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._active = {}
+        self._pending = {}
+
+    def watch(self, profiler, delay=0.0):
+        with self._lock:
+            if delay:
+                self._pending[profiler.thread_id] = (time.perf_counter() + delay, profiler)
+            else:
+                self._active[profiler.thread_id] = profiler
+        self._wakeup.set()
+
+    def unwatch(self, profiler):
+        with self._lock:
+            self._active.pop(profiler.thread_id, None)
+            self._pending.pop(profiler.thread_id, None)
+
+    def run(self):
+        while True:
+            with self._lock:
+                if self._pending:
+                    current = time.perf_counter()
+                    for thread_id, (deadline, profiler) in list(self._pending.items()):
+                        if current >= deadline:
+                            del self._pending[thread_id]
+                            self._active[thread_id] = profiler
+                active = list(self._active.values())
+                idle = not active and not self._pending
+
+            if idle:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+
+            if active:
+                frames = sys._current_frames()
+                for profiler in active:
+                    profiler.add(frames.get(profiler.thread_id))
+            time.sleep(self.interval)
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def get_sampler():
+    global _sampler
+    if _sampler is None:
+        with _sampler_lock:
+            if _sampler is None:
+                _sampler = _Sampler(settings.PROFILING_INTERVAL_MS / 1000)
+                _sampler.start()
+    return _sampler
+
+
+def profile_dir():
+    return Path(settings.PROFILING_DIR)
+
+
+def save_profile(profiler, request, elapsed, trigger):
+    """Write a folded profile to PROFILING_DIR and prune the oldest beyond the cap."""
+    if not profiler.sample_count:
+        return None
+
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    slug = re.sub(r"[^\w]+", "-", request.path).strip("-") or "root"
+    name = f"{now():%Y%m%dT%H%M%S}-{request.method}-{slug[:60]}-{int(elapsed * 1000)}ms-{trigger}{PROFILE_SUFFIX}"
+    path = directory / name
+    path.write_text(profiler.folded())
+
+    profiles = sorted(directory.glob(f"*{PROFILE_SUFFIX}"), key=lambda p: p.stat().st_mtime)
+    for stale in profiles[: max(0, len(profiles) - settings.PROFILING_MAX_FILES)]:
+        stale.unlink(missing_ok=True)
+    return path
+
+
+def list_profiles():
+    """Return saved profiles, newest first, as (name, size, modified) tuples."""
+    directory = profile_dir()
+    if not directory.exists():
+        return []
+    entries = []
+    for path in directory.glob(f"*{PROFILE_SUFFIX}"):
+        stat = path.stat()
+        entries.append((path.name, stat.st_size, stat.st_mtime))
+    return sorted(entries, key=lambda entry: entry[2], reverse=True)
+
+
+def resolve_profile(name):
+    """Map a user-supplied profile name to a path inside PROFILING_DIR, or None."""
+    if not _SAFE_NAME.match(name):
+        return None
+    path = profile_dir() / name
+    return path if path.is_file() else None
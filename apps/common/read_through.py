@@ -0,0 +1,99 @@
+"""
+Read-through caching without stampedes.
+
+``fetch(key, compute, timeout)`` returns the cached value for ``key`` or
+stores ``compute()``, such that expiry never sends every concurrent request
+to the database at once:
+
+- Single flight: only the process that wins ``cache.add(key + ":lock")``
+  (SET NX on Redis, so across all workers) recomputes. The others wait for
+  its result, or are served the stale value (below).
+- Probabilistic early refresh ("XFetch"): while an entry is still fresh, each
+  read recomputes it early with a probability that rises as expiry nears and
+  with how long the value took to compute, so a hot key is usually refreshed
+  by one request before it expires at all.
+- Stale-while-revalidate: with ``stale=N`` an entry is kept N seconds past
+  its timeout and served as-is while the lock holder recomputes it.
+
+Entries are stored as ``(value, fresh_until, compute_seconds)``.
+"""
+import logging
+import math
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache as default_cache
+
+from apps.common import metrics
+from apps.common.cache import pipeline
+
+logger = logging.getLogger(__name__)
+
+
+def _lock_key(key):
+    return f"{key}:lock"
+
+
+def _should_refresh_early(fresh_until, compute_seconds, now):
+    beta = settings.READ_THROUGH_CACHE["BETA"]
+    # -log(random()) is exponentially distributed: usually small, occasionally large.
+    return now - compute_seconds * beta * math.log(1.0 - random.random()) >= fresh_until
+
+
+def _compute_and_store(cache, key, compute, timeout, stale):
+    start = time.perf_counter()
+    try:
+        value = compute()
+    except Exception:
+        cache.delete(_lock_key(key))
+        raise
+    compute_seconds = time.perf_counter() - start
+    with pipeline(cache) as pipe:
+        pipe.set(key, (value, time.time() + timeout, compute_seconds), timeout=timeout + stale)
+        pipe.delete(_lock_key(key))
+    return value
+
+
+def fetch(key, compute, timeout, stale=0, cache=None):
+    """
+    The cached value for ``key``, computing and storing it on a miss.
+
+    ``timeout`` is how long the value is fresh; with ``stale`` > 0 it is then
+    served for that many more seconds while one caller recomputes it.
+    """
+    cache = cache or default_cache
+    config = settings.READ_THROUGH_CACHE
+    entry = cache.get(key)
+    now = time.time()
+
+    if entry is not None:
+        value, fresh_until, compute_seconds = entry
+        if now < fresh_until and not _should_refresh_early(fresh_until, compute_seconds, now):
+            metrics.READ_THROUGH.labels("hit").inc()
+            return value
+        outcome = "early_refresh" if now < fresh_until else "stale"
+        # Fresh-but-refreshing and stale entries are both still servable: whoever
+        # does not get the lock returns them instead of waiting.
+        if not cache.add(_lock_key(key), 1, timeout=config["LOCK_SECONDS"]):
+            metrics.READ_THROUGH.labels(f"{outcome}_served").inc()
+            return value
+        metrics.READ_THROUGH.labels(outcome).inc()
+        return _compute_and_store(cache, key, compute, timeout, stale)
+
+    if cache.add(_lock_key(key), 1, timeout=config["LOCK_SECONDS"]):
+        metrics.READ_THROUGH.labels("miss").inc()
+        return _compute_and_store(cache, key, compute, timeout, stale)
+
+    # Someone else is computing it: wait for their result rather than repeat the work.
+    deadline = time.monotonic() + config["WAIT_SECONDS"]
+    while time.monotonic() < deadline:
+        time.sleep(config["POLL_SECONDS"])
+        entry = cache.get(key)
+        if entry is not None:
+            metrics.READ_THROUGH.labels("waited").inc()
+            return entry[0]
+
+    logger.warning(f"⚠️ Gave up waiting for {key} to be computed elsewhere; computing it here")
+    metrics.READ_THROUGH.labels("wait_timeout").inc()
+    return _compute_and_store(cache, key, compute, timeout, stale)
@@ -0,0 +1,56 @@
+"""
+orjson-backed JSON rendering, byte-for-byte compatible with DRF's JSONRenderer.
+
+DRF's default settings (UNICODE_JSON, COMPACT_JSON) produce compact UTF-8
+JSON, which is also what orjson writes, so the only differences to paper
+over are types: orjson encodes UUIDs, datetimes (with ``Z`` for UTC, as DRF
+does), dates and times itself; phone numbers, countries, lazy translation
+strings and anything else go through ``_default``. Indented output (the
+browsable API asks for it) and non-default DRF JSON settings fall back to
+the stdlib renderer, as does anything orjson refuses to encode (integers
+wider than 64 bits, unsupported types), so those behave exactly as before.
+
+One difference remains: NaN and Infinity floats render as ``null``, where
+DRF's strict mode raises ValueError. Serializers here never produce them.
+"""
+import orjson
+from django_countries.fields import Country
+from phonenumber_field.phonenumber import PhoneNumber
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+_encoder = JSONEncoder()
+
+
+def _default(obj):
+    if isinstance(obj, PhoneNumber):
+        return str(obj)
+    if isinstance(obj, Country):
+        return obj.code
+    # Lazy strings, Decimals, timedeltas, querysets, ...: whatever DRF's encoder does.
+    return _encoder.default(obj)
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        if (
+            indent
+            or self.encoder_class is not JSONEncoder
+            or self.ensure_ascii
+            or not self.compact
+            or not self.strict
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            content = orjson.dumps(data, default=_default, option=_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Like JSONRenderer, escape the two characters valid in JSON but not in JavaScript.
+        return content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
@@ -0,0 +1,122 @@
+"""
+Cache final response bytes rather than the data behind them.
+
+``fetch`` stores a view's JSON already rendered and, above
+RESPONSE_CACHE_MIN_COMPRESS_BYTES, already compressed (gzip, or brotli when
+the ``brotli`` package is installed and RESPONSE_CACHE_COMPRESSION = "br"),
+tagged with a hash of the JSON. A hit is one cache GET: the bytes go to the
+client as they are when it accepts the stored encoding, are decompressed
+for the few that do not, and become a 304 when the client already has them.
+
+Entries go through ``apps.common.read_through``, so they are also protected
+from stampedes.
+"""
+import gzip
+import hashlib
+import logging
+from typing import NamedTuple
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+
+from apps.common import read_through
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+JSON_CONTENT_TYPE = "application/json"
+
+
+class CachedBody(NamedTuple):
+    digest: str
+    # "" when stored uncompressed, else the Content-Encoding of ``content``.
+    encoding: str
+    content: bytes
+
+    @property
+    def etag(self):
+        # Weak: the gzip and identity forms are the same JSON, byte-for-byte different.
+        return f'W/"{self.digest}"'
+
+
+def _compression():
+    compression = settings.RESPONSE_CACHE_COMPRESSION
+    if compression == "br" and brotli is None:
+        logger.warning("⚠️ RESPONSE_CACHE_COMPRESSION is 'br' but brotli is not installed; using gzip")
+        return "gzip"
+    return compression
+
+
+def encode(content):
+    """Hash and (when large enough) compress rendered JSON."""
+    digest = hashlib.blake2b(content, digest_size=16).hexdigest()
+    compression = _compression()
+    if not compression or len(content) < settings.RESPONSE_CACHE_MIN_COMPRESS_BYTES:
+        return CachedBody(digest, "", content)
+    if compression == "br":
+        return CachedBody(digest, "br", brotli.compress(content, quality=5))
+    return CachedBody(digest, "gzip", gzip.compress(content, compresslevel=6))
+
+
+def _decode(body):
+    if body.encoding == "br":
+        return brotli.decompress(body.content)
+    if body.encoding == "gzip":
+        return gzip.decompress(body.content)
+    return body.content
+
+
+def accepts_encoding(request, coding):
+    """Whether Accept-Encoding lists ``coding`` (or ``*``) with a non-zero q-value."""
+    for item in request.META.get("HTTP_ACCEPT_ENCODING", "").split(","):
+        name, _, params = item.strip().partition(";")
+        if name.strip().lower() not in (coding, "*"):
+            continue
+        q = params.strip().lower()
+        return not (q.startswith("q=") and q[2:].strip() in ("0", "0.0", "0.00", "0.000"))
+    return False
+
+
+def respond(request, body):
+    """Serve a CachedBody: 304 on a matching ETag, stored bytes if the encoding is accepted."""
+    if body.etag in parse_etags(request.META.get("HTTP_IF_NONE_MATCH", "")):
+        response = HttpResponseNotModified()
+    elif body.encoding and accepts_encoding(request, body.encoding):
+        response = HttpResponse(body.content, content_type=JSON_CONTENT_TYPE)
+        response["Content-Encoding"] = body.encoding
+    else:
+        response = HttpResponse(_decode(body), content_type=JSON_CONTENT_TYPE)
+    response["ETag"] = body.etag
+    patch_vary_headers(response, ["Accept-Encoding"])
+    # Bodies depend on who asked (see ``fetch``): never let a shared cache reuse them.
+    patch_cache_control(response, private=True)
+    return response
+
+
+def cacheable(request):
+    """Only JSON is cached as bytes; other formats (e.g. the browsable API) render normally."""
+    renderer = getattr(request, "accepted_renderer", None)
+    return renderer is not None and renderer.media_type == JSON_CONTENT_TYPE
+
+
+def fetch(request, key, compute, timeout, stale=0):
+    """
+    Response for ``key``, rendering ``compute()`` (the response data) with the
+    request's negotiated JSON renderer on a miss.
+
+    ``key`` must identify everything the body depends on, including the
+    requester when permissions or queryset filtering vary by user: the stored
+    bytes and ETag are served to every request with the same key.
+    """
+    renderer = request.accepted_renderer
+
+    def render():
+        return encode(renderer.render(compute(), JSON_CONTENT_TYPE))
+
+    return respond(request, read_through.fetch(key, render, timeout, stale=stale))
@@ -0,0 +1,100 @@
+import hashlib
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import NamedTuple
+
+from django.conf import settings
+from drf_yasg.codecs import OpenAPICodecJson
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "openapi-manifest.json"
+
+
+class SchemaArtifact(NamedTuple):
+    version: str
+    digest: str
+    content: bytes
+
+    @property
+    def etag(self):
+        return f'"{self.digest}"'
+
+    @property
+    def filename(self):
+        return f"openapi-{self.digest}.json"
+
+
+_artifact = None
+_lock = threading.Lock()
+
+
+def build_artifact(version):
+    """Generate the OpenAPI document once and content-hash it."""
+    from tses_be.urls import api_info, schema_view
+
+    schema = schema_view.generator_class(info=api_info).get_schema(request=None, public=True)
+    content = OpenAPICodecJson(validators=[]).encode(schema)
+    digest = hashlib.sha256(content).hexdigest()[:16]
+    return SchemaArtifact(version, digest, content)
+
+
+def artifact_dir():
+    return Path(settings.SCHEMA_ARTIFACT_DIR)
+
+
+def write_artifact(artifact):
+    directory = artifact_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / artifact.filename).write_bytes(artifact.content)
+    manifest = {"version": artifact.version, "digest": artifact.digest, "file": artifact.filename}
+    (directory / MANIFEST_NAME).write_text(json.dumps(manifest))
+    return directory / artifact.filename
+
+
+def load_artifact(version):
+    """Return the on-disk artifact if it was built for ``version``, else None."""
+    directory = artifact_dir()
+    try:
+        manifest = json.loads((directory / MANIFEST_NAME).read_text())
+        if manifest["version"] != version:
+            return None
+        content = (directory / manifest["file"]).read_bytes()
+    except (OSError, ValueError, KeyError):
+        return None
+    if hashlib.sha256(content).hexdigest()[:16] != manifest["digest"]:
+        return None
+    return SchemaArtifact(version, manifest["digest"], content)
+
+
+def get_artifact():
+    """
+    Return the schema for this process, generating it at most once.
+
+    With CODE_VERSION set, an artifact built for the same version (by the
+    ``generate_schema`` command or a previous boot) is reused from disk and a
+    new one is written when the version changes. Without it we cannot tell
+    whether the code changed, so the schema is rebuilt once per process.
+    """
+    global _artifact
+    if _artifact is None:
+        with _lock:
+            if _artifact is None:
+                version = settings.CODE_VERSION
+                artifact = load_artifact(version) if version else None
+                if artifact is None:
+                    artifact = build_artifact(version)
+                    if version:
+                        try:
+                            write_artifact(artifact)
+                        except OSError as e:
+                            logger.warning(f"⚠️ Could not persist OpenAPI schema: {str(e)}")
+                _artifact = artifact
+    return _artifact
+
+
+def reset():
+    global _artifact
+    _artifact = None
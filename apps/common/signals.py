@@ -0,0 +1,98 @@
+import logging
+import os
+import time
+
+from celery.signals import (
+    after_task_publish,
+    before_task_publish,
+    task_postrun,
+    task_prerun,
+    worker_process_shutdown,
+    worker_ready,
+)
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.common import ip_policy, metrics, stats
+from apps.common.models import IPRule
+
+logger = logging.getLogger(__name__)
+
+# task_id -> perf_counter() at publish (and with the stats token at prerun); entries are removed by the
+# matching "after" signal so the dicts stay bounded by in-flight tasks.
+_publish_started = {}
+_run_started = {}
+
+
+def _task_id(headers, body):
+    if headers and "id" in headers:
+        return headers["id"]
+    if isinstance(body, dict):
+        return body.get("id")
+    return None
+
+
+@before_task_publish.connect
+def _before_publish(sender=None, headers=None, body=None, **kwargs):
+    task_id = _task_id(headers, body)
+    if task_id:
+        _publish_started[task_id] = time.perf_counter()
+
+
+@after_task_publish.connect
+def _after_publish(sender=None, headers=None, body=None, **kwargs):
+    started = _publish_started.pop(_task_id(headers, body), None)
+    if started is not None:
+        metrics.CELERY_ENQUEUE_LATENCY.labels(sender or "unknown").observe(time.perf_counter() - started)
+
+
+@task_prerun.connect
+def _task_prerun(task_id=None, **kwargs):
+    # Each run gets its own stats, so cache calls are accounted per task.
+    _run_started[task_id] = (time.perf_counter(), stats.start())
+
+
+@task_postrun.connect
+def _task_postrun(task_id=None, task=None, state=None, **kwargs):
+    started = _run_started.pop(task_id, None)
+    if started is not None:
+        started, token = started
+        task_stats = stats.current()
+        stats.finish(token)
+        name = getattr(task, "name", "unknown")
+        metrics.CELERY_TASK_LATENCY.labels(name, state or "UNKNOWN").observe(time.perf_counter() - started)
+        metrics.TASK_CACHE_CALLS.labels(name).observe(task_stats.cache_calls)
+        metrics.TASK_CACHE_SECONDS.labels(name).observe(task_stats.cache_time)
+
+
+@receiver(post_save, sender=IPRule)
+@receiver(post_delete, sender=IPRule)
+def _reload_ip_policy(**kwargs):
+    ip_policy.bump_version()
+
+
+@worker_ready.connect
+def _start_worker_metrics_server(**kwargs):
+    """
+    Expose worker-side metrics on CELERY_METRICS_PORT. Tasks run in prefork
+    children, so their samples only reach this server through the files in
+    PROMETHEUS_MULTIPROC_DIR; without it nothing is served.
+    """
+    port = getattr(settings, "CELERY_METRICS_PORT", None)
+    if not port:
+        return
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        logger.error("❌ CELERY_METRICS_PORT is set but PROMETHEUS_MULTIPROC_DIR is not; worker metrics are off")
+        return
+    from prometheus_client import start_http_server
+
+    start_http_server(int(port), registry=metrics.get_registry())
+
+
+@worker_process_shutdown.connect
+def _mark_worker_process_dead(pid=None, **kwargs):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(pid or os.getpid())
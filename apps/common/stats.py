@@ -0,0 +1,34 @@
+from contextvars import ContextVar
+
+
+class RequestStats:
+    """Per-request (or per-task) accumulator for time spent in backing services."""
+
+    __slots__ = ("db_time", "db_queries", "cache_time", "cache_calls", "cache_bytes_sent", "cache_bytes_received")
+
+    def __init__(self):
+        self.db_time = 0.0
+        self.db_queries = 0
+        self.cache_time = 0.0
+        # Round trips: a pipeline or a multi-key call counts once per server.
+        self.cache_calls = 0
+        # Serialised cache values written and read (keys and Redis framing excluded).
+        self.cache_bytes_sent = 0
+        self.cache_bytes_received = 0
+
+
+_current = ContextVar("tses_request_stats", default=None)
+
+
+def start():
+    """Begin collecting stats for the current request/task; returns a reset token."""
+    return _current.set(RequestStats())
+
+
+def current():
+    """Return the active RequestStats, or None outside a request/task."""
+    return _current.get()
+
+
+def finish(token):
+    _current.reset(token)
@@ -0,0 +1,40 @@
+import logging
+
+from celery import current_app, shared_task
+from celery.exceptions import Retry
+from celery.utils import uuid
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True)
+def run_deferred(self, calls):
+    """
+    Run a request's deferred tasks (see apps.common.deferred) in this worker
+
+    Args:
+        calls: list of [task_name, args, kwargs]
+
+    The calls arrived as one message and are executed here rather than
+    re-published, so the batch costs no further broker round trips. Each
+    runs under its own worker-style request: a task that calls
+    ``self.retry()`` publishes its retry as usual, with its own countdown,
+    arguments and max_retries, and a failure does not stop the rest.
+    """
+    failed = 0
+    for name, args, kwargs in calls:
+        task = current_app.tasks[name]
+        task.push_request(
+            id=uuid(), args=args, kwargs=kwargs, retries=0, called_directly=False,
+            delivery_info=self.request.delivery_info,
+        )
+        try:
+            task.run(*args, **kwargs)
+        except Retry:
+            logger.warning(f"⚠️ [CELERY TASK] Deferred task {name} scheduled for retry")
+        except Exception as e:
+            failed += 1
+            logger.error(f"❌ [CELERY TASK] Deferred task {name} failed: {str(e)}")
+        finally:
+            task.pop_request()
+    return f"{len(calls) - failed} of {len(calls)} deferred tasks run"
@@ -0,0 +1,117 @@
+import logging
+from datetime import datetime
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.cache import cache
+from django.db import connection
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseForbidden,
+    HttpResponseNotModified,
+    JsonResponse,
+)
+from django.shortcuts import render
+from django.utils.crypto import constant_time_compare
+from django.utils.http import parse_etags
+from django.utils.timezone import get_current_timezone
+
+from apps.common import profiling, schema, warmup
+from apps.common.metrics import render_metrics
+
+logger = logging.getLogger(__name__)
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint, guarded by METRICS_AUTH_TOKEN; open without one only when DEBUG."""
+    token = getattr(settings, "METRICS_AUTH_TOKEN", "")
+    if not token and not settings.DEBUG:
+        return HttpResponseForbidden()
+    if token and not constant_time_compare(request.META.get("HTTP_AUTHORIZATION", ""), f"Bearer {token}"):
+        return HttpResponseForbidden()
+
+    payload, content_type = render_metrics()
+    return HttpResponse(payload, content_type=content_type)
+
+
+@staff_member_required
+def profile_list_view(request):
+    """Admin page listing captured request profiles."""
+    tz = get_current_timezone()
+    profiles = [
+        {"name": name, "size": size, "modified": datetime.fromtimestamp(mtime, tz)}
+        for name, size, mtime in profiling.list_profiles()
+    ]
+    context = {
+        **admin.site.each_context(request),
+        "title": "Request profiles",
+        "profiles": profiles,
+        "profiling_enabled": settings.PROFILING_ENABLED,
+    }
+    return render(request, "common/profiles.html", context)
+
+
+@staff_member_required
+def profile_download_view(request, name):
+    """Download a folded-stack profile for flamegraph.pl / speedscope."""
+    path = profiling.resolve_profile(name)
+    if path is None:
+        raise Http404("Profile not found")
+    return FileResponse(path.open("rb"), as_attachment=True, filename=name, content_type="text/plain")
+
+
+def liveness_view(request):
+    """Process is up and serving; never touches backing services."""
+    return JsonResponse({"status": "ok"})
+
+
+def readiness_view(request):
+    """200 once this worker has warmed up and can reach the DB and cache."""
+    if not warmup.is_ready() and not warmup.warm_up(code=False):
+        return JsonResponse({"status": "warming"}, status=503)
+
+    # Failures are logged, not returned: the probe is unauthenticated.
+    checks = {}
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        checks["database"] = "ok"
+    except Exception:
+        logger.exception("❌ Readiness check could not reach the database")
+        checks["database"] = "unavailable"
+    try:
+        cache.get("warmup:ping")
+        checks["cache"] = "ok"
+    except Exception:
+        logger.exception("❌ Readiness check could not reach the cache")
+        checks["cache"] = "unavailable"
+
+    ready = all(value == "ok" for value in checks.values())
+    return JsonResponse({"status": "ready" if ready else "degraded", "checks": checks}, status=200 if ready else 503)
+
+
+def _schema_response(request, artifact, cache_control):
+    if artifact.etag in parse_etags(request.META.get("HTTP_IF_NONE_MATCH", "")):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(artifact.content, content_type="application/json")
+    response["ETag"] = artifact.etag
+    response["Cache-Control"] = cache_control
+    return response
+
+
+def openapi_schema_view(request):
+    """Precomputed OpenAPI document; clients revalidate cheaply via ETag."""
+    artifact = schema.get_artifact()
+    return _schema_response(request, artifact, f"public, max-age={settings.SCHEMA_CACHE_MAX_AGE}")
+
+
+def openapi_schema_versioned_view(request, digest):
+    """Content-addressed copy of the schema; safe to cache forever."""
+    artifact = schema.get_artifact()
+    if digest != artifact.digest:
+        raise Http404("Unknown schema version")
+    return _schema_response(request, artifact, "public, max-age=31536000, immutable")
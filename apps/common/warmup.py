@@ -0,0 +1,65 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+_ready = False
+
+
+def is_ready():
+    return _ready
+
+
+def warm_code():
+    """
+    Prime process-wide, fork-safe state: imports, URL resolvers and the
+    OpenAPI schema. Safe to run in the gunicorn master before forking so
+    every worker inherits it copy-on-write.
+    """
+    # Populating the root resolver imports every URLconf, and with them the
+    # views and serializers, and compiles their patterns.
+    get_resolver()._populate()
+
+    warm_schema()
+
+
+def warm_schema():
+    from apps.common import schema
+
+    schema.get_artifact()
+
+
+def warm_connections():
+    """Open this process' DB and cache connections; must run after fork."""
+    for conn in connections.all():
+        conn.ensure_connection()
+    for alias in settings.CACHES:
+        caches[alias].get("warmup:ping")
+
+
+def warm_up(code=True, connections=True):
+    """
+    Run the warm-up steps; marks this process ready once connections are up.
+
+    Connection failures are logged rather than raised so a worker can still
+    boot while a dependency is down; it simply stays not-ready.
+    """
+    global _ready
+    start = time.perf_counter()
+    if code:
+        warm_code()
+    if connections:
+        try:
+            warm_connections()
+        except Exception as e:
+            logger.error(f"❌ Warm-up could not reach backing services: {str(e)}")
+            return False
+        _ready = True
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    logger.info(f"🔥 Warm-up finished in {elapsed_ms:.0f}ms (code={code}, connections={connections})")
+    return True
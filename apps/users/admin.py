@@ -2,11 +2,13 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.translation import gettext_lazy as _
 
+from apps.common.admin import LargeTableAdminMixin
+
 from .forms import CustomUserChangeForm, CustomUserCreationForm
 from .models import User
 
 
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(LargeTableAdminMixin, BaseUserAdmin):
     ordering = ["email"]
     add_form = CustomUserCreationForm
     form = CustomUserChangeForm
@@ -24,14 +26,16 @@ class UserAdmin(BaseUserAdmin):
         "failed_login_attempts"
     ]
     list_display_links = ["id", "email"]
+    # Only low-cardinality and range filters: value-list filters on email or
+    # names run a SELECT DISTINCT over the whole table on every page load.
     list_filter = [
-        "email",
-        "username",
-        "first_name",
-        "last_name",
         "is_staff",
         "is_active",
+        "is_verified",
+        "is_locked",
+        "date_joined",
     ]
+    date_hierarchy = "date_joined"
     fieldsets = (
         (
             _("Login Credentials"),
@@ -84,5 +88,6 @@ class UserAdmin(BaseUserAdmin):
         self.message_user(request, "Selected accounts have been unlocked.")
     unlock_accounts.short_description = "Unlock selected accounts"
 
+
 # admin.site.unregister(User)
-admin.site.register(User, UserAdmin)
\ No newline at end of file
+admin.site.register(User, UserAdmin)
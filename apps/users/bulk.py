@@ -0,0 +1,248 @@
+import csv
+import hashlib
+import io
+import json
+import logging
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import EmailValidator
+from django.db import connection, transaction
+
+from apps.users.managers import insert_expressions, unique_username_sql
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+STAGING_TABLE = "users_import_staging"
+STAGING_COLUMNS = ("email", "username", "first_name", "last_name", "password", "is_verified")
+EXPORT_FIELDS = ("id", "email", "username", "first_name", "last_name", "is_active", "is_verified", "date_joined")
+
+PASSWORD_UNUSABLE = "unusable"
+PASSWORD_HASHED = "hashed"
+PASSWORD_RAW = "raw"
+PASSWORD_MODES = (PASSWORD_UNUSABLE, PASSWORD_HASHED, PASSWORD_RAW)
+
+_validate_email = EmailValidator()
+
+
+def read_rows(stream, fmt):
+    """Yield dict rows from a CSV or NDJSON text stream without loading it all."""
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+    else:
+        for line in stream:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _truthy(value):
+    if isinstance(value, bool):
+        return value
+    return str(value or "").strip().lower() in ("1", "true", "yes", "y")
+
+
+class UserBulkService:
+    """Bulk provisioning and export of users outside the per-row ORM path."""
+
+    @staticmethod
+    def normalize_batch(rows, password_mode, seen_usernames):
+        """
+        Validate and normalize one batch of raw rows.
+
+        Returns (clean_rows, errors) where clean_rows are tuples in
+        STAGING_COLUMNS order and errors are (row, message) pairs.
+        ``seen_usernames`` carries username de-duplication across batches.
+        """
+        clean, errors = [], []
+        for row in rows:
+            email = (row.get("email") or "").strip()
+            local, _, domain = email.rpartition("@")
+            email = f"{local}@{domain.lower()}" if local else email
+            try:
+                _validate_email(email)
+            except ValidationError:
+                errors.append((row, "invalid email"))
+                continue
+
+            password = row.get("password") or None
+            if password_mode == PASSWORD_UNUSABLE or not password:
+                password = make_password(None)
+            elif password_mode == PASSWORD_HASHED:
+                try:
+                    identify_hasher(password)
+                except ValueError:
+                    errors.append((row, "password is not a recognised hash"))
+                    continue
+            else:
+                password = make_password(password)
+
+            username = (row.get("username") or local).strip()[:248]
+            if username in seen_usernames:
+                username = f"{username}-{hashlib.md5(email.encode()).hexdigest()[:6]}"
+            seen_usernames.add(username)
+
+            clean.append((
+                email,
+                username,
+                (row.get("first_name") or local)[:50],
+                (row.get("last_name") or "User")[:50],
+                password,
+                _truthy(row.get("is_verified")),
+            ))
+        return clean, errors
+
+    @staticmethod
+    def import_users(rows, password_mode=PASSWORD_UNUSABLE, update_existing=False, batch_size=5000):
+        """
+        Import an iterable of raw rows; returns a stats dict.
+
+        On Postgres every batch is COPYed into a temporary staging table and a
+        single INSERT ... ON CONFLICT moves them into users_user at the end.
+        Other backends fall back to bulk_create per batch.
+        """
+        seen_usernames = set()
+        stats = {"read": 0, "invalid": 0, "created": 0, "updated": 0, "errors": []}
+
+        with transaction.atomic():
+            postgres = connection.vendor == "postgresql"
+            if postgres:
+                UserBulkService._create_staging_table()
+
+            for batch in batched(rows, batch_size):
+                clean, errors = UserBulkService.normalize_batch(batch, password_mode, seen_usernames)
+                stats["read"] += len(batch)
+                stats["invalid"] += len(errors)
+                stats["errors"].extend(errors[:100 - len(stats["errors"])])
+                if postgres:
+                    UserBulkService._copy_to_staging(clean)
+                else:
+                    stats["created"] += UserBulkService._bulk_create(clean)
+
+            if postgres:
+                created, updated = UserBulkService._upsert_from_staging(update_existing)
+                stats["created"], stats["updated"] = created, updated
+
+        logger.info(
+            f"✅ Imported users: {stats['created']} created, {stats['updated']} updated, {stats['invalid']} invalid"
+        )
+        return stats
+
+    @staticmethod
+    def _create_staging_table():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TEMP TABLE {STAGING_TABLE} ("
+                "email varchar(254), username varchar(255), first_name varchar(50), "
+                "last_name varchar(50), password varchar(128), is_verified boolean"
+                ") ON COMMIT DROP"
+            )
+
+    @staticmethod
+    def _copy_to_staging(rows):
+        if not rows:
+            return
+        from django.db.backends.postgresql.psycopg_any import is_psycopg3
+
+        sql = f"COPY {STAGING_TABLE} ({', '.join(STAGING_COLUMNS)}) FROM STDIN"
+        with connection.cursor() as cursor:
+            if is_psycopg3:
+                with cursor.copy(sql) as copy:
+                    for row in rows:
+                        copy.write_row(row)
+            else:
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(rows)
+                buffer.seek(0)
+                cursor.copy_expert(f"{sql} WITH (FORMAT csv)", buffer)
+
+    @staticmethod
+    def _upsert_from_staging(update_existing):
+        """Move staged rows into users_user in one statement; returns (created, updated)."""
+        table = User._meta.db_table
+        overrides = {column: (f"s.{column}", []) for column in STAGING_COLUMNS}
+        # Staged usernames are unique among themselves; only clashes with a
+        # different existing account need a suffix.
+        overrides["username"] = (unique_username_sql(table, "s.username", "s.email"), [])
+        overrides["id"] = ("gen_random_uuid()", [])
+        overrides["date_joined"] = ("now()", [])
+        columns, expressions, params = insert_expressions(User, connection, overrides)
+
+        if update_existing:
+            conflict = (
+                "DO UPDATE SET first_name = EXCLUDED.first_name, last_name = EXCLUDED.last_name, "
+                f"is_verified = {table}.is_verified OR EXCLUDED.is_verified"
+            )
+        else:
+            conflict = "DO NOTHING"
+
+        sql = (
+            f"WITH upserted AS ("
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"SELECT DISTINCT ON (s.email) {', '.join(expressions)} FROM {STAGING_TABLE} s ORDER BY s.email "
+            f"ON CONFLICT (email) {conflict} "
+            f"RETURNING (xmax = 0) AS inserted"
+            f") SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM upserted"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchone()
+
+    @staticmethod
+    def _bulk_create(rows):
+        if not rows:
+            return 0
+        emails = [row[0] for row in rows]
+        existing_emails = set(User.objects.filter(email__in=emails).values_list("email", flat=True))
+        existing_usernames = set(
+            User.objects.filter(username__in=[row[1] for row in rows]).values_list("username", flat=True)
+        )
+        users = []
+        for email, username, first_name, last_name, password, is_verified in rows:
+            if email in existing_emails:
+                continue
+            existing_emails.add(email)
+            if username in existing_usernames:
+                username = f"{username}-{hashlib.md5(email.encode()).hexdigest()[:6]}"
+            users.append(User(
+                email=email,
+                username=username,
+                first_name=first_name,
+                last_name=last_name,
+                password=password,
+                is_verified=is_verified,
+            ))
+        User.objects.bulk_create(users, ignore_conflicts=True)
+        return len(users)
+
+    @staticmethod
+    def export_users(stream, fmt, fields=EXPORT_FIELDS, chunk_size=2000):
+        """Stream users to ``stream`` through a server-side cursor; returns the row count."""
+        count = 0
+        queryset = User.objects.order_by("pkid").values_list(*fields)
+        writer = csv.writer(stream) if fmt == "csv" else None
+        if writer:
+            writer.writerow(fields)
+
+        # Postgres only keeps a named (server-side) cursor open inside a transaction.
+        with transaction.atomic():
+            for values in queryset.iterator(chunk_size=chunk_size):
+                if writer:
+                    writer.writerow(values)
+                else:
+                    stream.write(json.dumps(dict(zip(fields, values)), default=str) + "\n")
+                count += 1
+        return count
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from apps.users.bulk import EXPORT_FIELDS, UserBulkService
+
+
+class Command(BaseCommand):
+    help = "Stream all users to CSV or NDJSON through a server-side cursor"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", default="-", help="Output file, or - for stdout (default)")
+        parser.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+        parser.add_argument("--fields", default=",".join(EXPORT_FIELDS), help="Comma-separated User fields")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fields = [field.strip() for field in options["fields"].split(",") if field.strip()]
+        stream = self.stdout if path == "-" else open(path, "w", newline="", encoding="utf-8")
+        try:
+            count = UserBulkService.export_users(stream, options["format"], fields, options["chunk_size"])
+        finally:
+            if stream is not self.stdout:
+                stream.close()
+        self.stderr.write(f"Exported {count} users")
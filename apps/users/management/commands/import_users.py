@@ -0,0 +1,51 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.users.bulk import PASSWORD_MODES, PASSWORD_UNUSABLE, UserBulkService, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-import users from CSV or NDJSON (columns: email, username, first_name, last_name, "
+        "password, is_verified). On Postgres rows are COPYed into a staging table and upserted in one statement."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Input file, or - for stdin")
+        parser.add_argument("--format", choices=["csv", "ndjson"], help="Defaults to the file extension")
+        parser.add_argument(
+            "--passwords",
+            choices=PASSWORD_MODES,
+            default=PASSWORD_UNUSABLE,
+            help=(
+                "unusable: OTP-only accounts, no hashing (default); hashed: column holds Django password "
+                "hashes, copied as-is; raw: hash each password (slow)"
+            ),
+        )
+        parser.add_argument("--update", action="store_true", help="Update names/verification of existing emails")
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv")
+
+        try:
+            stream = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+        except OSError as e:
+            raise CommandError(str(e))
+
+        with stream:
+            stats = UserBulkService.import_users(
+                read_rows(stream, fmt),
+                password_mode=options["passwords"],
+                update_existing=options["update"],
+                batch_size=options["batch_size"],
+            )
+
+        for row, message in stats["errors"]:
+            self.stderr.write(f"Skipped {row.get('email')!r}: {message}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Read {stats['read']} rows: {stats['created']} created, {stats['updated']} updated, "
+            f"{stats['invalid']} invalid"
+        ))
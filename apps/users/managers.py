@@ -1,10 +1,109 @@
+import hashlib
+
 from django.contrib.auth.base_user import BaseUserManager
 from django.core.exceptions import ValidationError
 from django.core.validators import validate_email
+from django.db import connections
 from django.utils.translation import gettext_lazy as _
 
 
+def insert_expressions(model, connection, overrides):
+    """
+    Columns, SQL expressions and params for a hand-written INSERT into ``model``.
+
+    ``overrides`` maps column names to (sql, params) pairs; every other
+    concrete column is bound to its Python default, so the row matches what
+    ``Model.save()`` would write.
+    """
+    columns, expressions, params = [], [], []
+    for field in model._meta.concrete_fields:
+        if field.primary_key:
+            continue
+        columns.append(connection.ops.quote_name(field.column))
+        if field.column in overrides:
+            sql, sql_params = overrides[field.column]
+            expressions.append(sql)
+            params.extend(sql_params)
+        else:
+            expressions.append(f"%s::{field.db_type(connection)}")
+            params.append(field.get_db_prep_save(field.get_default(), connection))
+    return columns, expressions, params
+
+
+def unique_username_sql(table, username, email):
+    """SQL for ``username``, suffixed with a hash of ``email`` if another account already has it."""
+    return (
+        f"CASE WHEN EXISTS (SELECT 1 FROM {table} u WHERE u.username = {username} AND u.email <> {email}) "
+        f"THEN {username} || '-' || substr(md5({email}), 1, 6) ELSE {username} END"
+    )
+
+
+def upsert_verified_sql(model, connection, email, username, first_name, last_name):
+    """
+    SQL and params for the Postgres ``upsert_verified``: INSERT ... ON CONFLICT
+    (email) DO UPDATE that only rewrites unverified rows, plus a UNION ALL
+    branch returning the existing row when the update was skipped. Each row
+    carries a ``created`` column.
+    """
+    table = connection.ops.quote_name(model._meta.db_table)
+    columns, expressions, params = insert_expressions(model, connection, {
+        "email": ("%s", [email]),
+        "username": (
+            unique_username_sql(table, "%s::text", "%s::text"),
+            [username, email, username, email, username],
+        ),
+        "first_name": ("%s", [first_name]),
+        "last_name": ("%s", [last_name]),
+        "is_verified": ("true", []),
+    })
+    returning = ", ".join(f"{table}.{column}" for column in [connection.ops.quote_name("pkid"), *columns])
+    sql = (
+        f"WITH upserted AS ("
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(expressions)}) "
+        f"ON CONFLICT (email) DO UPDATE SET is_verified = true WHERE NOT {table}.is_verified "
+        f"RETURNING {returning}, (xmax = 0) AS created"
+        f") "
+        f"SELECT * FROM upserted "
+        f"UNION ALL "
+        f"SELECT {returning}, false FROM {table} "
+        f"WHERE email = %s AND NOT EXISTS (SELECT 1 FROM upserted)"
+    )
+    return sql, [*params, email]
+
+
 class CustomUserManager(BaseUserManager):
+    def upsert_verified(self, email, username, first_name, last_name):
+        """
+        Create a verified user, or mark the existing one verified; returns (user, created).
+
+        On Postgres this is a single INSERT ... ON CONFLICT (email) DO UPDATE
+        that only rewrites the row when it is not verified yet. Usernames
+        taken by another account get a short suffix.
+        """
+        connection = connections[self.db]
+        if connection.vendor != "postgresql":
+            return self._upsert_verified_orm(email, username, first_name, last_name)
+
+        sql, params = upsert_verified_sql(self.model, connection, email, username, first_name, last_name)
+        users = list(self.raw(sql, params).using(self.db))
+        if not users:
+            # The conflicting row was committed after this statement's snapshot.
+            return self.get(email=email), False
+        return users[0], users[0].created
+
+    def _upsert_verified_orm(self, email, username, first_name, last_name):
+        user = self.filter(email=email).first()
+        if user is not None:
+            if not user.is_verified:
+                self.filter(pk=user.pk).update(is_verified=True)
+                user.is_verified = True
+            return user, False
+        if self.filter(username=username).exists():
+            username = f"{username}-{hashlib.md5(email.encode()).hexdigest()[:6]}"
+        return self.create(
+            email=email, username=username, first_name=first_name, last_name=last_name, is_verified=True
+        ), True
+
     def email_validator(self, email):
         try:
             validate_email(email)
@@ -69,4 +168,4 @@ class CustomUserManager(BaseUserManager):
             username, first_name, last_name, email, password, **extra_fields
         )
         user.save(using=self._db)
-        return user
\ No newline at end of file
+        return user
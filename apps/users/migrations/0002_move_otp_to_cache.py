@@ -0,0 +1,58 @@
+# Generated by Django 5.2.4 on 2026-10-19 16:09
+
+import logging
+
+from django.core.cache import caches
+from django.db import migrations
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def copy_live_otps_to_cache(apps, schema_editor):
+    """Move OTPs that have not expired yet into the cache so in-flight logins keep working."""
+    User = apps.get_model("users", "User")
+    current = timezone.now()
+    live = User.objects.filter(otp__isnull=False, otp_expiry__gt=current).values_list(
+        "email", "otp", "otp_expiry", "otp_try_count"
+    )
+    try:
+        cache = caches["otp"]
+        # Key formats are frozen as OTPService.key(kind, email) produces them
+        # ("{kind}:{{email}}", hash-tagged per email as stored on the user).
+        # Migrations must not import app code; update both if the format changes.
+        for email, otp, otp_expiry, otp_try_count in live.iterator():
+            timeout = max(1, int((otp_expiry - current).total_seconds()))
+            cache.set(f"otp:{{{email}}}", otp, timeout=timeout)
+            if otp_try_count:
+                cache.set(f"otp_try_count:{{{email}}}", otp_try_count, timeout=timeout)
+    except Exception as e:
+        # Codes expire within minutes; losing them only means asking for a new one.
+        logger.warning(f"⚠️ Could not copy live OTPs to the cache: {str(e)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_live_otps_to_cache, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name="user",
+            name="users_user_otp_exp_ab77bf_idx",
+        ),
+        migrations.RemoveField(
+            model_name="user",
+            name="otp",
+        ),
+        migrations.RemoveField(
+            model_name="user",
+            name="otp_expiry",
+        ),
+        migrations.RemoveField(
+            model_name="user",
+            name="otp_try_count",
+        ),
+    ]
@@ -1,4 +1,3 @@
-import random
 import uuid
 
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin
@@ -8,6 +7,8 @@ from django.utils.translation import gettext_lazy as _
 from django_countries.fields import CountryField
 from phonenumber_field.modelfields import PhoneNumber, PhoneNumberField
 
+from apps.common.cache import otp_cache
+
 from .managers import CustomUserManager
 
 
@@ -35,11 +36,8 @@ class User(AbstractBaseUser, PermissionsMixin):
     failed_login_attempts = models.IntegerField(default=0)
     is_locked = models.BooleanField(default=False, db_index=True)
     
-    # OTP fields
-    otp = models.CharField(max_length=6, blank=True, null=True)
-    otp_expiry = models.DateTimeField(blank=True, null=True)
+    # OTP codes and attempt counters live in the cache (see OTPService), not on this row.
     max_otp_try = models.IntegerField(default=3)
-    otp_try_count = models.IntegerField(default=0)
     is_verified = models.BooleanField(default=False, db_index=True)
 
     USERNAME_FIELD = "email"
@@ -58,7 +56,6 @@ class User(AbstractBaseUser, PermissionsMixin):
             models.Index(fields=['is_locked', 'failed_login_attempts']),
             models.Index(fields=['first_name', 'last_name']),
             models.Index(fields=['is_verified', 'is_active']),
-            models.Index(fields=['otp_expiry']),
         ]
 
     def __str__(self):
@@ -72,30 +69,36 @@ class User(AbstractBaseUser, PermissionsMixin):
         return self.username
 
     def generate_otp(self):
-        self.otp = str(random.randint(100000, 999999))
-        self.otp_expiry = timezone.now() + timezone.timedelta(minutes=5)
-        self.otp_try_count = 0
-        self.save(update_fields=['otp', 'otp_expiry', 'otp_try_count'])
-        return self.otp
+        """Issue a fresh OTP in the same expiring cache store OTPService uses."""
+        from .services import OTPService
+
+        otp = OTPService.generate_otp()
+        OTPService.store_otp(self.email, otp)
+        otp_cache.delete(OTPService.key('otp_try_count', self.email))
+        return otp
 
     def verify_otp(self, otp):
-        if not self.otp or not self.otp_expiry:
-            return False
-        
-        if timezone.now() > self.otp_expiry:
-            return False
-        
-        if self.otp_try_count >= self.max_otp_try:
+        """Check ``otp`` against the cached code; it is invalidated after ``max_otp_try`` misses."""
+        from .services import OTPService
+
+        otp_key = OTPService.key('otp', self.email)
+        try_count_key = OTPService.key('otp_try_count', self.email)
+        stored_otp = otp_cache.get(otp_key)
+        if not stored_otp:
             return False
-        
-        if self.otp == otp:
-            self.is_verified = True
-            self.otp = None
-            self.otp_expiry = None
-            self.otp_try_count = 0
-            self.save(update_fields=['is_verified', 'otp', 'otp_expiry', 'otp_try_count'])
+
+        if stored_otp == otp:
+            otp_cache.delete_many([otp_key, try_count_key])
+            if not self.is_verified:
+                type(self).objects.filter(pk=self.pk).update(is_verified=True)
+                self.is_verified = True
             return True
-        else:
-            self.otp_try_count += 1
-            self.save(update_fields=['otp_try_count'])
-            return False
+
+        otp_cache.add(try_count_key, 0, timeout=OTPService.OTP_TTL)
+        try:
+            try_count = otp_cache.incr(try_count_key)
+        except ValueError:
+            try_count = 1
+        if try_count >= self.max_otp_try:
+            otp_cache.delete_many([otp_key, try_count_key])
+        return False
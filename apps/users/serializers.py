@@ -13,6 +13,16 @@ class OTPRequestSerializer(serializers.Serializer):
     email = serializers.EmailField(required=True)
 
 
+class OTPBulkRequestSerializer(serializers.Serializer):
+    # Addresses are validated one by one by the service so a bad entry is
+    # reported in the results instead of rejecting the whole batch.
+    emails = serializers.ListField(
+        child=serializers.CharField(max_length=254),
+        allow_empty=False,
+        max_length=10000,
+    )
+
+
 class OTPVerifySerializer(serializers.Serializer):
     email = serializers.EmailField(required=True)
     otp = serializers.CharField(required=True, min_length=6, max_length=6)
@@ -2,11 +2,16 @@ import logging
 import random
 
 from django.contrib.auth import get_user_model
-from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
 from django.utils.timezone import now
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from .tasks import send_otp_email, write_audit_log
+from apps.common import heavy_hitters, metrics
+from apps.common.deferred import defer
+from apps.common.cache import otp_cache, pipeline
+
+from .tasks import send_otp_email, send_otp_emails, write_audit_log, write_audit_logs
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
@@ -20,6 +25,25 @@ class OTPService:
     IP_RATE_WINDOW = 3600  
     MAX_FAILED_ATTEMPTS = 5
     LOCKOUT_DURATION = 900  
+    BULK_CHUNK_SIZE = 500
+
+    @staticmethod
+    def key(kind, subject):
+        """
+        Cache key for one email's or IP's OTP state. The {subject} hash tag
+        keeps all of a subject's keys on the same Redis node or cluster slot.
+        Emails must already be normalized (see normalize_email).
+        """
+        return f"{kind}:{{{subject}}}"
+
+    @staticmethod
+    def normalize_email(email):
+        """
+        The one form of ``email`` used for its OTP keys and its account: as
+        stored by the user manager (domain lowercased). The local part stays
+        case-sensitive, like the unique email column.
+        """
+        return User.objects.normalize_email(email.strip())
 
     @staticmethod
     def generate_otp():
@@ -29,7 +53,7 @@ class OTPService:
     @staticmethod
     def get_ttl(key):
         """Calculate TTL for a cache key."""
-        timeout_at = cache.get(key + ':timeout')
+        timeout_at = otp_cache.get(key + ':timeout')
         if timeout_at:  
             return max(0, timeout_at - int(now().timestamp()))
         return None
@@ -37,16 +61,18 @@ class OTPService:
     @staticmethod
     def check_rate_limit(email, ip_address):
         """Check rate limits, return (is_limited, error_response_data)"""
-        email_key = f"otp_request_email:{email}"
-        ip_key = f"otp_request_ip:{ip_address}"
+        email_key = OTPService.key('otp_request_email', email)
+        ip_key = OTPService.key('otp_request_ip', ip_address)
         
-        email_count = cache.get(email_key, 0)
+        email_count = otp_cache.get(email_key, 0)
         if email_count >= OTPService.EMAIL_RATE_LIMIT:
+            metrics.OTP_REQUESTS.labels('rate_limited_email').inc()
             ttl = OTPService.get_ttl(email_key) or OTPService.EMAIL_RATE_WINDOW
             return True, {'error': 'Too many OTP requests. Please try again later.', 'retry_after': ttl}
         
-        ip_count = cache.get(ip_key, 0)
+        ip_count = otp_cache.get(ip_key, 0)
         if ip_count >= OTPService.IP_RATE_LIMIT:
+            metrics.OTP_REQUESTS.labels('rate_limited_ip').inc()
             ttl = OTPService.get_ttl(ip_key) or OTPService.IP_RATE_WINDOW
             return True, {'error': 'Too many OTP requests from this IP. Please try again later.', 'retry_after': ttl}
         
@@ -55,74 +81,141 @@ class OTPService:
     @staticmethod
     def increment_rate_limit(email, ip_address):
         """Increment rate limit counters atomically"""
-        email_key = f"otp_request_email:{email}"
-        ip_key = f"otp_request_ip:{ip_address}"
+        email_key = OTPService.key('otp_request_email', email)
+        ip_key = OTPService.key('otp_request_ip', ip_address)
 
-        if cache.get(email_key) is None:
-            cache.set(email_key, 1, timeout=OTPService.EMAIL_RATE_WINDOW)
-            cache.set(email_key + ':timeout', int(now().timestamp()) + OTPService.EMAIL_RATE_WINDOW)
+        if otp_cache.get(email_key) is None:
+            otp_cache.set(email_key, 1, timeout=OTPService.EMAIL_RATE_WINDOW)
+            otp_cache.set(email_key + ':timeout', int(now().timestamp()) + OTPService.EMAIL_RATE_WINDOW)
         else:
-            cache.incr(email_key)
+            otp_cache.incr(email_key)
 
-        if cache.get(ip_key) is None:
-            cache.set(ip_key, 1, timeout=OTPService.IP_RATE_WINDOW)
-            cache.set(ip_key + ':timeout', int(now().timestamp()) + OTPService.IP_RATE_WINDOW)
+        if otp_cache.get(ip_key) is None:
+            otp_cache.set(ip_key, 1, timeout=OTPService.IP_RATE_WINDOW)
+            otp_cache.set(ip_key + ':timeout', int(now().timestamp()) + OTPService.IP_RATE_WINDOW)
         else:
-            cache.incr(ip_key)
+            otp_cache.incr(ip_key)
 
     @staticmethod
     def store_otp(email, otp):
         """Store OTP in Redis"""
-        cache.set(f"otp:{email}", otp, timeout=OTPService.OTP_TTL)
+        otp_cache.set(OTPService.key('otp', email), otp, timeout=OTPService.OTP_TTL)
 
     @staticmethod
+    @metrics.timed(metrics.OTP_REQUEST_LATENCY)
     def request_otp(email, ip_address, user_agent):
         """Request OTP - main business logic"""
+        email = OTPService.normalize_email(email)
+        heavy_hitters.record(otp_request_ip=ip_address, otp_request_email=email)
         is_limited, error_data = OTPService.check_rate_limit(email, ip_address)
         if is_limited:
             logger.warning(f"⚠️ Rate limit exceeded for: {email}")
-            write_audit_log.delay('OTP_REQUESTED', email, ip_address, {
+            defer(write_audit_log, 'OTP_REQUESTED', email, ip_address, {
                 'user_agent': user_agent,
                 'details': {'rate_limited': True}
-            })
+            }, coalesce=True)
             return False, error_data
         
         otp = OTPService.generate_otp()
         OTPService.store_otp(email, otp)
         OTPService.increment_rate_limit(email, ip_address)
         
-        send_otp_email.delay(email, otp)
-        write_audit_log.delay('OTP_REQUESTED', email, ip_address, {
+        defer(send_otp_email, email, otp)
+        defer(write_audit_log, 'OTP_REQUESTED', email, ip_address, {
             'user_agent': user_agent,
             'details': {'otp_expiry_seconds': OTPService.OTP_TTL}
         })
         
+        metrics.OTP_REQUESTS.labels('sent').inc()
         logger.info(f"✅ OTP requested for: {email}")
         return True, {'message': 'OTP sent successfully', 'expires_in': OTPService.OTP_TTL}
 
+    @staticmethod
+    def request_otp_bulk(emails, ip_address, user_agent):
+        """
+        Issue OTPs to many addresses at once; returns a list of {email, status}.
+
+        The per-email rate limit is read with one get_many, OTPs and counters
+        are written in one cache pipeline, and emails and audit entries are
+        deferred as one task per chunk. The per-IP limit does not apply: every
+        invite comes from the same staff client.
+        """
+        # Invites are de-duplicated case-insensitively; unlike the single-user
+        # flow, addresses are fully lowercased here.
+        statuses = {}
+        for email in emails:
+            email = email.strip().lower()
+            try:
+                validate_email(email)
+            except ValidationError:
+                statuses[email] = 'invalid'
+            else:
+                statuses.setdefault(email, None)
+        valid = [email for email, status in statuses.items() if status is None]
+
+        counts = otp_cache.get_many([OTPService.key('otp_request_email', email) for email in valid])
+        issued, limited = {}, []
+        for email in valid:
+            if counts.get(OTPService.key('otp_request_email', email), 0) >= OTPService.EMAIL_RATE_LIMIT:
+                limited.append(email)
+                statuses[email] = 'rate_limited'
+            else:
+                issued[email] = OTPService.generate_otp()
+                statuses[email] = 'sent'
+
+        window_ends_at = int(now().timestamp()) + OTPService.EMAIL_RATE_WINDOW
+        with pipeline(otp_cache) as pipe:
+            for email, otp in issued.items():
+                email_key = OTPService.key('otp_request_email', email)
+                pipe.set(OTPService.key('otp', email), otp, timeout=OTPService.OTP_TTL)
+                pipe.add(email_key, 0, timeout=OTPService.EMAIL_RATE_WINDOW)
+                pipe.incr(email_key)
+                pipe.add(email_key + ':timeout', window_ends_at, timeout=OTPService.EMAIL_RATE_WINDOW)
+
+        audit_entries = [[email, {'otp_expiry_seconds': OTPService.OTP_TTL, 'bulk': True}] for email in issued]
+        audit_entries += [[email, {'rate_limited': True, 'bulk': True}] for email in limited]
+        pairs = [[email, otp] for email, otp in issued.items()]
+        chunk = OTPService.BULK_CHUNK_SIZE
+        for i in range(0, len(pairs), chunk):
+            defer(send_otp_emails, pairs[i:i + chunk])
+        for i in range(0, len(audit_entries), chunk):
+            defer(write_audit_logs, 'OTP_REQUESTED', audit_entries[i:i + chunk], ip_address, user_agent)
+
+        metrics.OTP_REQUESTS.labels('sent').inc(len(issued))
+        metrics.OTP_REQUESTS.labels('rate_limited_email').inc(len(limited))
+        logger.info(f"✅ Bulk OTP request: {len(issued)} sent, {len(limited)} rate limited, "
+                    f"{len(statuses) - len(valid)} invalid")
+        return [{'email': email, 'status': status} for email, status in statuses.items()]
+
     @staticmethod
     def check_lockout(email):
         """Check if account is locked, return (is_locked, error_response_data)"""
-        lockout_key = f"otp_lockout:{email}"
-        if cache.get(lockout_key):
+        lockout_key = OTPService.key('otp_lockout', email)
+        if otp_cache.get(lockout_key):
             ttl = OTPService.get_ttl(lockout_key) or OTPService.LOCKOUT_DURATION
             return True, {'error': 'Account temporarily locked due to too many failed attempts', 'unlock_eta': ttl}
         return False, None
 
     @staticmethod
+    @metrics.timed(metrics.OTP_VERIFY_LATENCY)
     def verify_otp(email, otp, ip_address, user_agent):
         """Verify OTP - main business logic"""
+        email = OTPService.normalize_email(email)
         is_locked, error_data = OTPService.check_lockout(email)
         if is_locked:
+            metrics.OTP_VERIFICATIONS.labels('locked').inc()
+            heavy_hitters.record(otp_failure_ip=ip_address, otp_failure_email=email)
             logger.warning(f"🔒 Account locked for: {email}")
-            write_audit_log.delay('OTP_LOCKED', email, ip_address, {
+            defer(write_audit_log, 'OTP_LOCKED', email, ip_address, {
                 'user_agent': user_agent,
                 'details': {'unlock_eta_seconds': error_data['unlock_eta']}
-            })
+            }, coalesce=True)
             return False, error_data, 423
         
-        stored_otp = cache.get(f"otp:{email}")
+        stored_otp = otp_cache.get(OTPService.key('otp', email))
         if not stored_otp:
+            metrics.OTP_VERIFICATIONS.labels('not_found').inc()
+            heavy_hitters.record(otp_failure_ip=ip_address, otp_failure_email=email)
             logger.warning(f"⚠️ No OTP found for: {email}")
             return False, {'error': 'OTP not found or expired. Please request a new one.'}, 400
         
@@ -133,16 +226,19 @@ class OTPService:
 
     @staticmethod
     def _handle_failed_attempt(email, ip_address, user_agent):
-        failed_key = f"otp_failed:{email}"
-        failed_count = cache.get(failed_key, 0) + 1
+        heavy_hitters.record(otp_failure_ip=ip_address, otp_failure_email=email)
+        failed_key = OTPService.key('otp_failed', email)
+        failed_count = otp_cache.get(failed_key, 0) + 1
 
         if failed_count >= OTPService.MAX_FAILED_ATTEMPTS:
-            cache.set(f"otp_lockout:{email}", True, timeout=OTPService.LOCKOUT_DURATION)
-            cache.delete(failed_key)
-            cache.delete(f"otp:{email}")
+            otp_cache.set(OTPService.key('otp_lockout', email), True, timeout=OTPService.LOCKOUT_DURATION)
+            otp_cache.delete(failed_key)
+            otp_cache.delete(OTPService.key('otp', email))
 
+            metrics.OTP_LOCKOUTS.inc()
+            metrics.OTP_VERIFICATIONS.labels('invalid').inc()
             logger.error(f"🔒 Account locked after {OTPService.MAX_FAILED_ATTEMPTS} failed attempts: {email}")
-            write_audit_log.delay('OTP_LOCKED', email, ip_address, {
+            defer(write_audit_log, 'OTP_LOCKED', email, ip_address, {
                 'user_agent': user_agent,
                 'details': {'reason': 'max_attempts_exceeded', 'unlock_eta_seconds': OTPService.LOCKOUT_DURATION}
             })
@@ -152,22 +248,23 @@ class OTPService:
             }, 423
 
         # Store the failed attempt count and set the timeout
-        if cache.get(failed_key) is None:
-            cache.set(failed_key, failed_count, timeout=OTPService.LOCKOUT_DURATION)
+        if otp_cache.get(failed_key) is None:
+            otp_cache.set(failed_key, failed_count, timeout=OTPService.LOCKOUT_DURATION)
         else:
             # Calculate the remaining TTL manually
-            timeout_at = cache.get(failed_key + ':timeout')
+            timeout_at = otp_cache.get(failed_key + ':timeout')
             if timeout_at:
                 remaining_ttl = max(0, timeout_at - int(now().timestamp()))
             else:
                 remaining_ttl = OTPService.LOCKOUT_DURATION
-            cache.set(failed_key, failed_count, timeout=remaining_ttl)
+            otp_cache.set(failed_key, failed_count, timeout=remaining_ttl)
 
+        metrics.OTP_VERIFICATIONS.labels('invalid').inc()
         logger.warning(f"❌ Invalid OTP attempt {failed_count}/{OTPService.MAX_FAILED_ATTEMPTS} for: {email}")
-        write_audit_log.delay('OTP_FAILED', email, ip_address, {
+        defer(write_audit_log, 'OTP_FAILED', email, ip_address, {
             'user_agent': user_agent,
             'details': {'attempt': failed_count, 'remaining': OTPService.MAX_FAILED_ATTEMPTS - failed_count}
-        })
+        }, coalesce=True)
         return False, {
             'error': 'Invalid OTP',
             'attempts_remaining': OTPService.MAX_FAILED_ATTEMPTS - failed_count
@@ -176,27 +273,19 @@ class OTPService:
     @staticmethod
     def _handle_successful_verification(email, ip_address, user_agent):
        
-        cache.delete(f"otp:{email}")
-        cache.delete(f"otp_failed:{email}")
+        otp_cache.delete(OTPService.key('otp', email))
+        otp_cache.delete(OTPService.key('otp_failed', email))
         
-        user, created = User.objects.get_or_create(
-            email=email,
-            defaults={
-                'username': email.split('@')[0],
-                'first_name': email.split('@')[0],
-                'last_name': 'User',
-                'is_verified': True
-            }
+        local_part = email.split('@')[0]
+        user, created = User.objects.upsert_verified(
+            email, username=local_part, first_name=local_part[:50], last_name='User'
         )
         
-        if not created:
-            user.is_verified = True
-            user.save(update_fields=['is_verified'])
-        
         refresh = RefreshToken.for_user(user)
         
+        metrics.OTP_VERIFICATIONS.labels('success').inc()
         logger.info(f"✅ OTP verified successfully for: {email}")
-        write_audit_log.delay('OTP_VERIFIED', email, ip_address, {
+        defer(write_audit_log, 'OTP_VERIFIED', email, ip_address, {
             'user_agent': user_agent,
             'details': {'user_created': created}
         })
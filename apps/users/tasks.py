@@ -3,23 +3,33 @@ import logging
 from celery import shared_task
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage, get_connection, send_mail
+
+from apps.audits import events
+from apps.common import metrics
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
 
-@shared_task(bind=True, max_retries=3)
-def send_otp_email(self, email, otp):
+OTP_EMAIL_SUBJECT = "Your OTP Code"
 
-    subject = "Your OTP Code"
-    message = f"""
+
+def otp_email_body(otp):
+    return f"""
         Your OTP code is: {otp}
 
         This code will expire in 5 minutes.
 
         If you didn't request this code, please ignore this email.
     """
+
+
+@shared_task(bind=True, max_retries=3)
+def send_otp_email(self, email, otp):
+
+    subject = OTP_EMAIL_SUBJECT
+    message = otp_email_body(otp)
     
     try:
         send_mail(
@@ -36,8 +46,34 @@ def send_otp_email(self, email, otp):
         raise self.retry(exc=e, countdown=60)
 
 
+@shared_task(bind=True, max_retries=3)
+def send_otp_emails(self, pairs):
+    """
+    Send a chunk of OTP emails over a single mail connection.
+
+    Messages go out one at a time on that connection, so when one fails only
+    it and the ones after it are retried: nobody gets a code twice.
+
+    Args:
+        pairs: list of [email, otp]
+    """
+    sent = 0
+    try:
+        with get_connection(fail_silently=False) as connection:
+            for email, otp in pairs:
+                message = EmailMessage(OTP_EMAIL_SUBJECT, otp_email_body(otp), settings.DEFAULT_FROM_EMAIL, [email])
+                connection.send_messages([message])
+                sent += 1
+        logger.info(f"✅ [CELERY TASK] {sent} OTP emails sent")
+        return f"{sent} OTP emails sent"
+    except Exception as e:
+        remaining = pairs[sent:]
+        logger.error(f"❌ [CELERY TASK] Failed to send {len(remaining)} of {len(pairs)} OTP emails: {str(e)}")
+        raise self.retry(exc=e, countdown=60, args=[remaining])
+
+
 @shared_task
-def write_audit_log(event, email, ip, meta):
+def write_audit_log(event, email, ip, meta, coalesce=False):
     """
     Asynchronously write audit log entry
     
@@ -46,26 +82,80 @@ def write_audit_log(event, email, ip, meta):
         email: User email
         ip: IP address
         meta: Additional metadata dict
+        coalesce: Merge into a recent identical event when AUDIT_COALESCE_SECONDS is set
     """
     from apps.audits.models import AuditLog
+    from apps.audits.services import AuditService
     
     try:
+        key = None
+        if coalesce and settings.AUDIT_COALESCE_SECONDS:
+            key = AuditService.coalesce_key(event, email, ip, meta.get('user_agent', ''))
+            if AuditService.coalesce(key, meta.get('details', {})):
+                metrics.AUDIT_LOG_WRITES.labels('coalesced').inc()
+                if events.enabled():
+                    # Re-publish the merged row so live clients see every repeat.
+                    events.publish(AuditService.coalesced(key))
+                logger.info(f"✅ [CELERY TASK] Audit log coalesced: {event} for {email}")
+                return f"Audit log coalesced for {email}"
+
         user = None
         try:
             user = User.objects.get(email=email)
         except User.DoesNotExist:
             pass
         
-        AuditLog.objects.create(
+        log = AuditLog.objects.create(
             user=user,
             email=email,
             action=event,
             ip_address=ip,
             user_agent=meta.get('user_agent', ''),
-            details=meta.get('details', {})
+            details=meta.get('details', {}),
+            coalesce_key=key,
         )
+        metrics.AUDIT_LOG_WRITES.labels('created').inc()
+        events.publish([log])
         logger.info(f"✅ [CELERY TASK] Audit log created: {event} for {email}")
         return f"Audit log created for {email}"
     except Exception as e:
         logger.error(f"❌ [CELERY TASK] Failed to create audit log for {email}: {str(e)}")
         raise
+
+
+@shared_task
+def write_audit_logs(event, entries, ip, user_agent):
+    """
+    Write many audit log entries for one event with a single lookup and insert
+
+    Args:
+        event: Action type
+        entries: list of [email, details]
+        ip: IP address
+        user_agent: User agent of the caller
+    """
+    from apps.audits.models import AuditLog
+
+    try:
+        users = {user.email: user for user in User.objects.filter(email__in=[email for email, _ in entries])}
+        logs = AuditLog.objects.bulk_create(
+            [
+                AuditLog(
+                    user=users.get(email),
+                    email=email,
+                    action=event,
+                    ip_address=ip,
+                    user_agent=user_agent,
+                    details=details,
+                )
+                for email, details in entries
+            ],
+            batch_size=1000,
+        )
+        metrics.AUDIT_LOG_WRITES.labels('created').inc(len(logs))
+        events.publish(logs)
+        logger.info(f"✅ [CELERY TASK] {len(logs)} audit logs created: {event}")
+        return f"{len(logs)} audit logs created"
+    except Exception as e:
+        logger.error(f"❌ [CELERY TASK] Failed to create {len(entries)} audit logs: {str(e)}")
+        raise
@@ -1,10 +1,11 @@
 from django.urls import path
 
-from apps.users.views import OTPRequestView, OTPVerifyView
+from apps.users.views import OTPBulkRequestView, OTPRequestView, OTPVerifyView
 
 app_name = 'otp'
 
 urlpatterns = [
     path('otp/request/', OTPRequestView.as_view(), name='otp-request'),
+    path('otp/request/bulk/', OTPBulkRequestView.as_view(), name='otp-request-bulk'),
     path('otp/verify/', OTPVerifyView.as_view(), name='otp-verify'),
 ]
@@ -1,17 +1,20 @@
+import hashlib
 import logging
+from urllib.parse import urlencode
 
 from django.conf import settings
-from django.core.cache import cache
 from django_filters.rest_framework import DjangoFilterBackend
+from djoser.conf import settings as djoser_settings
 from djoser.views import UserViewSet
 from rest_framework import permissions, status
 from rest_framework.filters import OrderingFilter, SearchFilter
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from apps.common import response_cache
 from apps.common.helpers import get_client_ip, get_user_agent
 from apps.users.paginations import UserPagination
-from apps.users.serializers import OTPRequestSerializer, OTPVerifySerializer
+from apps.users.serializers import OTPBulkRequestSerializer, OTPRequestSerializer, OTPVerifySerializer
 from apps.users.services import OTPService
 
 from drf_yasg.utils import swagger_auto_schema
@@ -24,6 +27,8 @@ class OTPRequestView(APIView):
 
     permission_classes = [permissions.AllowAny]
     serializer_class = OTPRequestSerializer
+    # Rate-limit reads and writes, OTP write, heavy-hitter counters.
+    cache_budget = 12
 
     @swagger_auto_schema(
         request_body=OTPRequestSerializer,
@@ -63,10 +68,55 @@ class OTPRequestView(APIView):
         return Response(response_data, status=status_code)
 
 
+class OTPBulkRequestView(APIView):
+
+    permission_classes = [permissions.IsAdminUser]
+    serializer_class = OTPBulkRequestSerializer
+
+    @swagger_auto_schema(
+        request_body=OTPBulkRequestSerializer,
+        operation_description="Send OTP invites to many email addresses at once (staff only).",
+        responses={
+            202: openapi.Response(
+                description="Per-email status report",
+                examples={
+                    "application/json": {
+                        "expires_in": 300,
+                        "summary": {"sent": 1, "rate_limited": 1, "invalid": 1},
+                        "results": [
+                            {"email": "ada@example.com", "status": "sent"},
+                            {"email": "bob@example.com", "status": "rate_limited"},
+                            {"email": "not-an-email", "status": "invalid"}
+                        ]
+                    }
+                },
+            ),
+        },
+    )
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        ip_address = get_client_ip(request)
+        user_agent = get_user_agent(request)
+
+        results = OTPService.request_otp_bulk(serializer.validated_data['emails'], ip_address, user_agent)
+        summary = {'sent': 0, 'rate_limited': 0, 'invalid': 0}
+        for result in results:
+            summary[result['status']] += 1
+
+        return Response(
+            {'expires_in': OTPService.OTP_TTL, 'summary': summary, 'results': results},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
 class OTPVerifyView(APIView):
 
     permission_classes = [permissions.AllowAny]
     serializer_class = OTPVerifySerializer
+    # Lockout and OTP reads, failure counter or cleanup, heavy-hitter counters.
+    cache_budget = 8
 
     @swagger_auto_schema(
         request_body=OTPVerifySerializer,
@@ -129,31 +179,43 @@ class CustomUsersViewSet(UserViewSet):
     ordering = ["-date_joined"]
     lookup_field = "id"
     lookup_url_kwarg = "id"
+    # Authenticated user + COUNT + page (list); user + row (detail).
+    query_budget = {"list": 3, "retrieve": 2}
+    # Cached response read; on a miss also the lock and the pipelined write.
+    cache_budget = {"list": 3, "retrieve": 3}
 
     def list(self, request, *args, **kwargs):
-        cache_key = f"user_list_{hash(str(request.query_params))}"
-        cached_response = cache.get(cache_key)
-        
-        if cached_response:
-            logger.info("Cache hit for users list")
-            return Response(cached_response)
-
-        response = super().list(request, *args, **kwargs)
-        cache.set(cache_key, response.data, timeout=settings.CACHE_TIMEOUT)
-        logger.info("Users list cached")
-        return response
-    
+        if not response_cache.cacheable(request):
+            return super().list(request, *args, **kwargs)
+        # Not hash(): it is salted per process, and the key must be shared by every worker.
+        query = urlencode(sorted(request.query_params.lists()), doseq=True)
+        parent_list = super().list
+        return response_cache.fetch(
+            request,
+            f"users:list:{self._list_scope(request)}:{hashlib.md5(query.encode()).hexdigest()}",
+            lambda: parent_list(request, *args, **kwargs).data,
+            timeout=settings.CACHE_TIMEOUT,
+            stale=settings.CACHE_STALE_SECONDS,
+        )
+
+    @staticmethod
+    def _list_scope(request):
+        """
+        Who the cached list is for. With djoser's HIDE_USERS, non-staff users
+        only see themselves, so each gets their own entry; staff share one.
+        """
+        if request.user.is_staff or not djoser_settings.HIDE_USERS:
+            return "all"
+        return request.user.pk
+
     def retrieve(self, request, *args, **kwargs):
         user = self.get_object()
-        cache_key = f"user_detail_{user.id}"
-        cached_response = cache.get(cache_key)
-        
-        if cached_response:
-            logger.info(f"Cache hit for user detail - User: {user.id}")
-            return Response(cached_response)
-
-        serializer = self.get_serializer(user)
-        cache.set(cache_key, serializer.data, timeout=settings.CACHE_TIMEOUT)
-        logger.info(f"User detail cached - User: {user.id}")
-        
-        return Response(serializer.data)
+        if not response_cache.cacheable(request):
+            return Response(self.get_serializer(user).data)
+        return response_cache.fetch(
+            request,
+            f"users:{self.action}:{user.id}",
+            lambda: self.get_serializer(user).data,
+            timeout=settings.CACHE_TIMEOUT,
+            stale=settings.CACHE_STALE_SECONDS,
+        )
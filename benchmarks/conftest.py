@@ -0,0 +1,61 @@
+"""
+Shared fixtures for the microbenchmark suite.
+
+Run with the benchmark settings so the cache is a real RedisCache backed by
+fakeredis:
+
+    pytest benchmarks/ --ds=tses_be.settings.benchmark --benchmark-only
+"""
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.common import stats
+from tests.conftest import admin_user, api_client  # noqa: F401
+from tests.factories import UserFactory
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def users():
+    return UserFactory.create_batch(100)
+
+
+@pytest.fixture
+def measure(benchmark):
+    """
+    Benchmark ``func`` and record its query and cache-call counts.
+
+    Counts are taken from one extra, untimed call and stored in the benchmark's
+    ``extra_info`` (and therefore in saved baselines). ``max_queries`` and
+    ``max_cache_calls`` act as budgets: exceeding them fails the benchmark.
+    """
+    def run(func, *, setup=None, rounds=200, max_queries=None, max_cache_calls=None):
+        args = setup() if setup else ()
+        token = stats.start()
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                func(*args)
+            cache_calls = stats.current().cache_calls
+        finally:
+            stats.finish(token)
+
+        benchmark.extra_info["queries"] = len(queries)
+        benchmark.extra_info["cache_calls"] = cache_calls
+        if max_queries is not None:
+            assert len(queries) <= max_queries, f"{len(queries)} queries, budget {max_queries}"
+        if max_cache_calls is not None:
+            assert cache_calls <= max_cache_calls, f"{cache_calls} cache calls, budget {max_cache_calls}"
+
+        if setup:
+            return benchmark.pedantic(func, setup=lambda: (setup(), {}), rounds=rounds)
+        return benchmark(func)
+
+    return run
@@ -0,0 +1,67 @@
+import itertools
+from unittest.mock import patch
+
+import pytest
+
+from apps.users.services import OTPService
+from tests.factories import UserFactory
+
+_seq = itertools.count()
+
+
+def fresh_identity():
+    n = next(_seq)
+    return f"bench{n}@example.com", f"10.{n // 65536 % 256}.{n // 256 % 256}.{n % 256}"
+
+
+@pytest.fixture(autouse=True)
+def no_broker():
+    with patch('apps.users.services.send_otp_email.delay'), \
+         patch('apps.users.services.write_audit_log.delay'):
+        yield
+
+
+# Budgets include heavy-hitter tracking: one round trip per request or failed
+# verification, plus one more while a new subject enters its top-K set.
+@pytest.mark.django_db
+class TestOTPServiceBenchmarks:
+    def test_request_otp(self, measure):
+        measure(
+            lambda email, ip: OTPService.request_otp(email, ip, 'bench'),
+            setup=fresh_identity,
+            max_queries=0,
+            max_cache_calls=12,
+        )
+
+    def test_request_otp_rate_limited(self, measure):
+        email, ip = 'limited@example.com', '10.0.0.1'
+        for _ in range(OTPService.EMAIL_RATE_LIMIT):
+            OTPService.increment_rate_limit(email, ip)
+        measure(lambda: OTPService.request_otp(email, ip, 'bench'), max_queries=0, max_cache_calls=4)
+
+    def test_verify_otp_existing_user(self, measure):
+        user = UserFactory(email='verify@example.com')
+
+        def setup():
+            OTPService.store_otp(user.email, '123456')
+            return (user.email,)
+
+        measure(
+            lambda email: OTPService.verify_otp(email, '123456', '10.0.0.1', 'bench'),
+            setup=setup,
+            max_queries=3,
+            max_cache_calls=5,
+        )
+
+    def test_verify_otp_wrong_code(self, measure):
+        def setup():
+            email, _ = fresh_identity()
+            OTPService.store_otp(email, '123456')
+            return (email,)
+
+        measure(
+            lambda email: OTPService.verify_otp(email, '000000', '10.0.0.1', 'bench'),
+            setup=setup,
+            max_queries=0,
+            max_cache_calls=8,
+        )
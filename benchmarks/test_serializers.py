@@ -0,0 +1,32 @@
+import pytest
+
+from apps.audits.models import AuditLog
+from apps.audits.serializers import AuditLogSerializer
+from apps.common.renderers import ORJSONRenderer
+from apps.users.models import User
+from apps.users.serializers import UserSerializer
+
+
+@pytest.mark.django_db
+class TestSerializerBenchmarks:
+    def test_user_serializer_100_rows(self, measure, users):
+        rows = list(User.objects.all())
+        measure(lambda: UserSerializer(rows, many=True).data, max_queries=0)
+
+    def test_audit_log_serializer_100_rows(self, measure):
+        AuditLog.objects.bulk_create(
+            AuditLog(
+                email=f"user{n}@example.com",
+                action='OTP_FAILED',
+                ip_address='10.0.0.1',
+                user_agent='bench',
+                details={'attempt': 1, 'remaining': 4},
+            )
+            for n in range(100)
+        )
+        rows = list(AuditLog.objects.all())
+        measure(lambda: AuditLogSerializer(rows, many=True).data, max_queries=0)
+
+    def test_render_user_page_100_rows(self, measure, users):
+        data = UserSerializer(list(User.objects.all()), many=True).data
+        measure(lambda: ORJSONRenderer().render(data), max_queries=0)
@@ -0,0 +1,55 @@
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+
+from apps.audits.models import AuditLog
+from apps.common import ip_policy
+
+
+def flush_cache():
+    cache.clear()
+    return ()
+
+
+@pytest.fixture(autouse=True)
+def warm_ip_policy(db):
+    """Compile the IP policy first, as a warm worker has, so its one-off query stays out of the budgets."""
+    ip_policy.invalidate()
+    ip_policy.get_policy()
+
+
+@pytest.mark.django_db
+class TestViewBenchmarks:
+    def test_otp_request_view(self, measure, api_client):
+        url = reverse('usersotp:otp-request')
+
+        with patch('apps.users.services.send_otp_email.delay'), \
+             patch('apps.users.services.write_audit_log.delay'):
+            measure(
+                lambda: api_client.post(url, {'email': 'view@example.com'}, format='json'),
+                setup=flush_cache,
+                max_queries=0,
+                max_cache_calls=10,
+            )
+
+    def test_user_list_view_cold(self, measure, api_client, admin_user, users):
+        api_client.force_authenticate(user=admin_user)
+        url = reverse('usersapi:users-list')
+        measure(lambda: api_client.get(url), setup=flush_cache, max_queries=3)
+
+    def test_user_list_view_cached(self, measure, api_client, admin_user, users):
+        api_client.force_authenticate(user=admin_user)
+        url = reverse('usersapi:users-list')
+        api_client.get(url)
+        measure(lambda: api_client.get(url), max_queries=1, max_cache_calls=1)
+
+    def test_audit_log_list_view(self, measure, api_client, admin_user):
+        AuditLog.objects.bulk_create(
+            AuditLog(email=f"user{n}@example.com", action='OTP_REQUESTED', ip_address='10.0.0.1')
+            for n in range(100)
+        )
+        api_client.force_authenticate(user=admin_user)
+        url = reverse('tsess:audit-logs')
+        measure(lambda: api_client.get(url, {'page_size': 100}), max_queries=2)
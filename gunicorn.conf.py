@@ -0,0 +1,68 @@
+"""
+Production gunicorn config.
+
+    gunicorn -c gunicorn.conf.py tses_be.wsgi
+
+The ASGI server for the audit stream uses the same file with Uvicorn
+workers (see docker/production/django/start-asgi):
+
+    GUNICORN_WORKER_CLASS=uvicorn_worker.UvicornWorker gunicorn -c gunicorn.conf.py tses_be.asgi:application
+
+The app is preloaded in the master, which also runs the fork-safe part of
+the warm-up (imports, URL resolvers, OpenAPI schema) so
+workers inherit it copy-on-write. Each worker then opens its own DB and
+Redis connections in post_worker_init, before it starts accepting requests,
+and only after that does /health/ready return 200.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+
+# Sync/gthread workers: (2 x cores) + 1 is the usual starting point for an
+# I/O-bound Django app; set WEB_CONCURRENCY to override per deployment.
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", 2))
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+
+preload_app = True
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+
+# Recycle workers periodically to bound memory growth; jitter avoids
+# restarting them all at once.
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 5000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 500))
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.environ.get("GUNICORN_LOG_LEVEL", "info")
+
+
+def when_ready(server):
+    from apps.common import warmup
+
+    warmup.warm_up(code=True, connections=False)
+
+
+def post_fork(server, worker):
+    # Never share sockets opened in the master (none should be, but the
+    # warm-up or a preload-time import could have touched the DB).
+    from django.db import connections
+
+    for conn in connections.all():
+        conn.close()
+
+
+def post_worker_init(worker):
+    from apps.common import warmup
+
+    warmup.warm_up(code=False, connections=True)
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
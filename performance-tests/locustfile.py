@@ -0,0 +1,251 @@
+"""
+Load scenarios for the TSES OTP flow.
+
+User classes (all run together, weighted, for mixed traffic; pick a subset by
+passing class names on the command line):
+
+- LoginBurstUser:  request -> verify login bursts from many distinct clients
+- BruteForceUser:  attacker hammering wrong OTPs until the account locks
+- BrowsingUser:    authenticated staff paging users and audit logs; they share
+                   one token (ACCESS_TOKEN, or a single ADMIN_EMAIL login at
+                   test start, which stays within the per-email OTP limit)
+
+The OTP sent by the server is read back either from Redis (OTP_SOURCE=redis,
+default; works with any email backend) or from the MailHog API
+(OTP_SOURCE=mailhog). OTP_SOURCE=redis reads a single node; when OTP state is
+sharded over OTP_REDIS_URLS use mailhog. SLOs are read from slo.json; the run exits non-zero
+when any endpoint misses its latency percentiles or error-rate budget.
+
+    locust -f performance-tests/locustfile.py --headless -u 50 -r 10 -t 2m \\
+        --host http://localhost:8080 --csv performance-tests/reports/run
+"""
+import itertools
+import json
+import logging
+import math
+import os
+import pickle
+import random
+import re
+import uuid
+from pathlib import Path
+
+import requests
+from locust import HttpUser, between, events, task
+from locust.runners import MasterRunner
+
+logger = logging.getLogger(__name__)
+
+OTP_SOURCE = os.environ.get("OTP_SOURCE", "redis")
+REDIS_URL = os.environ.get("OTP_REDIS_URL", "redis://localhost:6379/0")
+CACHE_KEY_PREFIX = os.environ.get("CACHE_KEY_PREFIX", "tses_be")
+MAILHOG_URL = os.environ.get("MAILHOG_URL", "http://localhost:8025")
+ADMIN_EMAIL = os.environ.get("ADMIN_EMAIL", "admin@example.com")
+ACCESS_TOKEN = os.environ.get("ACCESS_TOKEN", "")
+SLO_FILE = Path(os.environ.get("SLO_FILE", Path(__file__).with_name("slo.json")))
+
+OTP_REQUEST = "/api/v1/auth/otp/request/"
+OTP_VERIFY = "/api/v1/auth/otp/verify/"
+USERS = "/api/v1/auth/users/"
+AUDIT_LOGS = "/api/v1/audit/logs/"
+USERS_PAGE_SIZE = 10
+
+# Access token shared by every BrowsingUser in this process; see authenticate_browsing_users.
+_browsing_token = ACCESS_TOKEN
+
+_client_seq = itertools.count(1)
+
+
+def fake_client_ip():
+    """Unique X-Forwarded-For per simulated client so per-IP limits behave as in production."""
+    n = next(_client_seq)
+    return f"10.{(n >> 16) & 255}.{(n >> 8) & 255}.{n & 255}"
+
+
+class OTPReader:
+    """Fetch the OTP the server just issued, without going through a real inbox."""
+
+    _redis = None
+
+    @classmethod
+    def read(cls, email):
+        if OTP_SOURCE == "mailhog":
+            return cls._from_mailhog(email)
+        return cls._from_redis(email)
+
+    @classmethod
+    def _from_redis(cls, email):
+        if cls._redis is None:
+            import redis
+
+            cls._redis = redis.Redis.from_url(REDIS_URL)
+        # Django's RedisCache stores "<prefix>:<version>:<key>", pickling non-int values;
+        # OTP keys carry the email as a "{...}" hash tag.
+        raw = cls._redis.get(f"{CACHE_KEY_PREFIX}:1:otp:{{{email}}}")
+        return pickle.loads(raw) if raw else None
+
+    @staticmethod
+    def _from_mailhog(email):
+        response = requests.get(
+            f"{MAILHOG_URL}/api/v2/search", params={"kind": "to", "query": email, "limit": 1}, timeout=5
+        )
+        items = response.json().get("items", [])
+        if not items:
+            return None
+        match = re.search(r"\b(\d{6})\b", items[0]["Content"]["Body"])
+        return match.group(1) if match else None
+
+
+class OTPClientMixin:
+    def on_start(self):
+        self.ip = fake_client_ip()
+
+    def post_json(self, path, payload, expected, name=None):
+        with self.client.post(
+            path,
+            json=payload,
+            headers={"X-Forwarded-For": self.ip},
+            name=name or path,
+            catch_response=True,
+        ) as response:
+            if response.status_code in expected:
+                response.success()
+            else:
+                response.failure(f"unexpected {response.status_code}: {response.text[:200]}")
+            return response
+
+    def login(self, email):
+        """Run request -> verify; returns the verify response or None."""
+        response = self.post_json(OTP_REQUEST, {"email": email}, expected=(202, 429))
+        if response.status_code != 202:
+            return None
+        otp = OTPReader.read(email)
+        if otp is None:
+            logger.warning(f"No OTP readable for {email} via {OTP_SOURCE}")
+            return None
+        return self.post_json(OTP_VERIFY, {"email": email, "otp": otp}, expected=(200,))
+
+
+class LoginBurstUser(OTPClientMixin, HttpUser):
+    weight = 5
+    wait_time = between(0.5, 2)
+
+    @task
+    def login_burst(self):
+        self.ip = fake_client_ip()
+        self.login(f"load-{uuid.uuid4().hex[:12]}@example.com")
+
+
+class BruteForceUser(OTPClientMixin, HttpUser):
+    weight = 1
+    wait_time = between(0.05, 0.2)
+
+    def on_start(self):
+        super().on_start()
+        self.target = f"victim-{uuid.uuid4().hex[:12]}@example.com"
+        self.post_json(OTP_REQUEST, {"email": self.target}, expected=(202, 429))
+
+    @task
+    def guess(self):
+        # 400 (wrong/expired) and 423 (locked) are the correct answers to an attacker.
+        otp = f"{random.randint(0, 999999):06d}"
+        self.post_json(
+            OTP_VERIFY, {"email": self.target, "otp": otp}, expected=(400, 423), name=f"{OTP_VERIFY} [attack]"
+        )
+
+
+class BrowsingUser(OTPClientMixin, HttpUser):
+    weight = 3
+    wait_time = between(1, 3)
+
+    def on_start(self):
+        super().on_start()
+        self.client.headers["Authorization"] = f"Bearer {_browsing_token}"
+        self.user_pages = 1
+
+    @task(3)
+    def list_users(self):
+        # Only ask for pages that exist; the user count only grows during a run.
+        response = self.client.get(USERS, params={"page": random.randint(1, self.user_pages)}, name=USERS)
+        if response.status_code == 200:
+            self.user_pages = max(1, math.ceil(response.json()["count"] / USERS_PAGE_SIZE))
+
+    @task(2)
+    def list_audit_logs(self):
+        self.client.get(AUDIT_LOGS, params={"page_size": 100}, name=AUDIT_LOGS)
+
+    @task(1)
+    def filter_audit_logs(self):
+        event = random.choice(["OTP_REQUESTED", "OTP_VERIFIED", "OTP_FAILED", "OTP_LOCKED"])
+        self.client.get(AUDIT_LOGS, params={"event": event}, name=f"{AUDIT_LOGS} [filtered]")
+
+
+@events.test_start.add_listener
+def authenticate_browsing_users(environment, **kwargs):
+    """
+    Log in as ADMIN_EMAIL once per load-generating process, unless ACCESS_TOKEN
+    is set. Logging in per BrowsingUser would trip the per-email OTP rate limit
+    and the concurrent requests would overwrite each other's stored code.
+    """
+    global _browsing_token
+    if _browsing_token or isinstance(environment.runner, MasterRunner):
+        return
+    headers = {"X-Forwarded-For": fake_client_ip()}
+    response = requests.post(
+        f"{environment.host}{OTP_REQUEST}", json={"email": ADMIN_EMAIL}, headers=headers, timeout=10
+    )
+    otp = OTPReader.read(ADMIN_EMAIL) if response.status_code == 202 else None
+    if otp is not None:
+        response = requests.post(
+            f"{environment.host}{OTP_VERIFY}", json={"email": ADMIN_EMAIL, "otp": otp}, headers=headers, timeout=10
+        )
+        if response.status_code == 200:
+            _browsing_token = response.json()["access"]
+            return
+    logger.error(f"BrowsingUser could not authenticate ({response.status_code}); set ACCESS_TOKEN or OTP_SOURCE")
+
+
+def load_slos():
+    with open(SLO_FILE) as fh:
+        return json.load(fh)
+
+
+def check_slos(stats, slos):
+    """Return a list of human-readable SLO violations for the finished run."""
+    default = slos.get("default", {})
+    violations = []
+    for entry in stats.entries.values():
+        if not entry.num_requests:
+            continue
+        name = f"{entry.method} {entry.name}"
+        slo = {**default, **slos.get("endpoints", {}).get(name, {})}
+        for pct in ("p50", "p95", "p99"):
+            limit = slo.get(f"{pct}_ms")
+            actual = entry.get_response_time_percentile(int(pct[1:]) / 100)
+            if limit is not None and actual > limit:
+                violations.append(f"{name}: {pct} {actual:.0f}ms > {limit}ms")
+        max_error_rate = slo.get("error_rate")
+        if max_error_rate is not None and entry.fail_ratio > max_error_rate:
+            violations.append(f"{name}: error rate {entry.fail_ratio:.2%} > {max_error_rate:.2%}")
+    return violations
+
+
+@events.quitting.add_listener
+def enforce_slos(environment, **kwargs):
+    stats = environment.stats
+    print(f"\n{'Endpoint':<55} {'reqs':>7} {'err%':>6} {'p50':>6} {'p95':>6} {'p99':>6}")
+    for entry in sorted(stats.entries.values(), key=lambda e: (e.name, e.method)):
+        print(
+            f"{entry.method + ' ' + entry.name:<55} {entry.num_requests:>7} {entry.fail_ratio:>6.1%} "
+            f"{entry.get_response_time_percentile(0.5):>6.0f} {entry.get_response_time_percentile(0.95):>6.0f} "
+            f"{entry.get_response_time_percentile(0.99):>6.0f}"
+        )
+
+    violations = check_slos(stats, load_slos())
+    if violations:
+        print("\n❌ SLO violations:")
+        for violation in violations:
+            print(f"  - {violation}")
+        environment.process_exit_code = 1
+    else:
+        print("\n✅ All SLOs met")
@@ -10,6 +10,17 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tses_be.settings.test')
 User = get_user_model()
 
 
+def pytest_collection_modifyitems(config, items):
+    from django.db import connection
+
+    if connection.vendor == 'postgresql':
+        return
+    skip = pytest.mark.skip(reason='needs PostgreSQL')
+    for item in items:
+        if 'postgres' in item.keywords:
+            item.add_marker(skip)
+
+
 @pytest.fixture
 def api_client():
     return APIClient()
@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.audits.models import AuditLog
+from apps.audits.services import AuditService
+from apps.users.tasks import write_audit_log
+
+
+def rejected(email='target@example.com', ip='203.0.113.7', attempt=1, coalesce=True):
+    write_audit_log.delay(
+        'OTP_FAILED', email, ip, {'user_agent': 'curl/8.0', 'details': {'attempt': attempt}}, coalesce=coalesce
+    )
+
+
+@pytest.fixture
+def coalescing(settings):
+    settings.AUDIT_COALESCE_SECONDS = 300
+
+
+@pytest.mark.django_db
+class TestAuditCoalescing:
+    def test_repeats_merge_into_one_counted_row(self, coalescing):
+        for attempt in range(1, 6):
+            rejected(attempt=attempt)
+
+        log = AuditLog.objects.get()
+        assert log.count == 5
+        assert log.first_seen <= log.last_seen
+        assert log.details == {'attempt': 5}
+
+    def test_identity_includes_email_ip_and_user_agent(self, coalescing):
+        rejected()
+        rejected(ip='198.51.100.1')
+        rejected(email='other@example.com')
+        write_audit_log.delay(
+            'OTP_FAILED', 'target@example.com', '203.0.113.7', {'user_agent': 'python'}, coalesce=True
+        )
+        rejected()
+
+        assert sorted(AuditLog.objects.values_list('count', flat=True)) == [1, 1, 1, 2]
+
+    def test_state_changes_are_written_individually(self, coalescing):
+        rejected()
+        for _ in range(2):
+            write_audit_log.delay('OTP_FAILED', 'target@example.com', '203.0.113.7', {'user_agent': 'curl/8.0'})
+        assert AuditLog.objects.count() == 3
+        assert AuditLog.objects.filter(count=1).count() == 3
+
+    def test_racing_first_occurrences_are_not_double_counted(self, coalescing):
+        key = AuditService.coalesce_key('OTP_FAILED', 'target@example.com', '203.0.113.7', 'curl/8.0')
+        for _ in range(2):
+            AuditLog.objects.create(
+                email='target@example.com', action='OTP_FAILED', ip_address='203.0.113.7',
+                user_agent='curl/8.0', coalesce_key=key,
+            )
+        for _ in range(3):
+            rejected()
+
+        assert AuditLog.objects.count() == 2
+        assert sum(AuditLog.objects.values_list('count', flat=True)) == 5
+
+    def test_rows_from_before_coalescing_read_created_at(self, api_client, admin_user):
+        rejected(coalesce=False)
+        AuditLog.objects.update(first_seen=None, last_seen=None)
+        api_client.force_authenticate(user=admin_user)
+        entry = api_client.get(reverse('tsess:audit-logs')).json()['results'][0]
+        assert entry['first_seen'] == entry['last_seen'] == entry['created_at']
+
+    def test_window_expiry_starts_a_new_row(self, coalescing):
+        rejected()
+        AuditLog.objects.update(first_seen=timezone.now() - timedelta(seconds=301))
+        rejected()
+        assert AuditLog.objects.count() == 2
+
+    def test_disabled_by_default(self):
+        rejected()
+        rejected()
+        assert AuditLog.objects.count() == 2
+
+    def test_stats_count_merged_events(self, coalescing, api_client, admin_user):
+        for _ in range(4):
+            rejected()
+        api_client.force_authenticate(user=admin_user)
+        response = api_client.get(reverse('tsess:audit-stats'), {'hours': 1})
+        assert response.json()['by_action'] == {'OTP_FAILED': 4}
@@ -0,0 +1,105 @@
+import json
+from unittest.mock import patch
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import reverse
+
+from apps.audits import events
+from apps.users.tasks import write_audit_log, write_audit_logs
+
+fakeredis = pytest.importorskip('fakeredis')
+
+
+@pytest.fixture
+def stream(settings):
+    settings.AUDIT_STREAM_REDIS_URL = 'redis://audit-stream:6379/0'
+    settings.AUDIT_STREAM_HEARTBEAT_SECONDS = 0.05
+    server = fakeredis.FakeServer()
+    with patch.object(events, 'get_redis', return_value=fakeredis.FakeRedis(server=server)), \
+            patch.object(events, 'get_async_redis', side_effect=lambda: fakeredis.FakeAsyncRedis(server=server)):
+        yield server
+
+
+def read_events(client, count, query=None, **headers):
+    """Open the stream and collect ``count`` SSE messages (comments skipped)."""
+    async def run():
+        response = await client.get(reverse('tsess:audit-stream'), query, headers=headers)
+        if response.status_code != 200:
+            return response, []
+        messages = []
+        iterator = response.streaming_content.__aiter__()
+        while len(messages) < count:
+            chunk = (await iterator.__anext__()).decode()
+            if not chunk.startswith((':', 'retry:')):
+                messages.append(dict(line.split(': ', 1) for line in chunk.strip().splitlines()))
+        await iterator.aclose()
+        return response, messages
+
+    return async_to_sync(run)()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestAuditStream:
+    def test_requires_staff(self, stream, regular_user):
+        client = AsyncClient()
+        response, _ = read_events(client, 0)
+        assert response.status_code == 401
+
+        client.force_login(regular_user)
+        response, _ = read_events(client, 0)
+        assert response.status_code == 403
+
+    def test_resumes_after_last_event_id_with_filters(self, stream, admin_user):
+        write_audit_log('OTP_REQUESTED', 'ada@example.com', '10.0.0.1', {'user_agent': 'ua'})
+        failures = [['bob@example.com', {}], ['ada@example.com', {'attempt': 1}]]
+        write_audit_logs('OTP_FAILED', failures, '10.0.0.2', 'ua')
+        write_audit_log('OTP_LOCKED', 'ada@example.com', '10.0.0.2', {'user_agent': 'ua'})
+        client = AsyncClient()
+        client.force_login(admin_user)
+
+        response, messages = read_events(client, 3, last_event_id='0-0')
+        assert response['Content-Type'] == 'text/event-stream'
+        assert [json.loads(m['data'])['event'] for m in messages] == ['OTP_REQUESTED', 'OTP_FAILED', 'OTP_FAILED']
+
+        _, resumed = read_events(
+            client, 1, {'email': 'ada@example.com', 'ip': '10.0.0.2'}, last_event_id=messages[0]['id']
+        )
+        payload = json.loads(resumed[0]['data'])
+        assert resumed[0]['event'] == 'audit'
+        assert payload['email'] == 'ada@example.com'
+        assert (payload['event'], payload['details']) == ('OTP_FAILED', {'attempt': 1})
+
+    def test_publishes_coalesced_repeats(self, stream, admin_user, settings):
+        settings.AUDIT_COALESCE_SECONDS = 300
+        for attempt in range(1, 3):
+            write_audit_log(
+                'OTP_FAILED', 'ada@example.com', '10.0.0.2', {'user_agent': 'ua', 'details': {'attempt': attempt}},
+                coalesce=True,
+            )
+        client = AsyncClient()
+        client.force_login(admin_user)
+
+        _, messages = read_events(client, 2, last_event_id='0-0')
+        first, repeat = [json.loads(m['data']) for m in messages]
+        assert repeat['id'] == first['id']
+        assert (first['count'], repeat['count']) == (1, 2)
+        assert repeat['details'] == {'attempt': 2}
+
+    def test_reports_gap_when_cursor_was_trimmed(self, stream, admin_user, settings):
+        settings.AUDIT_STREAM_MAXLEN = 2
+        redis = events.get_redis()
+        for i in range(5):
+            fields = {'action': 'OTP_FAILED', 'data': json.dumps({'n': i})}
+            redis.xadd(settings.AUDIT_STREAM_KEY, fields, maxlen=2, approximate=False)
+        client = AsyncClient()
+        client.force_login(admin_user)
+
+        _, messages = read_events(client, 2, last_event_id='1-0')
+        assert messages[0]['event'] == 'gap'
+        assert json.loads(messages[1]['data']) == {'n': 3}
+
+    def test_not_served_under_wsgi(self, stream, admin_user, client):
+        client.force_login(admin_user)
+        assert client.get(reverse('tsess:audit-stream')).status_code == 501
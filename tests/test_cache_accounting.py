@@ -0,0 +1,69 @@
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.common import stats
+from apps.common.middleware import CacheBudgetExceeded
+from apps.users.tasks import write_audit_log
+from apps.users.views import CustomUsersViewSet
+
+fakeredis = pytest.importorskip('fakeredis')
+
+
+@pytest.fixture
+def redis_cache(settings):
+    backend = {
+        'BACKEND': 'apps.common.cache.InstrumentedRedisCache',
+        'LOCATION': 'redis://cache-accounting:6379/0',
+        'OPTIONS': {'connection_class': fakeredis.FakeConnection},
+    }
+    settings.CACHES = {'default': backend, 'otp': backend}
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def bearer(user):
+    return {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+
+def test_counts_round_trips_and_value_bytes(redis_cache):
+    token = stats.start()
+    try:
+        cache.set('greeting', 'x' * 100)
+        assert cache.get('greeting') == 'x' * 100
+        cache.get_many(['greeting', 'missing'])
+        request_stats = stats.current()
+    finally:
+        stats.finish(token)
+
+    assert request_stats.cache_calls == 3
+    assert request_stats.cache_bytes_sent > 100
+    assert request_stats.cache_bytes_received > 200
+
+
+@pytest.mark.django_db
+class TestCacheAccounting:
+    def test_server_timing_reports_cache_calls(self, redis_cache, api_client, admin_user):
+        url = reverse('usersapi:users-list')
+        miss = api_client.get(url, **bearer(admin_user))
+        hit = api_client.get(url, **bearer(admin_user))
+
+        assert 'desc="3 calls, ' in miss['Server-Timing']
+        assert 'desc="1 calls, ' in hit['Server-Timing']
+
+    def test_exceeding_the_cache_budget_fails(self, redis_cache, api_client, admin_user):
+        api_client.force_authenticate(user=admin_user)
+        with patch.object(CustomUsersViewSet, 'cache_budget', {'list': 1}):
+            with pytest.raises(CacheBudgetExceeded, match='made 3 cache round trips, budget 1'):
+                api_client.get(reverse('usersapi:users-list'))
+
+    def test_tasks_are_accounted_separately(self, redis_cache):
+        name = write_audit_log.name
+        before = REGISTRY.get_sample_value('tses_celery_task_cache_calls_count', {'task': name}) or 0
+        write_audit_log.delay('OTP_REQUESTED', 'a@example.com', '127.0.0.1', {})
+        assert REGISTRY.get_sample_value('tses_celery_task_cache_calls_count', {'task': name}) == before + 1
@@ -0,0 +1,102 @@
+from unittest.mock import patch
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core import mail
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory
+from django.urls import reverse
+from kombu.exceptions import OperationalError
+from rest_framework import status
+
+from apps.audits.models import AuditLog
+from apps.common import deferred
+from apps.common.cache import otp_cache
+from apps.common.middleware import DeferredTasksMiddleware
+from apps.common.tasks import run_deferred
+from apps.users.tasks import send_otp_email, write_audit_log
+
+CALL = ('OTP_REQUESTED', 'a@example.com', '127.0.0.1', {})
+
+
+# Deferred calls wait for transaction.on_commit, so these tests run outside
+# the per-test transaction, the way requests do.
+@pytest.mark.django_db(transaction=True)
+class TestDeferredTasks:
+    url = reverse('usersotp:otp-request')
+
+    @pytest.fixture(autouse=True)
+    def reset_rate_limits(self):
+        otp_cache.clear()
+
+    def test_request_publishes_once_after_the_response(self, api_client):
+        with patch.object(run_deferred, 'delay') as mock_batch:
+            response = api_client.post(self.url, {'email': 'a@example.com'})
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        mock_batch.assert_called_once()
+        (calls,), _ = mock_batch.call_args
+        names = [name for name, _, _ in calls]
+        assert names == ['apps.users.tasks.send_otp_email', 'apps.users.tasks.write_audit_log']
+
+    def test_single_call_is_published_as_itself(self):
+        def view(request):
+            deferred.defer(write_audit_log, *CALL)
+            return HttpResponse()
+
+        with patch.object(write_audit_log, 'delay') as mock_delay, patch.object(run_deferred, 'delay') as mock_batch:
+            response = DeferredTasksMiddleware(view)(RequestFactory().get('/'))
+            mock_delay.assert_not_called()
+            response.close()
+        mock_delay.assert_called_once_with(*CALL)
+        mock_batch.assert_not_called()
+
+    def test_publishes_under_asgi(self):
+        with patch.object(run_deferred, 'delay') as mock_batch:
+            response = async_to_sync(AsyncClient().post)(self.url, {'email': 'a@example.com'})
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        mock_batch.assert_called_once()
+
+    def test_batch_runs_each_task(self, api_client):
+        api_client.post(self.url, {'email': 'a@example.com'})
+
+        assert len(mail.outbox) == 1
+        assert AuditLog.objects.filter(email='a@example.com', action='OTP_REQUESTED').count() == 1
+
+    def test_batch_retries_a_failed_task_on_its_own(self):
+        with patch('apps.users.tasks.send_mail', side_effect=[OSError('smtp down'), 1]) as mock_send:
+            run_deferred.delay([
+                ['apps.users.tasks.send_otp_email', ['a@example.com', '123456'], {}],
+                ['apps.users.tasks.write_audit_log', list(CALL), {}],
+            ])
+
+        # The failed email was retried through its own task; the audit entry still ran once.
+        assert mock_send.call_count == 2
+        assert AuditLog.objects.filter(email='a@example.com').count() == 1
+
+    def test_runs_in_process_when_the_broker_is_down(self, api_client):
+        with patch.object(run_deferred, 'delay', side_effect=OperationalError('broker down')):
+            response = api_client.post(self.url, {'email': 'a@example.com'})
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert len(mail.outbox) == 1
+        assert AuditLog.objects.filter(email='a@example.com').count() == 1
+
+    def test_waits_for_commit_and_drops_rolled_back_calls(self):
+        with patch.object(write_audit_log, 'delay') as mock_delay, patch.object(send_otp_email, 'delay') as mock_email:
+            with transaction.atomic():
+                deferred.defer(write_audit_log, *CALL)
+                mock_delay.assert_not_called()
+            mock_delay.assert_called_once_with(*CALL)
+
+            with pytest.raises(RuntimeError), transaction.atomic():
+                deferred.defer(send_otp_email, 'a@example.com', '123456')
+                raise RuntimeError
+        mock_email.assert_not_called()
+
+    def test_publishes_immediately_outside_a_request(self):
+        with patch.object(write_audit_log, 'delay') as mock_delay:
+            deferred.defer(write_audit_log, *CALL)
+        mock_delay.assert_called_once_with(*CALL)
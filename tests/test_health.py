@@ -0,0 +1,35 @@
+from unittest.mock import patch
+
+import pytest
+from django.urls import reverse
+
+from apps.common import warmup
+
+
+@pytest.mark.django_db
+class TestHealth:
+    def test_liveness(self, client):
+        response = client.get(reverse('health-live'))
+        assert response.status_code == 200
+
+    def test_readiness_waits_for_backing_services(self, client, monkeypatch):
+        def unreachable():
+            raise ConnectionError('redis down')
+
+        monkeypatch.setattr(warmup, '_ready', False)
+        monkeypatch.setattr(warmup, 'warm_connections', unreachable)
+        assert client.get(reverse('health-ready')).status_code == 503
+        assert not warmup.is_ready()
+
+        monkeypatch.undo()
+        assert warmup.warm_up()
+        response = client.get(reverse('health-ready'))
+        assert response.status_code == 200
+        assert response.json()['checks'] == {'database': 'ok', 'cache': 'ok'}
+
+    def test_readiness_does_not_leak_errors(self, client, monkeypatch):
+        monkeypatch.setattr(warmup, '_ready', True)
+        with patch('apps.common.views.cache.get', side_effect=ConnectionError('redis://:hunter2@cache:6379 refused')):
+            response = client.get(reverse('health-ready'))
+        assert response.status_code == 503
+        assert response.json() == {'status': 'degraded', 'checks': {'database': 'ok', 'cache': 'unavailable'}}
@@ -0,0 +1,117 @@
+from unittest.mock import patch
+
+import pytest
+from django.urls import reverse
+from redis.client import Pipeline
+from redis.exceptions import ConnectionError
+from rest_framework import status
+
+from apps.common import heavy_hitters
+
+SMALL = {'WIDTH': 256, 'DEPTH': 4, 'TOP_K': 5, 'BUCKET_SECONDS': 60, 'WINDOW_SECONDS': 300}
+
+
+@pytest.fixture
+def redis_cache(settings):
+    fakeredis = pytest.importorskip('fakeredis')
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'apps.common.cache.InstrumentedRedisCache',
+            'LOCATION': 'redis://heavy-hitters:6379/0',
+            'KEY_PREFIX': 'tses_be',
+            'OPTIONS': {'connection_class': fakeredis.FakeConnection},
+        },
+        'otp': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+    }
+    settings.HEAVY_HITTERS = SMALL
+    from django.core.cache import cache
+
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+class TestHeavyHitters:
+    def test_finds_heavy_hitters_among_noise(self, redis_cache):
+        for i in range(200):
+            heavy_hitters.record(otp_failure_ip=f'10.0.{i // 250}.{i % 250}')
+        for _ in range(40):
+            heavy_hitters.record(otp_failure_ip='203.0.113.7')
+        for _ in range(25):
+            heavy_hitters.record(otp_failure_ip='198.51.100.9')
+
+        top = heavy_hitters.top('otp_failure_ip', limit=2)
+        assert [subject for subject, _ in top] == ['203.0.113.7', '198.51.100.9']
+        assert top[0][1] >= 40 and top[1][1] >= 25
+
+    def test_memory_is_bounded_by_top_k(self, redis_cache):
+        for i in range(50):
+            heavy_hitters.record(otp_request_email=f'user{i}@example.com')
+
+        client = redis_cache._cache.get_client()
+        top_keys = [key for key in client.keys() if key.endswith(b':top')]
+        cms_keys = [key for key in client.keys() if key.endswith(b':cms')]
+        assert [client.zcard(key) for key in top_keys] == [SMALL['TOP_K']]
+        assert len(cms_keys) == 1
+        assert client.strlen(cms_keys[0]) <= 4 * SMALL['WIDTH'] * SMALL['DEPTH']
+
+    def test_counts_sum_across_buckets_in_window(self, redis_cache):
+        with patch('apps.common.heavy_hitters.time.time', return_value=1_000_000):
+            for _ in range(3):
+                heavy_hitters.record(otp_request_ip='203.0.113.7')
+        with patch('apps.common.heavy_hitters.time.time', return_value=1_000_120):
+            for _ in range(2):
+                heavy_hitters.record(otp_request_ip='203.0.113.7')
+            assert heavy_hitters.top('otp_request_ip') == [('203.0.113.7', 5)]
+            assert heavy_hitters.top('otp_request_ip', window=60) == [('203.0.113.7', 2)]
+
+    def test_window_rounds_up_to_whole_buckets(self, redis_cache):
+        with patch('apps.common.heavy_hitters.time.time', return_value=1_000_020):
+            heavy_hitters.record(otp_request_ip='203.0.113.7')
+        with patch('apps.common.heavy_hitters.time.time', return_value=1_000_080):
+            for _ in range(2):
+                heavy_hitters.record(otp_request_ip='203.0.113.7')
+            # Shorter than one bucket: still the current bucket, not nothing.
+            assert heavy_hitters.top('otp_request_ip', window=30) == [('203.0.113.7', 2)]
+            assert heavy_hitters.top('otp_request_ip', window=61) == [('203.0.113.7', 3)]
+
+    def test_disabled_without_redis(self, settings):
+        settings.HEAVY_HITTERS = SMALL
+        settings.CACHES = {
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'heavy-hitters'},
+            'otp': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+        }
+        heavy_hitters.record(otp_request_ip='203.0.113.7')
+        assert heavy_hitters.top('otp_request_ip') == []
+
+
+@pytest.mark.django_db
+def test_otp_requests_survive_redis_errors(redis_cache, api_client):
+    with patch.object(Pipeline, 'execute', side_effect=ConnectionError('redis down')):
+        response = api_client.post(reverse('usersotp:otp-request'), {'email': 'a@example.com'})
+    assert response.status_code == status.HTTP_202_ACCEPTED
+
+
+@pytest.mark.django_db
+class TestHeavyHittersView:
+    url = reverse('tsess:heavy-hitters')
+
+    def test_requires_staff(self, api_client, regular_user):
+        api_client.force_authenticate(user=regular_user)
+        assert api_client.get(self.url).status_code == status.HTTP_403_FORBIDDEN
+
+    def test_lists_top_subjects_per_stream(self, redis_cache, api_client, admin_user):
+        for _ in range(3):
+            heavy_hitters.record(otp_failure_ip='203.0.113.7', otp_failure_email='ada@example.com')
+        api_client.force_authenticate(user=admin_user)
+
+        response = api_client.get(self.url, {'stream': 'otp_failure_email', 'limit': 100})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == {
+            'window': SMALL['WINDOW_SECONDS'],
+            'streams': {'otp_failure_email': [{'subject': 'ada@example.com', 'count': 3}]},
+        }
+
+        response = api_client.get(self.url)
+        assert set(response.data['streams']) == set(heavy_hitters.STREAMS)
+        assert response.data['streams']['otp_failure_ip'] == [{'subject': '203.0.113.7', 'count': 3}]
@@ -0,0 +1,64 @@
+from django.db import migrations
+
+from apps.common.indexes import DUPLICATE, PREFIX, UNUSED, IndexStat, analyze, candidate_operations
+
+
+def index(
+    name, columns, table="audits_auditlog", scans=10, enforces_constraint=False, plain_btree=True, opclass=""
+):
+    definition = f"CREATE INDEX {name} ON public.{table} USING btree ({', '.join(c + opclass for c in columns)})"
+    return IndexStat(
+        table, name, scans, 8192, enforces_constraint, False, plain_btree, tuple(columns), definition, 100
+    )
+
+
+def reasons(findings):
+    return {finding.index.name: finding.reason for finding in findings}
+
+
+class TestAnalyze:
+    def test_prefix_duplicate_and_unused(self):
+        stats = [
+            index("audits_auditlog_email_f64119ae", ["email"]),
+            index("audits_auditlog_email_f64119ae_like", ["email"], plain_btree=False, opclass=" varchar_pattern_ops"),
+            index("audits_audi_email_846025_idx", ["email", "action"]),
+            index("audits_audi_email_copy_idx", ["email", "action"], scans=0),
+            index("audits_audi_action_0f6a8b_idx", ["action", "created_at"], scans=0),
+        ]
+        assert reasons(analyze(stats)) == {
+            "audits_auditlog_email_f64119ae": PREFIX,
+            "audits_audi_email_copy_idx": DUPLICATE,
+            "audits_audi_action_0f6a8b_idx": UNUSED,
+        }
+
+    def test_constraint_backed_indexes_are_kept(self):
+        stats = [
+            index("users_user_email_key", ["email"], table="users_user", scans=0, enforces_constraint=True),
+            index("users_user_email_a1b2c3_idx", ["email", "is_active"], table="users_user"),
+        ]
+        assert analyze(stats) == []
+
+
+class TestCandidateOperations:
+    def test_maps_meta_indexes_and_db_index_fields(self):
+        findings = analyze([
+            index("audits_auditlog_email_f64119ae", ["email"]),
+            index("audits_auditlog_email_f64119ae_like", ["email"], scans=0, plain_btree=False),
+            index("audits_audi_email_846025_idx", ["email", "action"]),
+            index("audits_audi_action_0f6a8b_idx", ["action", "created_at"], scans=0),
+            index("manual_idx", ["ip_address", "email"], scans=0),
+        ])
+        operations, unmanaged = candidate_operations(findings, ["audits"])
+
+        ops = operations["audits"]
+        assert [type(op) for op in ops].count(migrations.AlterField) == 1
+        alter = next(op for op in ops if isinstance(op, migrations.AlterField))
+        assert alter.name == "email" and not alter.field.db_index
+        assert any(isinstance(op, migrations.RemoveIndex) and op.name == "audits_audi_action_0f6a8b_idx" for op in ops)
+        assert [finding.index.name for finding in unmanaged] == ["manual_idx"]
+
+    def test_like_index_alone_is_left_for_review(self):
+        findings = analyze([index("audits_auditlog_email_f64119ae_like", ["email"], scans=0, plain_btree=False)])
+        operations, unmanaged = candidate_operations(findings, ["audits"])
+        assert operations == {}
+        assert len(unmanaged) == 1
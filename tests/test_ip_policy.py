@@ -0,0 +1,84 @@
+import ipaddress
+
+import pytest
+from django.test import RequestFactory
+from django.urls import reverse
+
+from apps.common import ip_policy
+from apps.common.helpers import get_client_ip
+from apps.common.ip_policy import ALLOW, DENY, IPPolicy, PrefixTrie
+from apps.common.models import IPRule
+
+
+@pytest.fixture(autouse=True)
+def fresh_policy():
+    ip_policy.invalidate()
+    yield
+    ip_policy.invalidate()
+
+
+class TestPrefixTrie:
+    def test_longest_prefix_wins(self):
+        trie = PrefixTrie()
+        trie.insert('10.0.0.0/8', DENY)
+        trie.insert('10.1.2.0/24', ALLOW)
+        trie.insert('2001:db8::/32', DENY)
+
+        assert trie.lookup(ipaddress.ip_address('10.9.9.9')) == DENY
+        assert trie.lookup(ipaddress.ip_address('10.1.2.3')) == ALLOW
+        assert trie.lookup(ipaddress.ip_address('11.0.0.1')) is None
+        assert trie.lookup(ipaddress.ip_address('2001:db8::1')) == DENY
+        assert trie.lookup(ipaddress.ip_address('2001:db9::1')) is None
+
+    def test_policy_handles_mapped_and_invalid_addresses(self):
+        policy = IPPolicy([('203.0.113.0/24', DENY), ('not-a-network', DENY)])
+        assert not policy.is_allowed('::ffff:203.0.113.5')
+        assert policy.is_allowed('garbage')
+        assert not IPPolicy([('198.51.100.0/24', ALLOW)], default=DENY).is_allowed('203.0.113.5')
+
+
+class TestGetClientIP:
+    def request(self, remote_addr, forwarded_for=None):
+        extra = {'REMOTE_ADDR': remote_addr}
+        if forwarded_for:
+            extra['HTTP_X_FORWARDED_FOR'] = forwarded_for
+        return RequestFactory().get('/', **extra)
+
+    def test_forwarded_for_only_trusted_from_proxies(self):
+        assert get_client_ip(self.request('198.51.100.7', '1.2.3.4')) == '198.51.100.7'
+        assert get_client_ip(self.request('10.0.0.2', '1.2.3.4')) == '1.2.3.4'
+
+    def test_spoofed_left_most_hop_is_ignored(self):
+        request = self.request('10.0.0.2', '6.6.6.6, 203.0.113.9, 10.0.0.3')
+        assert get_client_ip(request) == '203.0.113.9'
+
+
+@pytest.mark.django_db
+class TestIPPolicyMiddleware:
+    url = reverse('health-live')
+
+    def test_settings_lists(self, client, settings):
+        settings.IP_DENY_LIST = ['203.0.113.0/24', '2001:db8::/32']
+        settings.IP_ALLOW_LIST = ['203.0.113.10']
+
+        assert client.get(self.url, REMOTE_ADDR='203.0.113.5').status_code == 403
+        assert client.get(self.url, REMOTE_ADDR='203.0.113.10').status_code == 200
+        assert client.get(self.url, REMOTE_ADDR='2001:db8::5').status_code == 403
+        assert client.get(self.url, REMOTE_ADDR='10.0.0.2', HTTP_X_FORWARDED_FOR='203.0.113.5').status_code == 403
+
+    def test_rules_reload_without_restart(self, client, settings):
+        settings.IP_POLICY_REFRESH_SECONDS = 3600
+        assert client.get(self.url, REMOTE_ADDR='198.51.100.7').status_code == 200
+
+        rule = IPRule.objects.create(network='198.51.100.0/24', action=DENY)
+        response = client.get(self.url, REMOTE_ADDR='198.51.100.7')
+        assert response.status_code == 403
+        assert response.json() == {'error': 'Access denied'}
+
+        rule.delete()
+        assert client.get(self.url, REMOTE_ADDR='198.51.100.7').status_code == 200
+
+    def test_rule_network_is_normalized(self):
+        rule = IPRule(network=' 198.51.100.7/24 ', action=DENY)
+        rule.full_clean()
+        assert rule.network == '198.51.100.0/24'
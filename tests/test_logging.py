@@ -0,0 +1,82 @@
+import json
+import logging
+import threading
+
+from apps.common import metrics
+from apps.common.log import AsyncQueueHandler, JSONFormatter, RateLimitFilter, SamplingFilter
+
+
+def make_record(
+    name='apps.users.services', level=logging.INFO, msg='OTP sent to %s', args=('a@example.com',), **extra
+):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def dropped(reason):
+    return metrics.LOG_RECORDS_DROPPED.labels(reason)._value.get()
+
+
+class BlockingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.unblock = threading.Event()
+        self.records = []
+
+    def emit(self, record):
+        self.unblock.wait(5)
+        self.records.append(self.format(record))
+
+
+def test_json_formatter_includes_extra_fields_and_traceback():
+    try:
+        raise ValueError('bad')
+    except ValueError:
+        import sys
+
+        record = make_record(email='a@example.com')
+        record.exc_info = sys.exc_info()
+
+    payload = json.loads(JSONFormatter().format(record))
+    assert payload['message'] == 'OTP sent to a@example.com'
+    assert payload['logger'] == 'apps.users.services'
+    assert payload['email'] == 'a@example.com'
+    assert 'ValueError: bad' in payload['exc_info']
+
+
+def test_queue_handler_never_blocks_and_counts_overflow():
+    target = BlockingHandler()
+    target.name = 'test-blocking-sink'
+    logging._handlers[target.name] = target
+    handler = AsyncQueueHandler(targets=[target.name], maxsize=2)
+    before = dropped('queue_full')
+    try:
+        for i in range(10):
+            handler.emit(make_record(args=(f'user{i}@example.com',)))
+        # One record is held by the blocked sink, two wait in the queue, the rest are dropped.
+        assert dropped('queue_full') - before >= 6
+    finally:
+        target.unblock.set()
+        handler.close()
+        del logging._handlers[target.name]
+
+    assert 2 <= len(target.records) <= 4
+    assert target.records[0].startswith('OTP sent to user0@example.com')
+
+
+def test_sampling_filter_keeps_warnings():
+    sampling = SamplingFilter({'apps.users': 0.0})
+    before = dropped('sampled')
+    assert not sampling.filter(make_record())
+    assert sampling.filter(make_record(level=logging.WARNING))
+    assert sampling.filter(make_record(name='apps.audits.views'))
+    assert dropped('sampled') - before == 1
+
+
+def test_rate_limit_filter_allows_a_burst_per_logger():
+    limiting = RateLimitFilter({'apps.users': 3, 'apps.users.services': 2})
+    results = [limiting.filter(make_record()) for _ in range(4)]
+    assert results == [True, True, False, False]
+    assert limiting.filter(make_record(name='apps.users.views'))
+    assert limiting.filter(make_record(level=logging.ERROR))
@@ -0,0 +1,80 @@
+import pytest
+from unittest.mock import patch
+from django.urls import reverse
+from prometheus_client import REGISTRY
+
+from apps.users.services import OTPService
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.django_db
+class TestMetrics:
+    def test_metrics_endpoint(self, client, settings):
+        settings.DEBUG = True
+        response = client.get(reverse('metrics'))
+        assert response.status_code == 200
+        assert b'tses_otp_requests_total' in response.content
+
+    def test_metrics_closed_without_token_unless_debug(self, client, settings):
+        settings.METRICS_AUTH_TOKEN = ''
+        settings.DEBUG = False
+        assert client.get(reverse('metrics')).status_code == 403
+
+    def test_metrics_token_required(self, client, settings):
+        settings.METRICS_AUTH_TOKEN = 'secret'
+        assert client.get(reverse('metrics')).status_code == 403
+        response = client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        assert response.status_code == 200
+
+    def test_request_otp_counted(self):
+        before = sample('tses_otp_requests_total', outcome='sent')
+        with patch('apps.users.services.send_otp_email.delay'), \
+             patch('apps.users.services.write_audit_log.delay'):
+            OTPService.request_otp('metrics@example.com', '127.0.0.1', 'TestAgent')
+        assert sample('tses_otp_requests_total', outcome='sent') == before + 1
+        assert sample('tses_otp_request_duration_seconds_count') >= 1
+
+    def test_http_request_recorded(self, api_client):
+        route = 'api/v1/auth/otp/request/'
+        before = sample('tses_http_request_duration_seconds_count', route=route, method='POST')
+        with patch('apps.users.services.send_otp_email.delay'), \
+             patch('apps.users.services.write_audit_log.delay'):
+            api_client.post(reverse('usersotp:otp-request'), {'email': 'metrics@example.com'})
+        assert sample('tses_http_request_duration_seconds_count', route=route, method='POST') == before + 1
+
+
+class FakePool:
+    def get_stats(self):
+        return {'pool_size': 5, 'pool_available': 2, 'requests_num': 40, 'requests_wait_ms': 1500}
+
+
+class TestDBPoolMetrics:
+    def test_pool_stats_exported(self, monkeypatch):
+        from django.db.backends.postgresql.base import DatabaseWrapper
+
+        monkeypatch.setitem(DatabaseWrapper._connection_pools, 'default', FakePool())
+        assert sample('tses_db_pool_connections', alias='default', state='in_use') == 3
+        assert sample('tses_db_pool_connections', alias='default', state='idle') == 2
+        assert sample('tses_db_pool_requests_total', alias='default') == 40
+        assert sample('tses_db_pool_wait_seconds_total', alias='default') == 1.5
+
+
+class TestWorkerMetricsServer:
+    def test_needs_multiproc_dir(self, settings, monkeypatch):
+        from apps.common.signals import _start_worker_metrics_server
+
+        settings.CELERY_METRICS_PORT = 9808
+        monkeypatch.delenv('PROMETHEUS_MULTIPROC_DIR', raising=False)
+        with patch('prometheus_client.start_http_server') as start:
+            _start_worker_metrics_server()
+        start.assert_not_called()
+
+        monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', '/tmp/prometheus-test')
+        with patch('prometheus_client.start_http_server') as start, \
+                patch('apps.common.metrics.multiprocess.MultiProcessCollector'):
+            _start_worker_metrics_server()
+        start.assert_called_once()
+        assert start.call_args.args == (9808,)
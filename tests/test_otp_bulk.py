@@ -0,0 +1,126 @@
+from unittest.mock import patch
+
+import pytest
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from apps.common.cache import otp_cache
+from apps.users.services import OTPService
+from apps.users.tasks import send_otp_emails
+
+LOCMEM = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'otp': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'otp'},
+}
+
+
+# Several deferred tasks go out as one run_deferred batch that calls each
+# task's run(), after the transaction commits.
+@pytest.mark.django_db(transaction=True)
+class TestOTPBulkRequest:
+    url = reverse('usersotp:otp-request-bulk')
+
+    def test_requires_staff(self, api_client, regular_user):
+        api_client.force_authenticate(user=regular_user)
+        response = api_client.post(self.url, {'emails': ['a@example.com']}, format='json')
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    @override_settings(CACHES=LOCMEM)
+    def test_reports_status_per_email(self, api_client, admin_user):
+        otp_cache.set(OTPService.key('otp_request_email', 'limited@example.com'), OTPService.EMAIL_RATE_LIMIT)
+        api_client.force_authenticate(user=admin_user)
+        emails = ['new@example.com', 'not-an-email', 'limited@example.com', 'new@example.com']
+
+        with patch('apps.users.services.send_otp_emails.run') as mock_send, \
+                patch('apps.users.services.write_audit_logs.run') as mock_audit:
+            response = api_client.post(self.url, {'emails': emails}, format='json')
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.data['results'] == [
+            {'email': 'new@example.com', 'status': 'sent'},
+            {'email': 'not-an-email', 'status': 'invalid'},
+            {'email': 'limited@example.com', 'status': 'rate_limited'},
+        ]
+        assert response.data['summary'] == {'sent': 1, 'rate_limited': 1, 'invalid': 1}
+
+        (pairs,), _ = mock_send.call_args
+        assert pairs == [['new@example.com', otp_cache.get(OTPService.key('otp', 'new@example.com'))]]
+        assert otp_cache.get(OTPService.key('otp_request_email', 'new@example.com')) == 1
+        assert mock_audit.call_count == 1
+        assert [email for email, _ in mock_audit.call_args[0][1]] == ['new@example.com', 'limited@example.com']
+
+    @override_settings(CACHES=LOCMEM)
+    def test_deduplicates_case_insensitively(self, api_client, admin_user):
+        api_client.force_authenticate(user=admin_user)
+        with patch('apps.users.services.send_otp_emails.run') as mock_send:
+            response = api_client.post(self.url, {'emails': ['Ada@Example.com', 'ada@example.com']}, format='json')
+
+        assert response.data['results'] == [{'email': 'ada@example.com', 'status': 'sent'}]
+        (pairs,), _ = mock_send.call_args
+        assert len(pairs) == 1
+        assert otp_cache.get(OTPService.key('otp', 'ada@example.com')) == pairs[0][1]
+
+    def test_chunks_tasks_and_writes_audit_logs(self, api_client, admin_user):
+        from apps.audits.models import AuditLog
+
+        api_client.force_authenticate(user=admin_user)
+        emails = [f'user{i}@example.com' for i in range(5)]
+
+        with patch.object(OTPService, 'BULK_CHUNK_SIZE', 2), \
+                patch('apps.users.services.send_otp_emails.run') as mock_send:
+            response = api_client.post(self.url, {'emails': emails}, format='json')
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert [len(call.args[0]) for call in mock_send.call_args_list] == [2, 2, 1]
+        assert AuditLog.objects.filter(action='OTP_REQUESTED', details__bulk=True).count() == 5
+
+
+def test_send_otp_emails_retries_only_unsent_messages():
+    mail.outbox = []
+    send_messages = EmailBackend.send_messages
+    failures = iter([False, True])
+
+    def flaky(backend, messages):
+        if next(failures, False):
+            raise ConnectionResetError('SMTP connection dropped')
+        return send_messages(backend, messages)
+
+    pairs = [['a@example.com', '111111'], ['b@example.com', '222222'], ['c@example.com', '333333']]
+    with patch.object(EmailBackend, 'send_messages', flaky), \
+            patch.object(send_otp_emails, 'retry', wraps=send_otp_emails.retry) as retry:
+        try:
+            send_otp_emails.delay(pairs)
+        except Exception:
+            pass
+
+    assert [message.to[0] for message in mail.outbox] == ['a@example.com']
+    assert retry.call_args.kwargs['args'] == [pairs[1:]]
+
+    send_otp_emails.apply(args=retry.call_args.kwargs['args'])
+    assert [message.to[0] for message in mail.outbox] == ['a@example.com', 'b@example.com', 'c@example.com']
+
+
+def test_redis_pipeline_matches_cache_encoding():
+    fakeredis = pytest.importorskip('fakeredis')
+    caches = {
+        'default': {
+            'BACKEND': 'apps.common.cache.InstrumentedRedisCache',
+            'LOCATION': 'redis://localhost:6379/15',
+            'OPTIONS': {'connection_class': fakeredis.FakeConnection},
+        }
+    }
+    with override_settings(CACHES=caches):
+        cache.clear()
+        with cache.pipeline() as pipe:
+            pipe.set('otp:a@example.com', '123456', timeout=60)
+            pipe.add('counter', 0, timeout=60)
+            pipe.incr('counter')
+            pipe.add('counter', 0, timeout=60)
+            pipe.incr('counter')
+
+        assert cache.get('otp:a@example.com') == '123456'
+        assert cache.get('counter') == 2
@@ -1,9 +1,26 @@
 import pytest
 from unittest.mock import patch
 from django.core.cache import cache
+from django.db.backends.postgresql.base import DatabaseWrapper
+from apps.common.cache import otp_cache
+from apps.users.managers import upsert_verified_sql
+from apps.users.models import User
 from apps.users.services import OTPService
 from tests.factories import UserFactory
 
+
+@pytest.fixture
+def locmem_otp_cache(settings):
+    # The test settings use DummyCache, which stores nothing.
+    settings.CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'otp-services'},
+        'otp': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'otp-services-otp'},
+    }
+    otp_cache.clear()
+    yield
+    otp_cache.clear()
+
+
 @pytest.mark.django_db
 class TestOTPService:
     def test_generate_otp(self):
@@ -11,11 +28,11 @@ class TestOTPService:
         assert len(otp) == 6
         assert otp.isdigit()
 
-    def test_store_otp(self):
+    def test_store_otp(self, locmem_otp_cache):
         email = "testuser@example.com"
         otp = "123456"
         OTPService.store_otp(email, otp)
-        cached_otp = cache.get(f"otp:{email}")
+        cached_otp = otp_cache.get(OTPService.key('otp', email))
         assert cached_otp == otp
 
     def test_check_rate_limit(self):
@@ -26,6 +43,7 @@ class TestOTPService:
         is_limited, _ = OTPService.check_rate_limit(email, ip_address)
         assert not is_limited
 
+    @pytest.mark.django_db(transaction=True)
     def test_request_otp(self, api_client):
         user = UserFactory(email="testuser@example.com")
         ip_address = "127.0.0.1"
@@ -43,7 +61,8 @@ class TestOTPService:
             mock_send_email.assert_called_once_with(user.email, mock_send_email.call_args[0][1])
             mock_write_log.assert_called_once()
 
-    def test_verify_otp(self, api_client):
+    @pytest.mark.django_db(transaction=True)
+    def test_verify_otp(self, api_client, locmem_otp_cache):
         user = UserFactory(email="testuser@example.com")
         otp = "123456"
         ip_address = "127.0.0.1"
@@ -57,4 +76,90 @@ class TestOTPService:
             assert 'access' in response_data
             assert 'refresh' in response_data
             assert status_code == 200
-            mock_write_log.assert_called_once()
\ No newline at end of file
+            mock_write_log.assert_called_once()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_mixed_case_email_uses_one_identity(self, locmem_otp_cache):
+        existing = UserFactory(email="Ada@example.com", is_verified=False)
+
+        with patch('apps.users.services.send_otp_email.delay') as mock_send_email, \
+                patch('apps.users.services.write_audit_log.delay'):
+            success, _ = OTPService.request_otp("Ada@Example.COM", "127.0.0.1", "TestAgent")
+        assert success
+        email, otp = mock_send_email.call_args[0]
+        assert email == "Ada@example.com"
+
+        with patch('apps.users.services.write_audit_log.delay'):
+            # Local parts are case-sensitive, like the unique email column.
+            success, _, status_code = OTPService.verify_otp("ada@example.com", otp, "127.0.0.1", "TestAgent")
+            assert not success and status_code == 400
+            success, _, status_code = OTPService.verify_otp("Ada@EXAMPLE.com", otp, "127.0.0.1", "TestAgent")
+        assert success and status_code == 200
+        assert User.objects.get().pk == existing.pk
+        existing.refresh_from_db()
+        assert existing.is_verified
+
+
+@pytest.mark.django_db
+class TestUpsertVerified:
+    def test_creates_verified_user_with_free_username(self):
+        UserFactory(email="other@example.com", username="taken")
+        user, created = User.objects.upsert_verified("taken@example.com", "taken", "taken", "User")
+        assert created
+        assert user.is_verified
+        assert user.username.startswith("taken-")
+
+    def test_marks_existing_user_verified(self):
+        existing = UserFactory(email="known@example.com", is_verified=False)
+        user, created = User.objects.upsert_verified("known@example.com", "known", "known", "User")
+        assert not created
+        assert user.pk == existing.pk
+        existing.refresh_from_db()
+        assert existing.is_verified
+
+
+def test_upsert_verified_sql_binds_every_column():
+    connection = DatabaseWrapper({'NAME': 'tses', 'OPTIONS': {}})
+    sql, params = upsert_verified_sql(User, connection, "ada@example.com", "ada", "Ada", "Lovelace")
+
+    columns = sql[sql.index('(', sql.index('INSERT INTO')) + 1:sql.index(') VALUES')].split(', ')
+    expected = [f.column for f in User._meta.concrete_fields if not f.primary_key]
+    assert columns == [connection.ops.quote_name(column) for column in expected]
+    assert sql.count('%s') == len(params)
+    assert params[-1] == "ada@example.com"
+    table = connection.ops.quote_name(User._meta.db_table)
+    assert f'ON CONFLICT (email) DO UPDATE SET is_verified = true WHERE NOT {table}.is_verified' in sql
+
+
+@pytest.mark.postgres
+@pytest.mark.django_db(transaction=True)
+class TestUpsertVerifiedOnPostgres:
+    def test_creates_verified_user(self):
+        user, created = User.objects.upsert_verified("ada@example.com", "ada", "Ada", "Lovelace")
+        assert created
+        stored = User.objects.get(email="ada@example.com")
+        assert (user.pk, user.id, user.username) == (stored.pk, stored.id, "ada")
+        assert stored.is_verified and stored.is_active
+        assert stored.date_joined is not None and stored.gender == 'Other'
+
+    def test_suffixes_a_taken_username(self):
+        UserFactory(email="other@example.com", username="ada")
+        user, created = User.objects.upsert_verified("ada@example.com", "ada", "Ada", "Lovelace")
+        assert created
+        assert user.username.startswith("ada-")
+
+    def test_marks_existing_user_verified(self):
+        existing = UserFactory(email="ada@example.com", is_verified=False)
+        user, created = User.objects.upsert_verified("ada@example.com", "ada", "Ada", "Lovelace")
+        assert not created
+        assert user.pk == existing.pk and user.is_verified
+        existing.refresh_from_db()
+        assert existing.is_verified
+
+    def test_returns_already_verified_user_untouched(self):
+        existing = UserFactory(email="ada@example.com", is_verified=True)
+        user, created = User.objects.upsert_verified("ada@example.com", "ada", "Ada", "Lovelace")
+        assert not created
+        assert user.pk == existing.pk
+        assert user.username == existing.username
+        assert User.objects.count() == 1
@@ -0,0 +1,82 @@
+import pytest
+from django.test import override_settings
+
+from apps.common.cache import HashRing, hash_tag, otp_cache, pipeline
+from apps.users.services import OTPService
+
+NODES = ['redis://otp-a:6379/0', 'redis://otp-b:6379/0', 'redis://otp-c:6379/0']
+
+
+def test_hash_tag_follows_redis_cluster_rule():
+    assert hash_tag('tses_be:1:otp:{a@example.com}') == 'a@example.com'
+    assert hash_tag('tses_be:1:otp_request_email:{a@example.com}:timeout') == 'a@example.com'
+    assert hash_tag('user_list_{}') == 'user_list_{}'
+    assert hash_tag('plain-key') == 'plain-key'
+
+
+def test_adding_a_node_only_moves_keys_to_it():
+    keys = [f'user{i}@example.com' for i in range(5000)]
+    before = HashRing(NODES)
+    after = HashRing(NODES + ['redis://otp-d:6379/0'])
+
+    moved = [key for key in keys if before.node(key) != after.node(key)]
+    assert all(after.node(key) == 'redis://otp-d:6379/0' for key in moved)
+    assert 0.15 < len(moved) / len(keys) < 0.35
+
+
+class TestShardedOTPCache:
+    @pytest.fixture(autouse=True)
+    def sharded_cache(self):
+        fakeredis = pytest.importorskip('fakeredis')
+        caches = {
+            'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+            'otp': {
+                'BACKEND': 'apps.common.cache.ShardedRedisCache',
+                'LOCATION': NODES,
+                'KEY_PREFIX': 'tses_be',
+                'OPTIONS': {'connection_class': fakeredis.FakeConnection},
+            },
+        }
+        with override_settings(CACHES=caches):
+            otp_cache.clear()
+            yield
+            otp_cache.clear()
+
+    def node_keys(self):
+        import fakeredis
+        import redis
+
+        return {
+            node: {
+                key.decode() for key in redis.Redis.from_url(node, connection_class=fakeredis.FakeConnection).keys()
+            }
+            for node in NODES
+        }
+
+    def test_keys_of_one_email_share_a_node_and_spread_across_nodes(self):
+        emails = [f'user{i}@example.com' for i in range(30)]
+        for email in emails:
+            OTPService.store_otp(email, '123456')
+            OTPService.increment_rate_limit(email, '10.0.0.1')
+
+        nodes = self.node_keys()
+        assert all(nodes.values())
+        for email in emails:
+            holders = [node for node, keys in nodes.items() if any(f'{{{email}}}' in key for key in keys)]
+            assert len(holders) == 1
+
+    def test_multi_key_operations_are_split_per_node(self):
+        emails = [f'user{i}@example.com' for i in range(20)]
+        otp_cache.set_many({OTPService.key('otp', email): email for email in emails}, timeout=60)
+        with pipeline(otp_cache) as pipe:
+            for email in emails:
+                pipe.add(OTPService.key('otp_request_email', email), 0, timeout=60)
+                pipe.incr(OTPService.key('otp_request_email', email))
+
+        values = otp_cache.get_many([OTPService.key('otp', email) for email in emails])
+        counts = otp_cache.get_many([OTPService.key('otp_request_email', email) for email in emails])
+        assert sorted(values.values()) == sorted(emails)
+        assert set(counts.values()) == {1}
+
+        otp_cache.delete_many([OTPService.key('otp', email) for email in emails])
+        assert otp_cache.get_many([OTPService.key('otp', email) for email in emails]) == {}
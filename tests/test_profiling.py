@@ -0,0 +1,71 @@
+import sys
+import time
+
+import pytest
+from django.http import HttpResponse
+from django.urls import reverse
+
+from apps.common import profiling
+from apps.common.middleware import ProfilingMiddleware
+
+
+@pytest.fixture
+def profiling_settings(settings, tmp_path):
+    settings.PROFILING_ENABLED = True
+    settings.PROFILING_DIR = str(tmp_path)
+    settings.PROFILING_INTERVAL_MS = 1
+    return settings
+
+
+class TestSamplingProfiler:
+    def test_folded_output(self):
+        profiler = profiling.SamplingProfiler(0)
+        for _ in range(2):
+            profiler.add(sys._getframe())
+        stack, count = profiler.folded().strip().rsplit(' ', 1)
+        assert count == '2'
+        assert stack.split(';')[-1].startswith('TestSamplingProfiler.test_folded_output (test_profiling.py:')
+
+    def test_resolve_profile_rejects_traversal(self, profiling_settings):
+        assert profiling.resolve_profile('../settings.folded') is None
+        assert profiling.resolve_profile('missing.folded') is None
+
+
+@pytest.mark.django_db
+class TestProfilingMiddleware:
+    def test_sampled_request_saves_profile(self, rf, profiling_settings):
+        profiling_settings.PROFILING_SAMPLE_RATE = 1
+
+        def slow_view(request):
+            time.sleep(0.05)
+            return HttpResponse('ok')
+
+        response = ProfilingMiddleware(slow_view)(rf.get('/api/v1/auth/users/'))
+        [(name, size, _)] = profiling.list_profiles()
+        assert response['X-Profile-Id'] == name
+        assert name.endswith('-sampled.folded')
+        assert 'slow_view' in (profiling.profile_dir() / name).read_text()
+
+    def test_fast_request_skipped_by_latency_trigger(self, rf, profiling_settings):
+        profiling_settings.PROFILING_SLOW_THRESHOLD_MS = 1000
+        response = ProfilingMiddleware(lambda request: HttpResponse('ok'))(rf.get('/'))
+        assert 'X-Profile-Id' not in response
+        assert profiling.list_profiles() == []
+
+    def test_header_requires_staff(self, client, profiling_settings, regular_user):
+        client.force_login(regular_user)
+        response = client.get(reverse('metrics'), HTTP_X_PROFILE='1')
+        assert 'X-Profile-Id' not in response
+        assert profiling.list_profiles() == []
+
+    def test_admin_list_and_download(self, client, profiling_settings, admin_user, tmp_path):
+        (tmp_path / 'sample.folded').write_text('main;handler 3\n')
+        client.force_login(admin_user)
+
+        response = client.get(reverse('admin-profiles'))
+        assert response.status_code == 200
+        assert b'sample.folded' in response.content
+
+        response = client.get(reverse('admin-profile-download', args=['sample.folded']))
+        assert response.status_code == 200
+        assert b''.join(response.streaming_content) == b'main;handler 3\n'
@@ -0,0 +1,68 @@
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.audits.models import AuditLog
+from apps.common import middleware
+from apps.common.middleware import QueryBudgetExceeded
+from apps.users.views import CustomUsersViewSet
+from tests.factories import UserFactory
+
+
+@pytest.fixture
+def locmem(settings):
+    # A real, empty cache, so cached views are measured on the miss path
+    # (queries plus the cache lock and write), not skipped by DummyCache.
+    settings.CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'query-budget'},
+        'otp': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'query-budget-otp'},
+    }
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def bearer(user):
+    return {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+
+@pytest.mark.django_db
+class TestQueryBudgets:
+    def test_list_views_stay_within_budget_with_jwt_auth(self, locmem, api_client, admin_user):
+        users = UserFactory.create_batch(20)
+        AuditLog.objects.bulk_create(AuditLog(user=user, email=user.email, action='OTP_REQUESTED') for user in users)
+
+        assert api_client.get(reverse('usersapi:users-list'), **bearer(admin_user)).status_code == 200
+        with patch.object(CustomUsersViewSet, 'get_serializer') as get_serializer:
+            assert api_client.get(reverse('usersapi:users-list'), **bearer(admin_user)).status_code == 200
+        get_serializer.assert_not_called()
+        detail = reverse('usersapi:users-detail', kwargs={'id': users[0].id})
+        assert api_client.get(detail, **bearer(admin_user)).status_code == 200
+        assert api_client.get(reverse('tsess:audit-logs'), {'page_size': 20}, **bearer(admin_user)).status_code == 200
+
+    def test_exceeding_the_budget_fails(self, api_client, admin_user):
+        api_client.force_authenticate(user=admin_user)
+        with patch.object(CustomUsersViewSet, 'query_budget', {'list': 1}):
+            with pytest.raises(QueryBudgetExceeded, match='made 2 queries, budget 1'):
+                api_client.get(reverse('usersapi:users-list'))
+
+    def test_server_timing_only_for_staff(self, api_client, admin_user, regular_user):
+        url = reverse('tsess:audit-logs')
+        response = api_client.get(url, **bearer(admin_user))
+        assert response['Server-Timing'].startswith('db;dur=')
+        assert ', total;dur=' in response['Server-Timing']
+
+        assert 'Server-Timing' not in api_client.get(url, **bearer(regular_user))
+
+    def test_slow_queries_logged_with_call_site(self, locmem, api_client, admin_user, settings):
+        settings.SLOW_QUERY_THRESHOLD_MS = 0.000001
+        with patch.object(middleware.logger, 'warning') as warning:
+            api_client.get(reverse('usersapi:users-list'), **bearer(admin_user))
+
+        sites = [call.kwargs['extra']['call_site'] for call in warning.call_args_list]
+        assert any(site.startswith('apps/users/views.py:') for site in sites)
+        assert any('rest_framework_simplejwt' in site for site in sites)
+        assert 'sql' in warning.call_args.kwargs['extra']
@@ -0,0 +1,103 @@
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+
+from apps.audits.models import AuditLog
+from apps.common import read_through
+from tests.factories import UserFactory
+
+
+@pytest.fixture
+def locmem(settings):
+    settings.CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'read-through'},
+        'otp': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'read-through-otp'},
+    }
+    cache.clear()
+    yield
+    cache.clear()
+
+
+class TestFetch:
+    def test_computes_once_then_hits(self, locmem):
+        compute = Mock(return_value={'n': 1})
+        assert read_through.fetch('k', compute, timeout=60) == {'n': 1}
+        assert read_through.fetch('k', compute, timeout=60) == {'n': 1}
+        assert compute.call_count == 1
+        assert cache.get('k:lock') is None
+
+    def test_concurrent_misses_compute_once(self, locmem):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'value'
+
+        results = []
+
+        def read():
+            results.append(read_through.fetch('k', compute, 60))
+
+        threads = [threading.Thread(target=read) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == ['value'] * 8
+        assert len(calls) == 1
+
+    def test_stale_value_served_while_another_process_refreshes(self, locmem):
+        cache.set('k', ('old', time.time() - 1, 0.01), timeout=60)
+        cache.add('k:lock', 1)
+        compute = Mock(return_value='new')
+        assert read_through.fetch('k', compute, timeout=60, stale=60) == 'old'
+        compute.assert_not_called()
+
+        cache.delete('k:lock')
+        assert read_through.fetch('k', compute, timeout=60, stale=60) == 'new'
+        assert read_through.fetch('k', compute, timeout=60, stale=60) == 'new'
+        assert compute.call_count == 1
+
+    def test_refreshes_early_near_expiry(self, locmem):
+        cache.set('k', ('old', time.time() + 1, 0.5), timeout=60)
+        compute = Mock(return_value='new')
+        with patch('apps.common.read_through.random.random', return_value=0.0):
+            assert read_through.fetch('k', compute, timeout=60) == 'old'
+        with patch('apps.common.read_through.random.random', return_value=0.99):
+            assert read_through.fetch('k', compute, timeout=60) == 'new'
+
+    def test_failed_compute_releases_the_lock(self, locmem):
+        with pytest.raises(ValueError):
+            read_through.fetch('k', Mock(side_effect=ValueError), timeout=60)
+        assert cache.get('k:lock') is None
+
+
+@pytest.mark.django_db
+def test_audit_stats(locmem, api_client, admin_user):
+    AuditLog.objects.bulk_create(
+        AuditLog(email='a@example.com', action=action) for action in ['OTP_REQUESTED'] * 3 + ['OTP_FAILED']
+    )
+    api_client.force_authenticate(user=admin_user)
+    response = api_client.get(reverse('tsess:audit-stats'), {'hours': 1})
+
+    assert response.status_code == 200
+    assert response.json() == {'hours': 1, 'total': 4, 'by_action': {'OTP_REQUESTED': 3, 'OTP_FAILED': 1}}
+
+
+@pytest.mark.django_db
+def test_user_list_cache_is_scoped_to_the_requester(locmem, api_client, admin_user, regular_user):
+    UserFactory.create_batch(2)
+    url = reverse('usersapi:users-list')
+    api_client.force_authenticate(user=admin_user)
+    assert api_client.get(url).json()['count'] == 4
+
+    api_client.force_authenticate(user=regular_user)
+    response = api_client.get(url)
+    assert response.json()['count'] == 1
+    assert response.json()['results'][0]['email'] == regular_user.email
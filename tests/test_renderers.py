@@ -0,0 +1,81 @@
+import datetime
+import decimal
+import io
+import uuid
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from django_countries.fields import Country
+from phonenumber_field.phonenumber import PhoneNumber
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.renderers import JSONRenderer
+
+from apps.common.parsers import ORJSONParser
+from apps.common.renderers import ORJSONRenderer
+from tests.factories import UserFactory
+
+
+def test_output_matches_drf_json_renderer():
+    data = {
+        'id': uuid.uuid4(),
+        'aware': datetime.datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+        'offset': timezone.localtime(timezone.now(), timezone.get_fixed_timezone(120)),
+        'naive': datetime.datetime(2024, 5, 1, 12, 30),
+        'day': datetime.date(2024, 5, 1),
+        'amount': decimal.Decimal('1.50'),
+        'message': gettext_lazy('This field is required.'),
+        'errors': [ErrorDetail('Invalid.', code='invalid')],
+        'text': 'café \u2028 line \u2029 para "quoted" \\ </script>',
+        1: ['nested', {'none': None, 'flag': True, 'ratio': 0.1}],
+    }
+    assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+def test_phone_numbers_and_countries():
+    data = {'phone_number': PhoneNumber.from_string('+254712345678'), 'country': Country('KE')}
+    assert ORJSONRenderer().render(data) == b'{"phone_number":"+254712345678","country":"KE"}'
+
+
+def test_what_orjson_cannot_encode_falls_back_to_drf():
+    assert ORJSONRenderer().render({'big': 2 ** 70}) == JSONRenderer().render({'big': 2 ** 70})
+    with pytest.raises(TypeError):
+        ORJSONRenderer().render({'obj': object()})
+    # Documented difference: DRF's strict mode raises, orjson writes null.
+    assert ORJSONRenderer().render([float('nan')]) == b'[null]'
+
+
+def test_indented_output_falls_back_to_drf():
+    data = {'a': [1, 2]}
+    media_type = 'application/json; indent=4'
+    assert ORJSONRenderer().render(data, media_type) == JSONRenderer().render(data, media_type)
+    assert ORJSONRenderer().render(None) == b''
+
+
+def test_parser():
+    parser = ORJSONParser()
+    assert parser.parse(io.BytesIO('{"email": "é@example.com"}'.encode())) == {'email': 'é@example.com'}
+    for body in (b'{"a": ', b'{"a": NaN}'):
+        with pytest.raises(ParseError, match='JSON parse error'):
+            parser.parse(io.BytesIO(body))
+    latin = ORJSONParser().parse(io.BytesIO('{"a": "é"}'.encode('latin-1')), parser_context={'encoding': 'latin-1'})
+    assert latin == {'a': 'é'}
+
+
+@pytest.mark.django_db
+class TestDefaults:
+    def test_user_list_bytes_unchanged(self, api_client, admin_user):
+        UserFactory.create_batch(3)
+        api_client.force_authenticate(user=admin_user)
+        response = api_client.get(reverse('usersapi:users-list'))
+
+        assert response.status_code == 200
+        assert response.content == JSONRenderer().render(response.json())
+
+    def test_malformed_body_is_a_400(self, api_client):
+        response = api_client.post(
+            reverse('usersotp:otp-request'), data=b'{"email": ', content_type='application/json'
+        )
+        assert response.status_code == 400
+        assert response.json()['detail'].startswith('JSON parse error')
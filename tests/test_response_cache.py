@@ -0,0 +1,88 @@
+import gzip
+import json
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+from django.test import RequestFactory
+from django.urls import reverse
+
+from apps.common import response_cache
+from apps.users.views import CustomUsersViewSet
+from tests.factories import UserFactory
+
+
+@pytest.fixture
+def locmem(settings):
+    settings.CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'response-cache'},
+        'otp': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'response-cache-otp'},
+    }
+    settings.RESPONSE_CACHE_MIN_COMPRESS_BYTES = 256
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def test_accept_encoding_negotiation():
+    factory = RequestFactory()
+    assert response_cache.accepts_encoding(factory.get('/', HTTP_ACCEPT_ENCODING='gzip, deflate, br'), 'br')
+    assert response_cache.accepts_encoding(factory.get('/', HTTP_ACCEPT_ENCODING='*'), 'gzip')
+    assert not response_cache.accepts_encoding(factory.get('/', HTTP_ACCEPT_ENCODING='gzip;q=0, br'), 'gzip')
+    assert not response_cache.accepts_encoding(factory.get('/'), 'gzip')
+
+
+@pytest.mark.django_db
+class TestCachedUserList:
+    url = reverse('usersapi:users-list')
+
+    def test_hits_serve_stored_gzip_bytes(self, locmem, api_client, admin_user):
+        UserFactory.create_batch(5)
+        api_client.force_authenticate(user=admin_user)
+        miss = api_client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+
+        with patch.object(CustomUsersViewSet, 'get_serializer') as get_serializer:
+            hit = api_client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        get_serializer.assert_not_called()
+
+        assert hit['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in hit['Vary']
+        assert hit.content == miss.content
+        assert json.loads(gzip.decompress(hit.content))['count'] == 6
+
+        plain = api_client.get(self.url)
+        assert not plain.has_header('Content-Encoding')
+        assert plain.json() == json.loads(gzip.decompress(hit.content))
+        assert plain['ETag'] == hit['ETag']
+
+    def test_etag_revalidation(self, locmem, api_client, admin_user):
+        api_client.force_authenticate(user=admin_user)
+        etag = api_client.get(self.url)['ETag']
+        response = api_client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response.content == b''
+
+    def test_bytes_and_etags_are_not_shared_across_requesters(self, locmem, api_client, admin_user, regular_user):
+        UserFactory.create_batch(5)
+        api_client.force_authenticate(user=admin_user)
+        staff = api_client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        assert 'private' in staff['Cache-Control']
+
+        api_client.force_authenticate(user=regular_user)
+        response = api_client.get(self.url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=staff['ETag'])
+        assert response.status_code == 200
+        assert response['ETag'] != staff['ETag']
+        assert response.content != staff.content
+        assert json.loads(gzip.decompress(response.content))['count'] == 1
+
+    def test_small_bodies_stay_uncompressed(self, locmem, api_client, admin_user, settings):
+        settings.RESPONSE_CACHE_MIN_COMPRESS_BYTES = 1 << 20
+        api_client.force_authenticate(user=admin_user)
+        response = api_client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        assert not response.has_header('Content-Encoding')
+        assert response.json()['count'] == 1
+
+    def test_browsable_api_is_rendered_normally(self, locmem, api_client, admin_user):
+        api_client.force_authenticate(user=admin_user)
+        response = api_client.get(self.url, HTTP_ACCEPT='text/html')
+        assert response['Content-Type'].startswith('text/html')
@@ -0,0 +1,59 @@
+import pytest
+from unittest.mock import patch
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+
+from apps.common import schema
+
+
+@pytest.fixture(autouse=True)
+def fresh_schema(settings, tmp_path):
+    settings.SCHEMA_ARTIFACT_DIR = str(tmp_path)
+    schema.reset()
+    yield
+    schema.reset()
+
+
+@pytest.mark.django_db
+class TestOpenAPISchema:
+    def test_schema_generated_once(self, client):
+        with patch('apps.common.schema.build_artifact', wraps=schema.build_artifact) as build:
+            first = client.get(reverse('schema-json'))
+            second = client.get(reverse('schema-json'))
+        assert build.call_count == 1
+        assert first.status_code == 200
+        assert first.content == second.content
+        assert b'/auth/otp/request/' in first.content
+
+    def test_etag_revalidation(self, client):
+        response = client.get(reverse('schema-json'))
+        etag = response['ETag']
+        assert 'max-age=' in response['Cache-Control']
+
+        response = client.get(reverse('schema-json'), HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response['ETag'] == etag
+
+    def test_versioned_url_is_immutable(self, client):
+        digest = schema.get_artifact().digest
+        response = client.get(reverse('schema-json-versioned', args=[digest]))
+        assert response.status_code == 200
+        assert 'immutable' in response['Cache-Control']
+        assert client.get(reverse('schema-json-versioned', args=['0' * 16])).status_code == 404
+
+    def test_artifact_reused_for_same_code_version(self, settings):
+        settings.CODE_VERSION = 'abc123'
+        call_command('generate_schema')
+
+        with patch('apps.common.schema.build_artifact') as build:
+            artifact = schema.get_artifact()
+        build.assert_not_called()
+        assert artifact.version == 'abc123'
+
+        settings.CODE_VERSION = 'def456'
+        assert schema.load_artifact('def456') is None
+
+    def test_generate_requires_code_version(self, settings):
+        settings.CODE_VERSION = ''
+        with pytest.raises(CommandError, match='CODE_VERSION is not set'):
+            call_command('generate_schema')
@@ -0,0 +1,53 @@
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+
+from apps.users.models import User
+from tests.factories import UserFactory
+
+
+@pytest.mark.django_db
+class TestUserBulkCommands:
+    def test_import_csv(self, tmp_path):
+        UserFactory(username='taken', email='existing@example.com')
+        path = tmp_path / 'users.csv'
+        path.write_text(
+            'email,username,first_name,last_name,is_verified\n'
+            'alice@EXAMPLE.com,alice,Alice,Smith,true\n'
+            'not-an-email,bad,Bad,Row,false\n'
+            'bob@example.com,taken,Bob,Jones,false\n'
+            'existing@example.com,other,Ex,Isting,false\n'
+        )
+        out = io.StringIO()
+        call_command('import_users', str(path), stdout=out, stderr=io.StringIO())
+
+        assert 'Read 4 rows: 2 created, 0 updated, 1 invalid' in out.getvalue()
+        alice = User.objects.get(email='alice@example.com')
+        assert alice.is_verified
+        assert not alice.has_usable_password()
+        assert User.objects.get(email='bob@example.com').username.startswith('taken-')
+
+    def test_import_ndjson_hashed_passwords(self, tmp_path):
+        from django.contrib.auth.hashers import make_password
+
+        path = tmp_path / 'users.ndjson'
+        path.write_text(
+            json.dumps({'email': 'carol@example.com', 'password': make_password('secret123')}) + '\n'
+            + json.dumps({'email': 'dave@example.com', 'password': 'plaintext'}) + '\n'
+        )
+        call_command('import_users', str(path), '--passwords', 'hashed', stdout=io.StringIO(), stderr=io.StringIO())
+
+        assert User.objects.get(email='carol@example.com').check_password('secret123')
+        assert not User.objects.filter(email='dave@example.com').exists()
+
+    def test_export_ndjson(self):
+        UserFactory.create_batch(3)
+        out = io.StringIO()
+        call_command(
+            'export_users', '--format', 'ndjson', '--fields', 'email,username', stdout=out, stderr=io.StringIO()
+        )
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        assert len(rows) == 3
+        assert set(rows[0]) == {'email', 'username'}
@@ -5,6 +5,10 @@ from unittest.mock import patch
 from tests.factories import UserFactory
 from django.core.cache import cache
 
+from apps.common.cache import otp_cache
+from apps.users.services import OTPService
+
+
 @pytest.mark.django_db
 class TestUserManagement:
     def test_create_user(self, user_factory):
@@ -18,15 +22,15 @@ class TestUserManagement:
         url = reverse('usersapi:users-me')
         response = api_client.get(url)
         assert response.status_code == status.HTTP_200_OK
-        assert response.data['email'] == regular_user.email
+        assert response.json()['email'] == regular_user.email
 
     def test_admin_user_access(self, api_client, admin_user):
         api_client.force_authenticate(user=admin_user)
         url = reverse('usersapi:users-list')
         response = api_client.get(url)
         assert response.status_code == status.HTTP_200_OK
-        assert isinstance(response.data.get("results", None), list)
-        assert len(response.data) > 0
+        assert isinstance(response.json().get("results", None), list)
+        assert len(response.json()) > 0
 
     def test_request_otp(self, api_client):
         user = UserFactory(email='testuser@example.com')
@@ -73,9 +77,37 @@ class TestUserManagement:
         url = reverse('usersapi:users-list')
         response = api_client.get(url)
         assert response.status_code == status.HTTP_200_OK
-        assert isinstance(response.data.get("results", None), list)
+        assert isinstance(response.json().get("results", None), list)
 
         # Simulate cache hit
         cached_response = api_client.get(url)
         assert cached_response.status_code == status.HTTP_200_OK
-        assert cached_response.data == response.data
\ No newline at end of file
+        assert cached_response.json() == response.json()
+
+
+@pytest.mark.django_db
+class TestUserOTPMethods:
+    @pytest.fixture(autouse=True)
+    def locmem_cache(self, settings):
+        settings.CACHES = {
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'otp': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'otp'},
+        }
+
+    def test_generate_and_verify_use_cache_not_row(self, django_assert_num_queries):
+        user = UserFactory(email='legacy@example.com', is_verified=False)
+        with django_assert_num_queries(0):
+            otp = user.generate_otp()
+        assert otp_cache.get(OTPService.key('otp', 'legacy@example.com')) == otp
+
+        assert user.verify_otp(otp)
+        user.refresh_from_db()
+        assert user.is_verified
+        assert otp_cache.get(OTPService.key('otp', 'legacy@example.com')) is None
+
+    def test_otp_invalidated_after_max_tries(self):
+        user = UserFactory(email='legacy@example.com', max_otp_try=2)
+        otp = user.generate_otp()
+        assert not user.verify_otp('000000')
+        assert not user.verify_otp('000000')
+        assert not user.verify_otp(otp)
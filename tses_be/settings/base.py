@@ -1,3 +1,4 @@
+import importlib.util
 from datetime import timedelta
 from pathlib import Path
 
@@ -58,6 +59,9 @@ LOCAL_APPS = ["apps.common", "apps.users", "apps.audits"]
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    "apps.common.middleware.MetricsMiddleware",
+    "apps.common.middleware.DeferredTasksMiddleware",
+    "apps.common.middleware.IPPolicyMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
@@ -65,6 +69,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "apps.common.middleware.ProfilingMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -102,6 +107,38 @@ WSGI_APPLICATION = "tses_be.wsgi.application"
 
 DATABASES = {"default": env.db("DATABASE_URL")}
 
+# Connection pooling
+# Postgres connections are pooled per process with psycopg3's pool. Pool sizes
+# are per role: web processes (one connection per gunicorn thread) and Celery
+# worker children (one task at a time) need very different limits, so the
+# worker start script sets DB_POOL_ROLE=celery. Without psycopg_pool, fall
+# back to persistent connections.
+DB_POOL_ROLE = env("DB_POOL_ROLE", default="web")
+DB_POOL_DEFAULTS = {
+    "web": {"min_size": 2, "max_size": 10},
+    "celery": {"min_size": 1, "max_size": 2},
+}
+
+if DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql":
+    # Pre-use health check: with pooling, Django passes psycopg's
+    # check_connection to the pool so a server-side disconnect never reaches a
+    # request; with persistent connections it pings before reuse.
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
+    if importlib.util.find_spec("psycopg_pool"):
+        _pool_role = DB_POOL_ROLE.upper()
+        _pool_defaults = DB_POOL_DEFAULTS.get(DB_POOL_ROLE, DB_POOL_DEFAULTS["web"])
+        DATABASES["default"].setdefault("OPTIONS", {})["pool"] = {
+            "min_size": env.int(f"DB_POOL_{_pool_role}_MIN_SIZE", default=_pool_defaults["min_size"]),
+            "max_size": env.int(f"DB_POOL_{_pool_role}_MAX_SIZE", default=_pool_defaults["max_size"]),
+            # Seconds a request waits for a free connection before erroring.
+            "timeout": env.float("DB_POOL_TIMEOUT", default=10.0),
+            "max_idle": env.float("DB_POOL_MAX_IDLE", default=300.0),
+            "max_lifetime": env.float("DB_POOL_MAX_LIFETIME", default=3600.0),
+        }
+    else:
+        DATABASES["default"]["CONN_MAX_AGE"] = env.int("CONN_MAX_AGE", default=60)
+
 
 PASSWORD_HASHERS = [
     "django.contrib.auth.hashers.Argon2PasswordHasher",
@@ -182,6 +219,16 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
+    # orjson-backed drop-ins for DRF's JSONRenderer/JSONParser (same bytes, less CPU).
+    "DEFAULT_RENDERER_CLASSES": [
+        "apps.common.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "apps.common.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
 }
 
 # OTP Settings
@@ -190,13 +237,125 @@ MAX_OTP_ATTEMPTS = 3
 
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "BACKEND": "apps.common.cache.InstrumentedRedisCache",
         "LOCATION": "redis://redis:6379/0",
         "KEY_PREFIX": "tses_be", 
     }
 }
 
+# OTP state (codes, rate limits, lockouts) has its own alias. Set
+# OTP_REDIS_URLS to a comma-separated list of Redis servers to shard it with
+# consistent hashing; otherwise it shares the default Redis.
+OTP_REDIS_URLS = env.list("OTP_REDIS_URLS", default=[])
+CACHES["otp"] = {
+    "BACKEND": "apps.common.cache.ShardedRedisCache" if OTP_REDIS_URLS else "apps.common.cache.InstrumentedRedisCache",
+    "LOCATION": OTP_REDIS_URLS or CACHES["default"]["LOCATION"],
+    "KEY_PREFIX": "tses_be",
+}
+
 CACHE_TIMEOUT = 300
+# Cached API responses are served up to this long past CACHE_TIMEOUT while
+# one request recomputes them (see apps.common.read_through).
+CACHE_STALE_SECONDS = 60
+AUDIT_STATS_CACHE_TIMEOUT = 60
+# Cached JSON responses are stored pre-compressed ("gzip", "br" with the
+# brotli package installed, or "" for none) once they reach this size.
+RESPONSE_CACHE_COMPRESSION = env("RESPONSE_CACHE_COMPRESSION", default="gzip")
+RESPONSE_CACHE_MIN_COMPRESS_BYTES = 1024
+READ_THROUGH_CACHE = {
+    # Early-refresh eagerness; 1.0 is the XFetch default, higher refreshes sooner.
+    "BETA": 1.0,
+    # Longest a recomputation may hold its key's lock.
+    "LOCK_SECONDS": 10,
+    # How long a miss waits for another process's result before computing it too.
+    "WAIT_SECONDS": 2.0,
+    "POLL_SECONDS": 0.05,
+}
+
+# Live audit feed
+# Audit tasks XADD each entry to AUDIT_STREAM_KEY (trimmed to about
+# AUDIT_STREAM_MAXLEN entries); /api/v1/audit/stream/ follows it over SSE.
+# Leave AUDIT_STREAM_REDIS_URL empty to disable both sides.
+AUDIT_STREAM_REDIS_URL = env("AUDIT_STREAM_REDIS_URL", default=CACHES["default"]["LOCATION"])
+AUDIT_STREAM_KEY = "tses_be:audit:events"
+AUDIT_STREAM_MAXLEN = env.int("AUDIT_STREAM_MAXLEN", default=10000)
+AUDIT_STREAM_HEARTBEAT_SECONDS = 15
+AUDIT_STREAM_MAX_CLIENTS = env.int("AUDIT_STREAM_MAX_CLIENTS", default=100)
+
+# Audit coalescing
+# Rejected attempts (rate-limited OTP requests, wrong codes, attempts while
+# locked) repeating the same action, email, IP and user agent within this
+# many seconds increment one row's count instead of adding rows. 0 disables.
+AUDIT_COALESCE_SECONDS = env.int("AUDIT_COALESCE_SECONDS", default=0)
+
+# IP policy
+# CIDR allow/deny lists enforced by IPPolicyMiddleware; the most specific
+# matching network wins. IPRule rows (admin) are added on top and reloaded by
+# every process within IP_POLICY_REFRESH_SECONDS of a change.
+IP_ALLOW_LIST = env.list("IP_ALLOW_LIST", default=[])
+IP_DENY_LIST = env.list("IP_DENY_LIST", default=[])
+IP_POLICY_DEFAULT_ACTION = env("IP_POLICY_DEFAULT_ACTION", default="allow")
+IP_POLICY_REFRESH_SECONDS = env.int("IP_POLICY_REFRESH_SECONDS", default=5)
+# Peers allowed to set X-Forwarded-For (the nginx container on the docker network).
+TRUSTED_PROXIES = env.list(
+    "TRUSTED_PROXIES",
+    default=["127.0.0.0/8", "::1/128", "10.0.0.0/8", "172.16.0.0/12", "192.168.0.0/16", "fc00::/7"],
+)
+
+# Heavy hitters (top abusive IPs/emails on the OTP endpoints)
+# Per stream and bucket: a DEPTH x WIDTH Count-Min Sketch of u32 counters
+# (32 KiB at the defaults) and a TOP_K sorted set, kept in the default Redis
+# for WINDOW_SECONDS.
+HEAVY_HITTERS = {
+    "WIDTH": env.int("HEAVY_HITTERS_WIDTH", default=2048),
+    "DEPTH": env.int("HEAVY_HITTERS_DEPTH", default=4),
+    "TOP_K": env.int("HEAVY_HITTERS_TOP_K", default=100),
+    "BUCKET_SECONDS": env.int("HEAVY_HITTERS_BUCKET_SECONDS", default=300),
+    "WINDOW_SECONDS": env.int("HEAVY_HITTERS_WINDOW_SECONDS", default=3600),
+}
+
+# OpenAPI schema
+# The schema is generated once per CODE_VERSION (set it to the git SHA or
+# release tag at build time) and served from SCHEMA_ARTIFACT_DIR; the docs UIs
+# load it from the precomputed endpoint instead of regenerating it.
+CODE_VERSION = env("CODE_VERSION", default="")
+SCHEMA_ARTIFACT_DIR = env("SCHEMA_ARTIFACT_DIR", default=str(BASE_DIR / "schema"))
+SCHEMA_CACHE_MAX_AGE = 3600
+
+SWAGGER_SETTINGS = {"SPEC_URL": "schema-json"}
+REDOC_SETTINGS = {"SPEC_URL": "schema-json"}
+
+# Metrics
+# Set PROMETHEUS_MULTIPROC_DIR (shared, emptied on boot) when running more than
+# one worker process so /metrics aggregates across all of them. Without
+# METRICS_AUTH_TOKEN, /metrics is only served when DEBUG is on.
+METRICS_AUTH_TOKEN = env("METRICS_AUTH_TOKEN", default="")
+CELERY_METRICS_PORT = env.int("CELERY_METRICS_PORT", default=None)
+
+# Query instrumentation
+# SQL statements slower than SLOW_QUERY_THRESHOLD_MS (0 disables) are logged
+# with their call site. Views may declare a query_budget; going over it is
+# logged, or raises QueryBudgetExceeded when REQUEST_BUDGETS_STRICT (tests).
+# The same applies to a view's cache_budget (Redis round trips).
+SLOW_QUERY_THRESHOLD_MS = env.int("SLOW_QUERY_THRESHOLD_MS", default=200)
+REQUEST_BUDGETS_STRICT = False
+
+# Request profiling
+# Profiles are taken when a staff user sends "X-Profile: 1", for 1 in every
+# PROFILING_SAMPLE_RATE requests (0 disables) and for requests running longer
+# than PROFILING_SLOW_THRESHOLD_MS (0 disables).
+PROFILING_ENABLED = env.bool("PROFILING_ENABLED", default=False)
+PROFILING_HEADER = "HTTP_X_PROFILE"
+PROFILING_SAMPLE_RATE = env.int("PROFILING_SAMPLE_RATE", default=0)
+PROFILING_SLOW_THRESHOLD_MS = env.int("PROFILING_SLOW_THRESHOLD_MS", default=0)
+PROFILING_INTERVAL_MS = env.int("PROFILING_INTERVAL_MS", default=5)
+PROFILING_DIR = env("PROFILING_DIR", default=str(BASE_DIR / "profiles"))
+PROFILING_MAX_FILES = env.int("PROFILING_MAX_FILES", default=200)
+
+# Admin
+# Changelists of tables larger than this show the planner's row estimate
+# instead of an exact COUNT(*) (Postgres only).
+ADMIN_ESTIMATED_COUNT_THRESHOLD = env.int("ADMIN_ESTIMATED_COUNT_THRESHOLD", default=100000)
 
 
 SIMPLE_JWT = {
@@ -232,6 +391,16 @@ DJOSER = {
 }
 
 
+# Logging
+# Loggers write to "async", which only queues the record; a listener thread
+# per process formats it as JSON and writes it to the console/file sinks.
+# LOG_SAMPLE_RATES ({"logger": fraction kept}) and LOG_RATE_LIMITS
+# ({"logger": records per second}), both JSON, thin out INFO-and-below records
+# of busy loggers; drops are counted in tses_log_records_dropped_total.
+LOG_QUEUE_SIZE = env.int("LOG_QUEUE_SIZE", default=10000)
+LOG_SAMPLE_RATES = env.json("LOG_SAMPLE_RATES", default={})
+LOG_RATE_LIMITS = env.json("LOG_RATE_LIMITS", default={"apps.users": 200})
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -244,34 +413,53 @@ LOGGING = {
             "format": "{levelname} {message}",
             "style": "{",
         },
+        "json": {
+            "()": "apps.common.log.JSONFormatter",
+        },
+    },
+    "filters": {
+        "sample": {
+            "()": "apps.common.log.SamplingFilter",
+            "rates": LOG_SAMPLE_RATES,
+        },
+        "rate_limit": {
+            "()": "apps.common.log.RateLimitFilter",
+            "limits": LOG_RATE_LIMITS,
+        },
     },
     "handlers": {
+        "async": {
+            "()": "apps.common.log.AsyncQueueHandler",
+            "targets": ["console", "file"],
+            "maxsize": LOG_QUEUE_SIZE,
+            "filters": ["sample", "rate_limit"],
+        },
         "console": {
             "level": "INFO",
             "class": "logging.StreamHandler",
-            "formatter": "verbose",
+            "formatter": "json",
         },
         "file": {
             "level": "INFO",
             "class": "logging.FileHandler",
             "filename": BASE_DIR / "logs" / "tses_be.log",
-            "formatter": "verbose",
+            "formatter": "json",
         },
     },
     "loggers": {
         "apps.tsess": {
-            "handlers": ["console", "file"],
+            "handlers": ["async"],
             "level": "INFO",
             "propagate": False,
         },
         "apps.users": {
-            "handlers": ["console", "file"],
+            "handlers": ["async"],
             "level": "INFO",
             "propagate": False,
         },
     },
     "root": {
         "level": "INFO",
-        "handlers": ["console"],
+        "handlers": ["async"],
     },
 }
@@ -0,0 +1,21 @@
+from fakeredis import FakeConnection
+
+from .test import *  # noqa
+
+# Real Redis cache backend against an in-process fakeredis server, so the
+# OTP/rate-limit code paths run exactly as in production (test.py uses
+# DummyCache, which turns every cache call into a no-op).
+CACHES = {
+    "default": {
+        "BACKEND": "apps.common.cache.InstrumentedRedisCache",
+        "LOCATION": "redis://benchmark:6379/0",
+        "KEY_PREFIX": "tses_be",
+        "OPTIONS": {"connection_class": FakeConnection},
+    },
+    "otp": {
+        "BACKEND": "apps.common.cache.InstrumentedRedisCache",
+        "LOCATION": "redis://benchmark:6379/0",
+        "KEY_PREFIX": "tses_be",
+        "OPTIONS": {"connection_class": FakeConnection},
+    },
+}
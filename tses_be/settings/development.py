@@ -14,7 +14,7 @@ ALLOWED_HOSTS = ["0.0.0.0", "127.0.0.1", "localhost"]
 
 CSRF_TRUSTED_ORIGINS = ["http://0.0.0.0:8080", "http://127.0.0.1:8080", "http://localhost:8080"]
 
-EMAIL_BACKEND = "djcelery_email.backends.CeleryEmailBackend"
+EMAIL_BACKEND = env("EMAIL_BACKEND", default="djcelery_email.backends.CeleryEmailBackend")
 # EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 
 EMAIL_HOST = env("EMAIL_HOST", default="mailhog")  # Use "mailhog" for local development
@@ -32,4 +32,4 @@ DEFAULT_FROM_EMAIL = env(
     default="tses BE <no-reply@localhost>",
 )
 DOMAIN = env("DOMAIN")
-SITE_NAME = "tses BE"
\ No newline at end of file
+SITE_NAME = "tses BE"
@@ -0,0 +1,28 @@
+from .base import *  # noqa
+from .base import CACHES, OTP_REDIS_URLS, env
+
+SECRET_KEY = env("SECRET_KEY")
+
+DEBUG = False
+
+ALLOWED_HOSTS = env.list("ALLOWED_HOSTS", default=["localhost"])
+
+CSRF_TRUSTED_ORIGINS = env.list("CSRF_TRUSTED_ORIGINS", default=[])
+
+SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
+
+CACHES["default"]["LOCATION"] = env("REDIS_URL", default="redis://redis:6379/0")
+if not OTP_REDIS_URLS:
+    CACHES["otp"]["LOCATION"] = CACHES["default"]["LOCATION"]
+AUDIT_STREAM_REDIS_URL = env("AUDIT_STREAM_REDIS_URL", default=CACHES["default"]["LOCATION"])
+
+EMAIL_BACKEND = "djcelery_email.backends.CeleryEmailBackend"
+EMAIL_HOST = env("EMAIL_HOST")
+EMAIL_PORT = env("EMAIL_PORT", default="587")
+EMAIL_HOST_USER = env("EMAIL_HOST_USER", default="")
+EMAIL_HOST_PASSWORD = env("EMAIL_HOST_PASSWORD", default="")
+EMAIL_USE_TLS = env.bool("EMAIL_USE_TLS", default=True)
+
+DEFAULT_FROM_EMAIL = env("DEFAULT_FROM_EMAIL", default="tses BE <no-reply@localhost>")
+DOMAIN = env("DOMAIN")
+SITE_NAME = "tses BE"
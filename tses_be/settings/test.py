@@ -30,9 +30,18 @@ SITE_NAME = "TSES BE"
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
-    }
+    },
+    'otp': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
 }
 
+# No live audit feed unless a test wires one up
+AUDIT_STREAM_REDIS_URL = ""
+
+# Fail any request that goes over its view's query_budget or cache_budget
+REQUEST_BUDGETS_STRICT = True
+
 # Use in-memory database for faster tests
 DATABASES = {
     'default': {
@@ -7,16 +7,28 @@ from drf_yasg import openapi
 from drf_yasg.views import get_schema_view
 from rest_framework import permissions
 
+from apps.common.views import (
+    liveness_view,
+    metrics_view,
+    openapi_schema_versioned_view,
+    openapi_schema_view,
+    profile_download_view,
+    profile_list_view,
+    readiness_view,
+)
+
 # from apps.users.views import CustomTokenCreateView
 
+api_info = openapi.Info(
+    title="TSES Management System API",
+    default_version="v1",
+    description="API endpoints for TSES Management System",
+    contact=openapi.Contact(email="tankoraphael@gmail.com"),
+    license=openapi.License(name="MIT License"),
+)
+
 schema_view = get_schema_view(
-    openapi.Info(
-        title="TSES Management System API",
-        default_version="v1",
-        description="API endpoints for TSES Management System",
-        contact=openapi.Contact(email="tankoraphael@gmail.com"),
-        license=openapi.License(name="MIT License"),
-    ),
+    api_info,
     public=True,
     permission_classes=(permissions.AllowAny,),
 )
@@ -24,24 +36,30 @@ schema_view = get_schema_view(
 
 urlpatterns = [
     path("", RedirectView.as_view(url="api/v1/auth/redoc/", permanent=False)),
+    path("admin/profiles/", profile_list_view, name="admin-profiles"),
+    path("admin/profiles/<str:name>", profile_download_view, name="admin-profile-download"),
     path("admin/", admin.site.urls),
+    path("metrics", metrics_view, name="metrics"),
+    path("health/live", liveness_view, name="health-live"),
+    path("health/ready", readiness_view, name="health-ready"),
     path("api/v1/auth/", include("apps.users.urls.otp", namespace="usersotp")),
     path("api/v1/auth/", include("apps.users.urls.base", namespace="usersapi")),
     path("api/v1/audit/", include("apps.audits.urls", namespace="tsess")),
     path(
         "api/v1/auth/swagger/",
-        schema_view.with_ui("swagger", cache_timeout=0),
+        schema_view.with_ui("swagger", cache_timeout=settings.SCHEMA_CACHE_MAX_AGE),
         name="schema-swagger-ui",
     ),
     path(
         "api/v1/auth/redoc/",
-        schema_view.with_ui("redoc", cache_timeout=0),
+        schema_view.with_ui("redoc", cache_timeout=settings.SCHEMA_CACHE_MAX_AGE),
         name="schema-redoc",
     ),
+    path("api/v1/auth/swagger.json/", openapi_schema_view, name="schema-json"),
     path(
-        "api/v1/auth/swagger.json/",
-        schema_view.without_ui(cache_timeout=0),
-        name="schema-json",
+        "api/v1/auth/swagger-<str:digest>.json",
+        openapi_schema_versioned_view,
+        name="schema-json-versioned",
     ),
 ]
 
@@ -50,4 +68,4 @@ if settings.DEBUG:
 
 admin.site.site_header = "TSES Management Admin Portal"
 admin.site.site_title = "TSES Management Admin Portal"
-admin.site.index_title = "Welcome to TSES Management Admin Portal"
\ No newline at end of file
+admin.site.index_title = "Welcome to TSES Management Admin Portal"